@@ -0,0 +1,353 @@
+"""Load-test every API route in-process and report latency percentiles as JSON.
+
+Usage:
+    python benchmarks/bench_api.py --movies 100000 --concurrency 32 --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_api.py --movies 10000 --mock --output results.json
+    python benchmarks/bench_api.py --mock --baseline results.json --tolerance 0.2
+
+Generates a synthetic catalog (validated through the Movie model), loads it
+into a scratch database on a local mongod (or mongomock with --mock, which
+needs `pip install mongomock-motor`), starts the app's lifespan and drives
+each route with an in-process ASGI client at the requested concurrency. With --baseline, exits non-zero when a route's p95 or
+throughput regresses by more than --tolerance against a previous run.
+
+The posters route serves derivatives of one uploaded poster (needs Pillow), and
+the media route random --media-range-kb ranges of a --media-mb scratch file;
+both stores live in a scratch directory unless POSTER_DIR/MEDIA_DIR are set.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+from browse import SORT_FIELDS  # noqa: E402
+from synthetic import GENRES, LANGUAGES, generate_movies, sample_queries  # noqa: E402
+from trending import WINDOWS  # noqa: E402
+
+DB_NAME = "moviestream_bench"
+ROUTES = [
+    "home", "list", "page", "detail", "batch", "similar", "search", "suggest", "trending", "browse", "genres",
+    "posters", "media", "health", "increment_view", "admin_stats", "export", "bulk_import",
+]
+# Routes that move a whole catalog or file per request, measured with fewer requests
+HEAVY_ROUTES = ("bulk_import", "export")
+MEDIA_FILE = "bench.mp4"
+CSV_FIELDS = ["title", "synopsis", "genres", "cast", "releaseYear", "runtime", "posterUrl", "videoUrl", "language"]
+
+
+def percentile(samples, q):
+    if not samples:
+        return None
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def summarize(samples, errors, elapsed):
+    samples.sort()
+    ms = lambda s: round(s * 1000, 3) if s is not None else None  # noqa: E731
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": ms(sum(samples) / len(samples)) if samples else None,
+        "p50_ms": ms(percentile(samples, 0.50)),
+        "p95_ms": ms(percentile(samples, 0.95)),
+        "p99_ms": ms(percentile(samples, 0.99)),
+        "max_ms": ms(samples[-1]) if samples else None,
+    }
+
+
+def import_csv(rng, rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for doc in generate_movies(rows, seed=rng.getrandbits(32)):
+        writer.writerow({
+            **{field: doc[field] for field in CSV_FIELDS},
+            "genres": "|".join(doc["genres"]),
+            "cast": "|".join(doc["cast"]),
+        })
+    return out.getvalue().encode("utf-8")
+
+
+def poster_image(seed):
+    from PIL import Image
+
+    # Noise rather than a flat color, so encoding costs what a real poster's does
+    image = Image.frombytes("RGB", (600, 900), random.Random(seed).randbytes(600 * 900 * 3))
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=90)
+    return out.getvalue()
+
+
+async def upload_poster(client, movie_id, headers, seed):
+    response = await client.post(
+        f"/api/admin/movies/{movie_id}/poster",
+        files={"file": ("poster.jpg", poster_image(seed), "image/jpeg")},
+        headers=headers,
+    )
+    response.raise_for_status()
+    return [url for size in response.json()["posters"].values() for key, url in size.items() if key in ("jpg", "webp")]
+
+
+def write_media_file(media_dir, size_mb, seed):
+    os.makedirs(media_dir, exist_ok=True)
+    rng = random.Random(seed)
+    with open(os.path.join(media_dir, MEDIA_FILE), "wb") as f:
+        for _ in range(size_mb):
+            f.write(rng.randbytes(1024 * 1024))
+
+
+def build_scenarios(movie_ids, args, headers, poster_urls):
+    rng = random.Random(args.seed)
+    queries = sample_queries(1000, seed=args.seed)
+    # Detail and view traffic is skewed towards a hot set, like real catalogs
+    hot = movie_ids[: max(1, len(movie_ids) // 100)]
+    pick_movie = lambda: rng.choice(hot) if rng.random() < 0.8 else rng.choice(movie_ids)  # noqa: E731
+    max_skip = min(len(movie_ids), 1000)
+    media_bytes = args.media_mb * 1024 * 1024
+    range_bytes = args.media_range_kb * 1024
+
+    def media_range():
+        start = rng.randrange(0, max(1, media_bytes - range_bytes))
+        return {"headers": {"Range": f"bytes={start}-{start + range_bytes - 1}"}}
+
+    def browse_params():
+        params = {
+            "genres": ",".join(rng.sample(GENRES, rng.choice([1, 1, 2]))),
+            "sort": rng.choice(["", "-"]) + rng.choice(SORT_FIELDS),
+            "skip": rng.randrange(0, 100, 20),
+            "limit": 20,
+        }
+        if rng.random() < 0.5:
+            year = rng.randrange(1970, 2020)
+            params.update(yearFrom=year, yearTo=year + 10)
+        if rng.random() < 0.3:
+            params["language"] = rng.choice(LANGUAGES)
+        return params
+
+    return {
+        "home": lambda: ("GET", "/api/home", {}),
+        "list": lambda: ("GET", "/api/movies", {"params": {
+            "skip": rng.randrange(0, max_skip, 20), "limit": 20,
+            **({"genre": rng.choice(GENRES)} if rng.random() < 0.5 else {}),
+        }}),
+        "page": lambda: ("GET", "/api/movies/page", {"params": {
+            "sort": rng.choice(["newest", "popular"]), "limit": 20,
+            **({"genre": rng.choice(GENRES)} if rng.random() < 0.5 else {}),
+        }}),
+        "detail": lambda: ("GET", f"/api/movies/{pick_movie()}", {}),
+        # A watchlist's worth of ids
+        "batch": lambda: ("POST", "/api/movies/batch", {"json": {
+            "ids": [pick_movie() for _ in range(args.batch_ids)],
+        }}),
+        "similar": lambda: ("GET", f"/api/movies/{pick_movie()}/similar", {}),
+        "search": lambda: ("GET", "/api/movies/search/query", {"params": {"q": rng.choice(queries), "limit": 20}}),
+        # A keystroke: the first few characters of a query
+        "suggest": lambda: ("GET", "/api/movies/suggest", {"params": {"q": rng.choice(queries)[:rng.randint(1, 6)]}}),
+        "trending": lambda: ("GET", "/api/movies/trending", {"params": {"window": rng.choice(list(WINDOWS))}}),
+        "browse": lambda: ("GET", "/api/movies/browse", {"params": browse_params()}),
+        "genres": lambda: ("GET", "/api/genres", {}),
+        "posters": lambda: ("GET", rng.choice(poster_urls), {}),
+        "media": lambda: ("GET", f"/api/media/{MEDIA_FILE}", media_range()),
+        "health": lambda: ("GET", "/api/health", {}),
+        "increment_view": lambda: ("POST", f"/api/movies/{pick_movie()}/increment-view", {}),
+        "admin_stats": lambda: ("GET", "/api/admin/stats", {"headers": headers}),
+        "export": lambda: ("GET", "/api/admin/export/movies", {
+            "headers": headers, "params": {"format": rng.choice(["ndjson", "csv"])},
+        }),
+        "bulk_import": lambda: ("POST", "/api/admin/movies/bulk-import", {
+            "headers": headers,
+            "files": {"file": ("movies.csv", import_csv(rng, args.import_rows), "text/csv")},
+        }),
+    }
+
+
+async def drive(client, scenario, total, concurrency):
+    samples, errors = [], 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = scenario()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(samples, errors, time.perf_counter() - started)
+
+
+async def load_catalog(db, movies):
+    from server import Genre, Movie
+    import fast_json
+
+    await db.movies.drop()
+    await db.genres.drop()
+    await db.genres.insert_many([Genre(name=name, slug=name.lower()).model_dump() for name in GENRES])
+
+    movie_ids, batch = [], []
+    for raw in generate_movies(movies):
+        raw["createdAt"] = datetime.fromisoformat(raw["createdAt"])
+        doc = Movie(**raw).model_dump()
+        doc["createdAt"] = fast_json.format_datetime(doc["createdAt"])
+        movie_ids.append(doc["id"])
+        batch.append(doc)
+        if len(batch) == 10000:
+            await db.movies.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.movies.insert_many(batch, ordered=False)
+    # Most-viewed first so the hot set is the popular head of the catalog
+    popular = await db.movies.find({}, {"_id": 0, "id": 1}).sort("viewCount", -1).to_list(None)
+    return [movie["id"] for movie in popular] or movie_ids
+
+
+async def run(args):
+    os.environ.setdefault("MONGO_URL", args.mongo_url)
+    os.environ["DB_NAME"] = DB_NAME
+    if not args.cache:
+        os.environ["CACHE_MAX_BYTES"] = "0"
+    # Every request comes from one client; measure the routes, not the rate limiter
+    os.environ.setdefault("RATE_LIMIT_SEARCH_PER_MINUTE", "0")
+    os.environ.setdefault("RATE_LIMIT_VIEWS_PER_MINUTE", "0")
+    scratch = tempfile.mkdtemp(prefix="moviestream-bench-")
+    os.environ.setdefault("POSTER_DIR", os.path.join(scratch, "posters"))
+    os.environ.setdefault("MEDIA_DIR", os.path.join(scratch, "videos"))
+    write_media_file(os.environ["MEDIA_DIR"], args.media_mb, args.seed)
+
+    import httpx
+    import server
+
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+
+        # Kept by Database.connect() in place of a real client
+        server.database.client = AsyncMongoMockClient()
+
+    # Connect ahead of the startup hooks so the catalog is loaded before the indexes are built
+    await server.database.connect()
+    db = server.database.primary
+    started = time.perf_counter()
+    movie_ids = await load_catalog(db, args.movies)
+    load_seconds = time.perf_counter() - started
+
+    headers = {"Authorization": f"Bearer {server.ADMIN_TOKEN}"}
+    routes = args.routes.split(",") if args.routes else ROUTES
+
+    results = {}
+    async with server.app.router.lifespan_context(server.app):
+        while not all(index.ready for index in (
+            server.search_index, server.browse_index, server.suggester, server.trending,
+        )):
+            await asyncio.sleep(0.1)
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            poster_urls = await upload_poster(client, movie_ids[0], headers, args.seed) if "posters" in routes else []
+            scenarios = build_scenarios(movie_ids, args, headers, poster_urls)
+            for route in routes:
+                total = args.heavy_requests if route in HEAVY_ROUTES else args.requests
+                # Warm caches, pools and code paths before measuring
+                await drive(client, scenarios[route], min(args.warmup, total), args.concurrency)
+                results[route] = await drive(client, scenarios[route], total, args.concurrency)
+                print(json.dumps({"route": route, **results[route]}), file=sys.stderr)
+
+        if not args.keep:
+            await db.movies.drop()
+            await db.genres.drop()
+    shutil.rmtree(scratch, ignore_errors=True)
+
+    import fast_json
+    return {
+        "config": {
+            "movies": args.movies,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "import_rows": args.import_rows,
+            "batch_ids": args.batch_ids,
+            "media_range_kb": args.media_range_kb,
+            "cache": args.cache,
+            "fast_json": server.FAST_JSON_RESPONSES,
+            "backend": "mongomock" if args.mock else "mongod",
+            "seed": args.seed,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "encoder": "orjson" if fast_json.orjson is not None else "json",
+        },
+        "load_seconds": round(load_seconds, 2),
+        "routes": results,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for route, current in results["routes"].items():
+        previous = baseline.get("routes", {}).get(route)
+        if not previous:
+            continue
+        if previous["p95_ms"] and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            found.append(f"{route}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            found.append(f"{route}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--mock", action="store_true", help="use mongomock instead of a local mongod")
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000, help="measured requests per route")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--routes", help=f"comma-separated subset of {','.join(ROUTES)}")
+    parser.add_argument("--import-rows", type=int, default=1000, help="rows per bulk-import request")
+    parser.add_argument("--heavy-requests", "--import-requests", type=int, default=5,
+                        help=f"measured requests for {', '.join(HEAVY_ROUTES)}")
+    parser.add_argument("--batch-ids", type=int, default=50, help="ids per batch request")
+    parser.add_argument("--media-mb", type=int, default=64, help="size of the scratch media file")
+    parser.add_argument("--media-range-kb", type=int, default=1024, help="bytes per media range request")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="disable the response cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--baseline", help="previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
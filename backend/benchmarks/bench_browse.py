@@ -0,0 +1,184 @@
+"""Compare the columnar browse index against equivalent MongoDB aggregations.
+
+Usage:
+    python benchmarks/bench_browse.py --movies 1000000 --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_browse.py --movies 20000 --mock
+
+Loads a synthetic catalog into a scratch database (or mongomock with --mock),
+creates the app's indexes and builds the in-memory browse columns. Then, for
+each filter scenario, it times three things:
+
+- BrowseIndex.query alone: filter, sort and facet counts.
+- The same query plus fetching the page's cards by id (what the endpoint does).
+- One $match + $facet aggregation returning the same page, total and facets.
+
+Totals and facet counts from both sides are checked for agreement.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browse import BrowseIndex  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from synthetic import generate_movies  # noqa: E402
+
+CARD_FIELDS = ["id", "title", "posterUrl", "releaseYear", "runtime", "genres", "viewCount", "createdAt"]
+
+SCENARIOS = {
+    "everything by views": {"sort": "-viewCount"},
+    "two genres (all), 2000-2020, newest": {
+        "genres": ["Action", "Drama"], "year_from": 2000, "year_to": 2020, "sort": "-createdAt",
+    },
+    "two genres (any), two languages, 90-120 min, by year": {
+        "genres": ["Comedy", "Horror"], "match_all_genres": False, "languages": ["Spanish", "French"],
+        "runtime_min": 90, "runtime_max": 120, "sort": "releaseYear",
+    },
+    "English with Spanish subtitles, page 6": {
+        "languages": ["English"], "subtitles": ["Spanish"], "sort": "-releaseYear", "skip": 100,
+    },
+    "narrow: three genres, one year": {
+        "genres": ["Action", "Sci-Fi", "Thriller"], "year_from": 2019, "year_to": 2019, "sort": "-viewCount",
+    },
+}
+
+
+def mongo_filter(params):
+    query = {}
+    if params.get("genres"):
+        query["genres"] = {"$all" if params.get("match_all_genres", True) else "$in": params["genres"]}
+    years = {op: params[key] for op, key in (("$gte", "year_from"), ("$lte", "year_to")) if params.get(key) is not None}
+    if years:
+        query["releaseYear"] = years
+    runtimes = {op: params[key] for op, key in (("$gte", "runtime_min"), ("$lte", "runtime_max")) if params.get(key) is not None}
+    if runtimes:
+        query["runtime"] = runtimes
+    if params.get("languages"):
+        query["language"] = {"$in": params["languages"]}
+    if params.get("subtitles"):
+        query["subtitles"] = {"$all": params["subtitles"]}
+    return query
+
+
+def mongo_pipeline(params, limit):
+    field = params.get("sort", "-viewCount")
+    direction = -1 if field.startswith("-") else 1
+    sort = {field.lstrip("-"): direction, "_id": 1}
+    return [
+        {"$match": mongo_filter(params)},
+        {"$facet": {
+            "items": [
+                {"$sort": sort}, {"$skip": params.get("skip", 0)}, {"$limit": limit},
+                {"$project": {"_id": 0, **dict.fromkeys(CARD_FIELDS, 1)}},
+            ],
+            "total": [{"$count": "n"}],
+            "genres": [{"$unwind": "$genres"}, {"$group": {"_id": "$genres", "n": {"$sum": 1}}}],
+            "languages": [{"$group": {"_id": "$language", "n": {"$sum": 1}}}],
+            "subtitles": [{"$unwind": "$subtitles"}, {"$group": {"_id": "$subtitles", "n": {"$sum": 1}}}],
+            "years": [{"$group": {"_id": "$releaseYear", "n": {"$sum": 1}}}],
+        }},
+    ]
+
+
+def facet_counts(aggregated):
+    return {
+        name: {str(group["_id"]): group["n"] for group in aggregated[name]}
+        for name in ("genres", "languages", "subtitles", "years")
+    }
+
+
+async def timed(coro_factory, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await coro_factory()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3), result
+
+
+async def run(args):
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+    db = client["moviestream_bench"]
+    collection = db.movies
+    await collection.drop()
+    batch = []
+    for doc in generate_movies(args.movies):
+        batch.append(doc)
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    if not args.mock:
+        await ensure_indexes(db)
+
+    index = BrowseIndex()
+    start = time.perf_counter()
+    await index.build(collection)
+    build_seconds = time.perf_counter() - start
+
+    async def columnar(params):
+        return index.query(limit=args.limit, **params)
+
+    async def columnar_with_cards(params):
+        result = index.query(limit=args.limit, **params)
+        cards = await collection.find({"id": {"$in": result["ids"]}}, {"_id": 0, **dict.fromkeys(CARD_FIELDS, 1)}).to_list(None)
+        return result, cards
+
+    async def aggregation(params):
+        return (await collection.aggregate(mongo_pipeline(params, args.limit)).to_list(1))[0]
+
+    results = {}
+    for name, params in SCENARIOS.items():
+        columnar_ms, browsed = await timed(lambda: columnar(params), args.repeat)
+        endpoint_ms, _ = await timed(lambda: columnar_with_cards(params), args.repeat)
+        mongo_ms, aggregated = await timed(lambda: aggregation(params), args.repeat)
+        mongo_total = aggregated["total"][0]["n"] if aggregated["total"] else 0
+        results[name] = {
+            "matches": browsed["total"],
+            "columnar_ms": columnar_ms,
+            "columnar_with_cards_ms": endpoint_ms,
+            "mongo_aggregation_ms": mongo_ms,
+            "speedup": round(mongo_ms / endpoint_ms, 1) if endpoint_ms else None,
+            "agrees": browsed["total"] == mongo_total and browsed["facets"] == facet_counts(aggregated),
+        }
+        print(json.dumps({"scenario": name, **results[name]}), file=sys.stderr)
+
+    if not args.keep:
+        await collection.drop()
+    return {
+        "config": {"movies": args.movies, "limit": args.limit, "repeat": args.repeat, "backend": "mongomock" if args.mock else "mongod"},
+        "build_seconds": round(build_seconds, 2),
+        "index": index.stats(),
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--mock", action="store_true", help="use mongomock instead of a local mongod")
+    parser.add_argument("--movies", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collection afterwards")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if all(scenario["agrees"] for scenario in results["scenarios"].values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
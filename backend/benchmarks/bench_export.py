@@ -0,0 +1,148 @@
+"""Measure streaming catalog exports: throughput and peak memory.
+
+Usage:
+    python benchmarks/bench_export.py --movies 1000000 --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_export.py --movies 20000 --mock
+
+Loads a synthetic catalog into a scratch database (or mongomock with --mock),
+then drains export_stream over a Motor cursor, the way the admin export
+endpoint does, for each variant:
+
+- NDJSON and CSV, each plain and gzipped.
+- An incremental (`since=`) export after touching --changed movies.
+
+Reports MB/s of encoded output, documents per second and the process RSS
+before and at its peak during each export (sampled from /proc, Linux only).
+Flat peak RSS as --movies grows is what shows memory does not depend on
+catalog size.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from export import EXPORT_CSV_FIELDS, ExportStats, export_stream  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+from synthetic import generate_movies  # noqa: E402
+
+VARIANTS = {
+    "ndjson": {"fmt": "ndjson", "compress": False},
+    "ndjson+gzip": {"fmt": "ndjson", "compress": True},
+    "csv": {"fmt": "csv", "compress": False},
+    "csv+gzip": {"fmt": "csv", "compress": True},
+}
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+async def sample_peak(peak: list, interval: float = 0.01):
+    while True:
+        peak[0] = max(peak[0], rss_bytes())
+        await asyncio.sleep(interval)
+
+
+async def drain(cursor, fmt, compress, chunk_bytes):
+    stats = ExportStats()
+    baseline = rss_bytes()
+    peak = [baseline]
+    sampler = asyncio.create_task(sample_peak(peak))
+    output = 0
+    try:
+        async for chunk in export_stream(cursor, fmt, EXPORT_CSV_FIELDS["movies"], compress, chunk_bytes, stats):
+            output += len(chunk)
+    finally:
+        sampler.cancel()
+    result = stats.as_dict()
+    result.update({
+        "outputBytes": output,
+        "docsPerSecond": round(stats.documents / result["seconds"]) if result["seconds"] else None,
+        "rssBaselineMb": round(baseline / 1e6, 1),
+        "rssPeakMb": round(peak[0] / 1e6, 1),
+    })
+    return result
+
+
+async def run(args):
+    if args.mock:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        client = AsyncIOMotorClient(args.mongo_url)
+    db = client["moviestream_bench"]
+    collection = db.movies
+    await collection.drop()
+    loaded_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    batch = []
+    for doc in generate_movies(args.movies):
+        doc["updatedAt"] = loaded_at
+        batch.append(doc)
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    del batch
+    if not args.mock:
+        await ensure_indexes(db)
+
+    def cursor(query=None, sort=None):
+        return collection.find(query or {}, {"_id": 0}, sort=sort, batch_size=args.batch_size)
+
+    results = {}
+    for name, variant in VARIANTS.items():
+        results[name] = await drain(cursor(), variant["fmt"], variant["compress"], args.chunk_kb * 1024)
+        print(json.dumps({"variant": name, **results[name]}), file=sys.stderr)
+
+    since = datetime.now(timezone.utc)
+    changed = [doc["id"] async for doc in collection.find({}, {"_id": 0, "id": 1}).limit(args.changed)]
+    await collection.update_many({"id": {"$in": changed}}, {"$set": {"updatedAt": datetime.now(timezone.utc)}})
+    incremental = await drain(
+        cursor({"updatedAt": {"$gt": since}}, [("updatedAt", 1)]), "ndjson", False, args.chunk_kb * 1024,
+    )
+    results["since"] = incremental
+    print(json.dumps({"variant": "since", **incremental}), file=sys.stderr)
+
+    if not args.keep:
+        await collection.drop()
+    return {
+        "config": {
+            "movies": args.movies, "batchSize": args.batch_size, "chunkKb": args.chunk_kb, "changed": args.changed,
+            "backend": "mongomock" if args.mock else "mongod",
+        },
+        "variants": results,
+        "incrementalComplete": incremental["documents"] == len(changed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--mock", action="store_true", help="use mongomock instead of a local mongod")
+    parser.add_argument("--movies", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=int(os.environ.get("EXPORT_BATCH_SIZE", "2000")))
+    parser.add_argument("--chunk-kb", type=int, default=256)
+    parser.add_argument("--changed", type=int, default=1000, help="movies touched before the since= export")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collection afterwards")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["incrementalComplete"] else 1)
+
+
+if __name__ == "__main__":
+    main()
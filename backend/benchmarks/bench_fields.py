@@ -0,0 +1,132 @@
+"""Bytes and latency of a movie page with full documents vs sparse fieldsets.
+
+Usage:
+    python benchmarks/bench_fields.py --page-size 100 --repeat 2000
+    python benchmarks/bench_fields.py --page-size 100 --mongo-url mongodb://localhost:27017
+
+For each projection (full Movie, `fields=card`, `fields=id,title,posterUrl`)
+reports the encoded page size and the cost of producing the response body:
+validating through the response model for full pages, pydantic-core's
+unvalidated encoder for sparse ones (what the API does with
+FAST_JSON_RESPONSES off), and fast_json. With --mongo-url the page is also
+read from a scratch collection with the projection, so the reduction in data
+read and transferred shows up too.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import fast_json  # noqa: E402
+from server import CARD_PROJECTION, MOVIE_PROJECTION, Movie  # noqa: E402
+from synthetic import generate_movies  # noqa: E402
+
+PROJECTIONS = {
+    "full": MOVIE_PROJECTION,
+    "card": CARD_PROJECTION,
+    "minimal": {"_id": 0, "id": 1, "title": 1, "posterUrl": 1},
+}
+
+
+def project(docs, projection):
+    fields = [field for field, include in projection.items() if include and field != "_id"]
+    return [{field: doc[field] for field in fields if field in doc} for doc in docs]
+
+
+def with_datetimes(docs):
+    docs = [dict(doc) for doc in docs]
+    for doc in docs:
+        if isinstance(doc.get("createdAt"), str):
+            doc["createdAt"] = datetime.fromisoformat(doc["createdAt"])
+    return docs
+
+
+FULL = TypeAdapter(List[Movie])
+UNVALIDATED = TypeAdapter(Any)
+
+
+def encode_default(name, docs):
+    docs = with_datetimes(docs)
+    if name != "full":
+        return UNVALIDATED.dump_json(docs)
+    content = FULL.dump_python(FULL.validate_python(docs), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50_us": round(statistics.median(samples) * 1e6, 1),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 1),
+    }
+
+
+async def measure_mongo(mongo_url, docs, page_size, repeat):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongo_url)
+    collection = client["moviestream_bench"]["movies"]
+    await collection.drop()
+    await collection.insert_many([dict(doc) for doc in docs])
+    results = {}
+    for name, projection in PROJECTIONS.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await collection.find({}, projection).limit(page_size).to_list(page_size)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        results[name] = {"p50_ms": round(statistics.median(samples) * 1000, 3)}
+    await collection.drop()
+    client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--mongo-url")
+    args = parser.parse_args()
+
+    docs = list(generate_movies(args.page_size))
+    for doc in docs:
+        doc["createdAt"] = fast_json.format_datetime(datetime.fromisoformat(doc["createdAt"]))
+
+    results = {"page_size": args.page_size, "encoder": "orjson" if fast_json.orjson is not None else "json"}
+    for name, projection in PROJECTIONS.items():
+        page = project(docs, projection)
+        results[name] = {
+            "bytes": len(fast_json.dumps(page)),
+            "default": measure(lambda: encode_default(name, page), args.repeat),
+            "fast": measure(lambda: fast_json.dumps(page), args.repeat),
+        }
+    for name in ("card", "minimal"):
+        results[name]["bytes_saved"] = f"{1 - results[name]['bytes'] / results['full']['bytes']:.0%}"
+        results[name]["speedup_default_p50"] = round(
+            results["full"]["default"]["p50_us"] / results[name]["default"]["p50_us"], 1
+        )
+
+    if args.mongo_url:
+        mongo = asyncio.run(measure_mongo(args.mongo_url, docs, args.page_size, min(args.repeat, 200)))
+        for name, timings in mongo.items():
+            results[name]["mongo_read"] = timings
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Measure CSV import throughput and peak RSS.
+
+Usage:
+    python benchmarks/bench_import.py --rows 10000,100000,1000000
+    python benchmarks/bench_import.py --rows 100000 --mongo-url mongodb://localhost:27017
+
+Each run happens in a fresh subprocess so peak RSS is not carried over between
+sizes. Without --mongo-url, batches go to a sink that discards them, which
+isolates parsing/validation cost; with it, rows are written to a scratch
+database. `legacy` replays the previous implementation (whole upload read into
+memory, one insert per row) for comparison.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+FIELDS = ["title", "synopsis", "genres", "cast", "releaseYear", "runtime", "posterUrl", "videoUrl", "language"]
+
+
+class NullCollection:
+    async def insert_many(self, docs, ordered=True):
+        return None
+
+    async def insert_one(self, doc):
+        return None
+
+
+def write_csv(path, rows):
+    from synthetic import generate_movies
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for movie in generate_movies(rows):
+            writer.writerow([
+                movie["title"], movie["synopsis"], "|".join(movie["genres"]), "|".join(movie["cast"]),
+                movie["releaseYear"], movie["runtime"], movie["posterUrl"], movie["videoUrl"], movie["language"],
+            ])
+
+
+async def run_streaming(path, collection):
+    from importer import CsvImporter, ImportJob
+    from server import movie_doc_from_csv_row
+
+    importer = CsvImporter(collection, movie_doc_from_csv_row)
+    # run() removes the file when done; import from a copy so the source can be reused
+    fd, copy_path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "wb") as out, open(path, "rb") as src:
+        while chunk := src.read(1024 * 1024):
+            out.write(chunk)
+    job = ImportJob(os.path.basename(path), copy_path, os.path.getsize(copy_path))
+    await importer.run(job)
+    return job.inserted
+
+
+async def run_legacy(path, collection):
+    from server import movie_doc_from_csv_row
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    reader = csv.DictReader(io.StringIO(contents.decode("utf-8")))
+    inserted = 0
+    for row in reader:
+        await collection.insert_one(movie_doc_from_csv_row(row))
+        inserted += 1
+    return inserted
+
+
+def worker(args):
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(args.mongo_url)
+        collection = client["moviestream_bench"]["movies"]
+        asyncio.run(collection.drop())
+    else:
+        collection = NullCollection()
+
+    runner = run_legacy if args.mode == "legacy" else run_streaming
+    start = time.perf_counter()
+    inserted = asyncio.run(runner(args.path, collection))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        "mode": args.mode,
+        "rows": inserted,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(inserted / elapsed, 1),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "file_mb": round(os.path.getsize(args.path) / 1024 / 1024, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000,100000,1000000")
+    parser.add_argument("--modes", default="streaming,legacy")
+    parser.add_argument("--mongo-url", default=None)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="streaming", help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(r) for r in args.rows.split(",")):
+            path = os.path.join(tmp, f"movies-{rows}.csv")
+            write_csv(path, rows)
+            for mode in args.modes.split(","):
+                cmd = [sys.executable, __file__, "--worker", "--mode", mode, "--path", path]
+                if args.mongo_url:
+                    cmd += ["--mongo-url", args.mongo_url]
+                output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""Measure byte-range media streaming: sustained MB/s and server CPU per stream.
+
+Usage:
+    python benchmarks/bench_media.py --clients 16 --seconds 20 --size-mb 1024
+    python benchmarks/bench_media.py --modes auto,mmap --clients 4 --seconds 5 --size-mb 64
+
+Writes a random file of --size-mb into a scratch media directory, then for
+each send mode starts uvicorn in a subprocess serving just the media
+endpoint (the same MediaFiles responses as /api/media, without MongoDB).
+--clients concurrent clients keep seeking: each request asks for a random
+--range-kb byte range over a keep-alive connection, as a player scrubbing
+through a video would.
+
+Reports throughput over the whole run and per stream, and the server
+process's CPU time (from /proc, Linux only) as cores used, CPU seconds per
+GB sent and CPU share per stream. Under uvicorn, which offers neither the
+zerocopysend nor the pathsend extension, "auto" reads every chunk in a
+thread and is the baseline. "mmap" sends slices of a memory map instead.
+The file is read once before timing, so this measures serving from the
+page cache, where mmap looks its best.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+FILENAME = "bench.mp4"
+
+
+def serve(args):
+    # Runs in the subprocess: the media endpoint alone, wired like the API's
+    import uvicorn
+    from fastapi import FastAPI, HTTPException, Request
+
+    from media import MediaFiles, RangeNotSatisfiable
+    from metrics import MediaMetrics
+
+    app = FastAPI()
+    files = MediaFiles(args.media_dir, MediaMetrics(), max_streams=args.clients, chunk_bytes=args.chunk_kb * 1024,
+                       mode=args.mode)
+
+    @app.get("/api/media/{path:path}")
+    async def get_media(path: str, request: Request):
+        file = files.resolve(path)
+        if file is None:
+            raise HTTPException(status_code=404)
+        try:
+            return files.response(file, request.headers)
+        except RangeNotSatisfiable:
+            raise HTTPException(status_code=416)
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as stat:
+        fields = stat.read().rsplit(")", 1)[1].split()
+    # utime and stime, in clock ticks
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def read_response(reader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+    remaining = length
+    while remaining:
+        chunk = await reader.read(min(remaining, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("connection closed mid-body")
+        remaining -= len(chunk)
+    if status not in (200, 206):
+        raise RuntimeError(f"unexpected status {status}")
+    return length
+
+
+async def client(port, size, range_bytes, deadline, totals):
+    # A minimal HTTP/1.1 client, so the client side costs little CPU next to the server
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        while time.perf_counter() < deadline:
+            start = random.randrange(0, max(1, size - range_bytes))
+            end = min(size, start + range_bytes) - 1
+            writer.write(
+                f"GET /api/media/{FILENAME} HTTP/1.1\r\nHost: bench\r\nRange: bytes={start}-{end}\r\n\r\n".encode()
+            )
+            totals["bytes"] += await read_response(reader)
+            totals["requests"] += 1
+    finally:
+        writer.close()
+
+
+async def wait_until_listening(port, server, timeout=20.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and server.poll() is None:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def run_mode(args, mode, media_dir, size):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--serve", "--mode", mode, "--media-dir", media_dir,
+        "--port", str(args.port), "--clients", str(args.clients), "--chunk-kb", str(args.chunk_kb),
+    ]
+    server = subprocess.Popen(command, cwd=BACKEND_DIR)
+    try:
+        await wait_until_listening(args.port, server)
+        totals = {"bytes": 0, "requests": 0}
+        cpu_before = cpu_seconds(server.pid)
+        started = time.perf_counter()
+        deadline = started + args.seconds
+        await asyncio.gather(*(
+            client(args.port, size, args.range_kb * 1024, deadline, totals) for _ in range(args.clients)
+        ))
+        elapsed = time.perf_counter() - started
+        cpu = cpu_seconds(server.pid) - cpu_before
+    finally:
+        server.terminate()
+        server.wait()
+
+    gigabytes = totals["bytes"] / 1e9
+    return {
+        "requests": totals["requests"],
+        "mbPerSecond": round(totals["bytes"] / elapsed / 1e6, 1),
+        "mbPerSecondPerStream": round(totals["bytes"] / elapsed / 1e6 / args.clients, 1),
+        "serverCpuSeconds": round(cpu, 2),
+        "serverCores": round(cpu / elapsed, 2),
+        "cpuSecondsPerGb": round(cpu / gigabytes, 3) if gigabytes else None,
+        "cpuPercentPerStream": round(100 * cpu / elapsed / args.clients, 2),
+    }
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory() as media_dir:
+        path = os.path.join(media_dir, FILENAME)
+        size = args.size_mb * 1024 * 1024
+        with open(path, "wb") as f:
+            for _ in range(args.size_mb):
+                f.write(os.urandom(1024 * 1024))
+        # Warm the page cache so every mode serves the same cached file
+        with open(path, "rb") as f:
+            while f.read(8 * 1024 * 1024):
+                pass
+
+        results = {}
+        for mode in args.modes.split(","):
+            results[mode] = await run_mode(args, mode, media_dir, size)
+            print(json.dumps({"mode": mode, **results[mode]}), file=sys.stderr)
+    return {
+        "config": {
+            "clients": args.clients, "seconds": args.seconds, "sizeMb": args.size_mb, "rangeKb": args.range_kb,
+            "chunkKb": args.chunk_kb, "cpus": os.cpu_count(),
+        },
+        "modes": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="auto,mmap", help="comma-separated send modes to compare")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--range-kb", type=int, default=4096, help="bytes requested per seek")
+    parser.add_argument("--chunk-kb", type=int, default=int(os.environ.get("MEDIA_CHUNK_KB", "1024")))
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="auto", help=argparse.SUPPRESS)
+    parser.add_argument("--media-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare skip/limit against keyset pagination at increasing page depths.
+
+Usage:
+    python benchmarks/bench_pagination.py --movies 200000 --mongo-url mongodb://localhost:27017
+
+Loads a synthetic catalog into a scratch database, creates the pagination
+indexes and times fetching one page at each depth with both strategies.
+Keyset cost should stay flat while skip grows linearly with depth.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient  # noqa: E402
+
+from pagination import PAGINATION_INDEXES, encode_cursor, keyset_query  # noqa: E402
+from synthetic import generate_movies  # noqa: E402
+
+
+async def timed(coro_factory, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await coro_factory()
+        samples.append(time.perf_counter() - start)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+async def run(args):
+    client = AsyncIOMotorClient(args.mongo_url)
+    collection = client["moviestream_bench"]["movies"]
+    await collection.drop()
+    batch = []
+    for doc in generate_movies(args.movies):
+        batch.append(doc)
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    for keys in PAGINATION_INDEXES:
+        await collection.create_index(keys)
+
+    results = []
+    for sort in ("newest", "popular"):
+        _, sort_spec = keyset_query(sort, None, {})
+        for depth in (int(d) for d in args.depths.split(",")):
+            if depth + args.limit > args.movies:
+                continue
+            # Cursor pointing at the last document before `depth`
+            anchor = await collection.find({}, {"_id": 0}).sort(sort_spec).skip(depth - 1).limit(1).to_list(1) if depth else []
+            cursor = encode_cursor(sort, anchor[0]) if anchor else None
+            query, _ = keyset_query(sort, cursor, {})
+
+            skip_ms = await timed(
+                lambda: collection.find({}, {"_id": 0}).sort(sort_spec).skip(depth).limit(args.limit).to_list(args.limit),
+                args.repeat,
+            )
+            keyset_ms = await timed(
+                lambda: collection.find(query, {"_id": 0}).sort(sort_spec).limit(args.limit).to_list(args.limit),
+                args.repeat,
+            )
+            result = {"sort": sort, "depth": depth, "skip_ms": skip_ms, "keyset_ms": keyset_ms}
+            results.append(result)
+            print(json.dumps(result), file=sys.stderr)
+
+    await collection.drop()
+    client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--movies", type=int, default=200000)
+    parser.add_argument("--depths", default="0,1000,10000,50000,100000")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
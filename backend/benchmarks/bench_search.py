@@ -0,0 +1,128 @@
+"""Compare search latency of the in-process index against the regex scan.
+
+Usage:
+    python benchmarks/bench_search.py --sizes 10000,100000,1000000
+    python benchmarks/bench_search.py --sizes 10000 --mongo-url mongodb://localhost:27017
+
+Without --mongo-url the regex path is emulated in Python (a case-insensitive
+regex over title and synopsis of every document, stopping at `limit` matches,
+which is what a COLLSCAN with $regex does). With --mongo-url both paths run
+against a real mongod using a scratch database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex  # noqa: E402
+from synthetic import generate_movies, sample_queries  # noqa: E402
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(samples) * 1000, 4),
+        "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 4),
+    }
+
+
+def regex_scan(docs, q, limit):
+    pattern = re.compile(re.escape(q), re.IGNORECASE)
+    found = []
+    for doc in docs:
+        if pattern.search(doc["title"]) or pattern.search(doc["synopsis"]):
+            found.append(doc)
+            if len(found) >= limit:
+                break
+    return found
+
+
+async def bench_mongo(mongo_url, docs, index, queries, limit):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(mongo_url)
+    collection = client["moviestream_bench"]["movies"]
+    await collection.drop()
+    for i in range(0, len(docs), 10000):
+        await collection.insert_many([dict(d) for d in docs[i:i + 10000]], ordered=False)
+    await collection.create_index("id", unique=True)
+
+    regex_times, index_times = [], []
+    for q in queries:
+        pattern = re.escape(q)
+        start = time.perf_counter()
+        await collection.find(
+            {"$or": [{"title": {"$regex": pattern, "$options": "i"}}, {"synopsis": {"$regex": pattern, "$options": "i"}}]},
+            {"_id": 0},
+        ).limit(limit).to_list(limit)
+        regex_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        ids = index.search(q, limit=limit)
+        await collection.find({"id": {"$in": ids}}, {"_id": 0}).to_list(len(ids))
+        index_times.append(time.perf_counter() - start)
+
+    await collection.drop()
+    client.close()
+    return {"regex": percentiles(regex_times), "index": percentiles(index_times)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--mongo-url", default=None)
+    args = parser.parse_args()
+
+    queries = sample_queries(args.queries)
+    results = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        docs = list(generate_movies(size))
+
+        index = SearchIndex()
+        start = time.perf_counter()
+        index.add_many(docs)
+        index.ready = True
+        build_seconds = time.perf_counter() - start
+
+        # First pass pays for lazily sorted impact lists; report it separately from steady state
+        cold_times = []
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q, limit=args.limit)
+            cold_times.append(time.perf_counter() - start)
+
+        index_times, regex_times = [], []
+        for q in queries:
+            start = time.perf_counter()
+            index.search(q, limit=args.limit)
+            index_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            regex_scan(docs, q, args.limit)
+            regex_times.append(time.perf_counter() - start)
+
+        result = {
+            "movies": size,
+            "index_build_s": round(build_seconds, 2),
+            "index_cold": percentiles(cold_times),
+            "index": percentiles(index_times),
+            "regex_emulated": percentiles(regex_times),
+        }
+        if args.mongo_url:
+            result["mongo"] = asyncio.run(bench_mongo(args.mongo_url, docs, index, queries, args.limit))
+        results.append(result)
+        print(json.dumps(result), file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Serialization cost of a 100-movie page: validated response model vs fast JSON path.
+
+Usage:
+    python benchmarks/bench_serialization.py --page-size 100 --repeat 2000
+
+`validated` reproduces what FastAPI does for `response_model=List[Movie]`:
+parse createdAt back into a datetime, validate every document into a Movie
+and dump it to JSON-compatible Python before json.dumps. `fast` encodes the
+stored documents straight to bytes with fast_json (orjson when installed).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import TypeAdapter  # noqa: E402
+
+import fast_json  # noqa: E402
+from server import Movie  # noqa: E402
+from synthetic import generate_movies  # noqa: E402
+
+
+def validated(docs):
+    movies = [dict(doc) for doc in docs]
+    for movie in movies:
+        if isinstance(movie.get("createdAt"), str):
+            movie["createdAt"] = datetime.fromisoformat(movie["createdAt"])
+    adapter = TypeAdapter(List[Movie])
+    content = adapter.dump_python(adapter.validate_python(movies), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast(docs):
+    return fast_json.dumps(docs)
+
+
+def measure(fn, docs, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(docs)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "p50_us": round(statistics.median(samples) * 1e6, 1),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    docs = list(generate_movies(args.page_size))
+    for doc in docs:
+        doc["createdAt"] = fast_json.format_datetime(datetime.fromisoformat(doc["createdAt"]))
+
+    results = {
+        "page_size": args.page_size,
+        "encoder": "orjson" if fast_json.orjson is not None else "json",
+        "bytes": len(fast(docs)),
+        "validated": measure(validated, docs, args.repeat),
+        "fast": measure(fast, docs, args.repeat),
+    }
+    results["speedup_p50"] = round(results["validated"]["p50_us"] / results["fast"]["p50_us"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Boot several API worker processes against one MongoDB and measure cross-worker invalidation latency.
+
+Usage:
+    python benchmarks/bench_workers.py --workers 4 --updates 50 --mongo-url mongodb://localhost:27017
+    python benchmarks/bench_workers.py --workers 4 --no-events    # show the incoherent baseline
+
+Starts --workers uvicorn processes on consecutive ports (each one is what
+`uvicorn --workers N` would fork), sharing a scratch database with
+CATALOG_EVENTS enabled and long cache TTLs. For every update it warms a
+movie's detail and suggestion responses on all workers, renames the movie
+through worker 0, then polls every other worker until it serves the new title.
+Reports how long each check took to turn over, and how many never did within
+--timeout (with --no-events, every check should time out: caches only expire
+after their TTL). Needs a real mongod; capped-collection tailing is not
+available in mongomock. Exits non-zero if any check timed out with events on.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, "benchmarks"))
+
+DB_NAME = "moviestream_bench_workers"
+
+
+def start_workers(args):
+    env = {
+        **os.environ,
+        "MONGO_URL": args.mongo_url,
+        "DB_NAME": DB_NAME,
+        "CATALOG_EVENTS": "false" if args.no_events else "true",
+        # Long enough that only an invalidation can explain a fresh response
+        "CACHE_TTL_MOVIE": "600",
+        "CACHE_TTL_MOVIES": "600",
+        "CATALOG_READ_PREFERENCE": "primary",
+    }
+    return [
+        subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(args.base_port + i), "--log-level", "warning"],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        for i in range(args.workers)
+    ]
+
+
+async def wait_ready(client, urls, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                health = (await client.get(f"{url}/api/health")).json()
+                if health["status"] == "ok" and all(health["indexes"].values()):
+                    break
+            except Exception:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Worker at {url} did not become ready")
+            await asyncio.sleep(0.2)
+
+
+async def turnover(client, url, check, movie_id, title, timeout):
+    # Seconds until the worker serves the new title, or None if it never did
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if check == "detail":
+            if (await client.get(f"{url}/api/movies/{movie_id}")).json().get("title") == title:
+                return time.perf_counter() - start
+        else:
+            suggestions = (await client.get(f"{url}/api/movies/suggest", params={"q": title})).json()
+            if any(movie["id"] == movie_id for movie in suggestions.get("movies", ())):
+                return time.perf_counter() - start
+        await asyncio.sleep(0.001)
+    return None
+
+
+def summarize(samples, timeouts):
+    samples = sorted(samples)
+    if not samples:
+        return {"checks": timeouts, "timeouts": timeouts}
+    return {
+        "checks": len(samples) + timeouts,
+        "timeouts": timeouts,
+        "p50_ms": round(statistics.median(samples) * 1000, 2),
+        "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+        "max_ms": round(samples[-1] * 1000, 2),
+    }
+
+
+async def run(args):
+    import httpx
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    os.environ.setdefault("MONGO_URL", args.mongo_url)
+    os.environ["DB_NAME"] = DB_NAME
+    from bench_api import load_catalog
+
+    mongo = AsyncIOMotorClient(args.mongo_url)
+    db = mongo[DB_NAME]
+    await db.catalog_events.drop()
+    movie_ids = await load_catalog(db, args.movies)
+
+    processes = start_workers(args)
+    urls = [f"http://127.0.0.1:{args.base_port + i}" for i in range(args.workers)]
+    headers = {"Authorization": f"Bearer {os.environ.get('ADMIN_TOKEN', 'admin_secret_token_12345')}"}
+    rng = random.Random(args.seed)
+    samples = {"detail": [], "suggest": []}
+    timeouts = {"detail": 0, "suggest": 0}
+    try:
+        async with httpx.AsyncClient(timeout=30) as client:
+            await wait_ready(client, urls)
+            for i in range(args.updates):
+                movie_id = rng.choice(movie_ids)
+                for url in urls:
+                    await client.get(f"{url}/api/movies/{movie_id}")
+                title = f"Zebulon Renamed {i} {rng.randrange(10 ** 6)}"
+
+                response = await client.put(f"{urls[0]}/api/admin/movies/{movie_id}", json={"title": title}, headers=headers)
+                response.raise_for_status()
+                checks = [(url, check) for url in urls[1:] for check in samples]
+                results = await asyncio.gather(*(
+                    turnover(client, url, check, movie_id, title, args.timeout) for url, check in checks
+                ))
+                for (url, check), seconds in zip(checks, results):
+                    if seconds is None:
+                        timeouts[check] += 1
+                    else:
+                        samples[check].append(seconds)
+            events = [(await client.get(f"{url}/api/admin/catalog-events", headers=headers)).json() for url in urls]
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        if not args.keep:
+            await mongo.drop_database(DB_NAME)
+        mongo.close()
+
+    return {
+        "config": {
+            "workers": args.workers,
+            "movies": args.movies,
+            "updates": args.updates,
+            "events": not args.no_events,
+            "timeout_seconds": args.timeout,
+        },
+        "invalidation": {check: summarize(samples[check], timeouts[check]) for check in samples},
+        "workers": events,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--base-port", type=int, default=8101)
+    parser.add_argument("--movies", type=int, default=2000)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=5.0, help="seconds to wait for each worker to turn over")
+    parser.add_argument("--no-events", action="store_true", help="run without CATALOG_EVENTS for comparison")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch database afterwards")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    timed_out = sum(check["timeouts"] for check in results["invalidation"].values())
+    sys.exit(1 if timed_out and not args.no_events else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import itertools
+import random
+import uuid
+from datetime import datetime, timedelta, timezone
+
+GENRES = ["Action", "Drama", "Comedy", "Thriller", "Sci-Fi", "Horror", "Romance", "Adventure", "Fantasy", "Crime"]
+LANGUAGES = ["English"] * 6 + ["Spanish", "French", "Hindi", "Japanese", "Korean", "German"]
+
+WORDS = (
+    "quantum heist eternal flame shadow city night rising last empire ocean storm silent echo broken "
+    "kingdom lost memory secret garden dark star hunter code red river winter summer ghost machine "
+    "dream protocol iron crown midnight run wild heart frozen signal desert moon golden hour final "
+    "mission hidden truth falling sky blood line steel rain crimson tide neon paradise"
+).split()
+
+SYNOPSIS_WORDS = (
+    "team scientists must steal computer facility save humanity from takeover young detective uncovers "
+    "conspiracy family secrets small town love across time war survivors journey unknown planet crew "
+    "discovers ancient artifact powers unleash chaos betrayal revenge friendship sacrifice hope battle "
+    "against forces evil city streets danger mystery island treasure race against clock"
+).split()
+
+SYLLABLES = "ka ri to na mo el an dor vin sa lu ter ion gra phe cal mir ost ven qua tum zel bri".split()
+
+FIRST_NAMES = ["Michael", "Sarah", "David", "Emma", "James", "Olivia", "Daniel", "Sophia", "Ryan", "Mia", "Arjun", "Yuki", "Lucas", "Chloe"]
+LAST_NAMES = ["Chen", "Johnson", "Park", "Garcia", "Smith", "Nguyen", "Patel", "Kim", "Rossi", "Muller", "Silva", "Tanaka"]
+
+
+def build_vocabulary(rng: random.Random, size: int = 20000):
+    # Common English words first, then invented words; sampled with a Zipf-like skew
+    words = list(dict.fromkeys(WORDS + SYNOPSIS_WORDS))
+    seen = set(words)
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return words, cum_weights
+
+
+def generate_movies(n: int, seed: int = 42):
+    rng = random.Random(seed)
+    vocabulary, cum_weights = build_vocabulary(random.Random(seed))
+    now = datetime.now(timezone.utc)
+    for _ in range(n):
+        # Popularity is heavy-tailed like real catalogs: a few titles get most views
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "title": " ".join(w.capitalize() for w in rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(1, 4))),
+            "synopsis": " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=rng.randint(15, 40))) + ".",
+            "genres": rng.sample(GENRES, rng.choice([1, 2, 2, 3])),
+            "cast": [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(rng.randint(2, 5))],
+            "releaseYear": min(2025, int(rng.triangular(1950, 2026, 2018))),
+            "runtime": int(rng.gauss(115, 20)),
+            "posterUrl": "https://images.example.com/poster.jpg",
+            "videoUrl": "https://videos.example.com/video.mp4",
+            "language": rng.choice(LANGUAGES),
+            "subtitles": rng.sample(["English", "Spanish", "French", "German"], rng.randint(0, 3)),
+            "viewCount": int(rng.paretovariate(1.2) * 100),
+            "createdAt": (now - timedelta(seconds=rng.randint(0, 5 * 365 * 86400))).isoformat(),
+        }
+
+
+def sample_queries(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    vocabulary, cum_weights = build_vocabulary(random.Random(42))
+    queries = []
+    for _ in range(n):
+        kind = rng.random()
+        words = rng.choices(vocabulary, cum_weights=cum_weights, k=2)
+        if kind < 0.5:
+            queries.append(words[0])
+        elif kind < 0.8:
+            queries.append(" ".join(words))
+        else:
+            # As-you-type prefix
+            queries.append(words[0][: max(3, len(words[0]) // 2)])
+    return queries
@@ -0,0 +1,349 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Projection used when (re)loading documents into the browse columns
+BROWSE_PROJECTION = {
+    "_id": 0, "id": 1, "title": 1, "genres": 1, "releaseYear": 1, "runtime": 1,
+    "language": 1, "subtitles": 1, "viewCount": 1, "createdAt": 1,
+}
+
+SORT_FIELDS = ("viewCount", "createdAt", "releaseYear", "runtime", "title")
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return 0.0
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return 0.0
+
+
+class SetColumn:
+    """Multi-valued string field stored as one small id per distinct set of values.
+
+    Catalogs use few distinct genre (or subtitle) combinations, so filters and facet counts
+    work on those combinations, then gather or bincount the per-row ids in one pass.
+    """
+
+    def __init__(self, capacity: int):
+        self.bits: Dict[str, int] = {}
+        # Bitmask of each distinct set, indexed by set id; id 0 is the empty set
+        self.sets: List[int] = [0]
+        self._set_ids: Dict[int, int] = {0: 0}
+        self.ids = np.zeros(capacity, np.int32)
+
+    def _set_id(self, values: Iterable[str]) -> int:
+        mask = 0
+        for value in values or ():
+            bit = self.bits.get(value)
+            if bit is None:
+                bit = self.bits[value] = len(self.bits)
+            mask |= 1 << bit
+        set_id = self._set_ids.get(mask)
+        if set_id is None:
+            set_id = self._set_ids[mask] = len(self.sets)
+            self.sets.append(mask)
+        return set_id
+
+    def set_rows(self, rows: np.ndarray, values: Sequence[Iterable[str]]):
+        self.ids[rows] = [self._set_id(row_values) for row_values in values]
+
+    def grow(self, capacity: int):
+        self.ids = np.concatenate([self.ids, np.zeros(capacity - len(self.ids), np.int32)])
+
+    def match(self, values: Sequence[str], n: int, match_all: bool) -> np.ndarray:
+        if match_all and any(value not in self.bits for value in values):
+            # A value no movie has can never be matched by all of them
+            return np.zeros(n, bool)
+        wanted = 0
+        for value in values:
+            if value in self.bits:
+                wanted |= 1 << self.bits[value]
+        if match_all:
+            allowed = [mask & wanted == wanted for mask in self.sets]
+        else:
+            allowed = [mask & wanted != 0 for mask in self.sets]
+        return np.array(allowed, bool)[self.ids[:n]]
+
+    def counts(self, rows: np.ndarray) -> Dict[str, int]:
+        per_set = np.bincount(self.ids[rows], minlength=len(self.sets))
+        counts = {}
+        for value, bit in self.bits.items():
+            count = sum(int(per_set[set_id]) for set_id, mask in enumerate(self.sets) if mask >> bit & 1)
+            if count:
+                counts[value] = count
+        return counts
+
+
+class BrowseIndex:
+    """Columnar copy of the catalog's filterable fields for multi-filter browsing with facet counts."""
+
+    def __init__(self):
+        self.ready = False
+        self._building = False
+
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._titles: List[str] = []
+        self._free: List[int] = []
+        self._reset(0)
+
+        # Changes that arrive while the startup scan runs, replayed once it is done
+        self._pending: Dict[str, Optional[dict]] = {}
+        self._pending_views: Dict[str, int] = {}
+
+        self.updates = 0
+        self.queries = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, movie_id: str) -> bool:
+        return movie_id in self._rows
+
+    def _reset(self, n: int):
+        capacity = max(n, 16)
+        self._alive = np.zeros(capacity, bool)
+        self._year = np.zeros(capacity, np.int32)
+        self._runtime = np.zeros(capacity, np.int32)
+        self._views = np.zeros(capacity, np.int64)
+        self._created = np.zeros(capacity, np.float64)
+        self._language = np.zeros(capacity, np.int32)
+        self._genres = SetColumn(capacity)
+        self._subtitles = SetColumn(capacity)
+        self._languages: Dict[str, int] = {}
+        # Title order is only needed for title sorts; recomputed lazily after titles change
+        self._title_rank: Optional[np.ndarray] = None
+
+    def _language_code(self, language: Optional[str]) -> int:
+        language = language or "English"
+        code = self._languages.get(language)
+        if code is None:
+            code = self._languages[language] = len(self._languages)
+        return code
+
+    async def build(self, collection, batch_size: int = 5000):
+        self._building = True
+        try:
+            docs = await collection.find({}, BROWSE_PROJECTION).batch_size(batch_size).to_list(None)
+            n = len(docs)
+            self._reset(n)
+            self._ids = [doc["id"] for doc in docs]
+            self._rows = {movie_id: row for row, movie_id in enumerate(self._ids)}
+            self._titles = [(doc.get("title") or "").lower() for doc in docs]
+            self._free = []
+            self._fill(np.arange(n), docs)
+        finally:
+            self._building = False
+
+        pending, self._pending = self._pending, {}
+        for movie_id, doc in pending.items():
+            if doc is None:
+                self.remove(movie_id)
+            else:
+                self.add(doc)
+        # Flushes during the scan may already be in the scanned counts; a few views counted twice at most
+        views, self._pending_views = self._pending_views, {}
+        self.views_flushed(views)
+        self.ready = True
+        logger.info("Browse columns loaded for %d movies", n)
+
+    def _fill(self, rows: np.ndarray, docs: List[dict]):
+        # Column-at-a-time assignment; a bulk import costs a handful of vectorized writes
+        self._alive[rows] = True
+        self._year[rows] = [doc.get("releaseYear") or 0 for doc in docs]
+        self._runtime[rows] = [doc.get("runtime") or 0 for doc in docs]
+        self._views[rows] = [doc.get("viewCount") or 0 for doc in docs]
+        self._created[rows] = [_timestamp(doc.get("createdAt")) for doc in docs]
+        self._language[rows] = [self._language_code(doc.get("language")) for doc in docs]
+        self._genres.set_rows(rows, [doc.get("genres") for doc in docs])
+        self._subtitles.set_rows(rows, [doc.get("subtitles") for doc in docs])
+        self._title_rank = None
+
+    # Incremental updates
+
+    def add(self, doc: dict):
+        self.add_many([doc])
+
+    def add_many(self, docs: Iterable[dict]):
+        docs = list(docs)
+        if self._building:
+            for doc in docs:
+                self._pending[doc["id"]] = doc
+            return
+        if not docs:
+            return
+        rows = []
+        for doc in docs:
+            row = self._rows.get(doc["id"])
+            if row is None:
+                row = self._allocate(doc["id"])
+            self._titles[row] = (doc.get("title") or "").lower()
+            rows.append(row)
+        self._fill(np.array(rows), docs)
+        self.updates += len(docs)
+
+    def remove(self, movie_id: str):
+        if self._building:
+            self._pending[movie_id] = None
+            return
+        row = self._rows.pop(movie_id, None)
+        if row is None:
+            return
+        self._ids[row] = None
+        self._titles[row] = ""
+        self._alive[row] = False
+        self._free.append(row)
+        self.updates += 1
+
+    def views_flushed(self, counts: Dict[str, int]):
+        if self._building:
+            for movie_id, count in counts.items():
+                self._pending_views[movie_id] = self._pending_views.get(movie_id, 0) + count
+            return
+        rows = [self._rows[movie_id] for movie_id in counts if movie_id in self._rows]
+        if rows:
+            self._views[rows] += [counts[self._ids[row]] for row in rows]
+
+    def _allocate(self, movie_id: str) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = movie_id
+        else:
+            row = len(self._ids)
+            self._ids.append(movie_id)
+            self._titles.append("")
+            if row >= len(self._alive):
+                self._grow(max(16, 2 * len(self._alive)))
+        self._rows[movie_id] = row
+        return row
+
+    def _grow(self, capacity: int):
+        extra = capacity - len(self._alive)
+        self._alive = np.concatenate([self._alive, np.zeros(extra, bool)])
+        self._year = np.concatenate([self._year, np.zeros(extra, np.int32)])
+        self._runtime = np.concatenate([self._runtime, np.zeros(extra, np.int32)])
+        self._views = np.concatenate([self._views, np.zeros(extra, np.int64)])
+        self._created = np.concatenate([self._created, np.zeros(extra, np.float64)])
+        self._language = np.concatenate([self._language, np.zeros(extra, np.int32)])
+        self._genres.grow(capacity)
+        self._subtitles.grow(capacity)
+
+    # Queries
+
+    def _sort_key(self, field: str, n: int) -> np.ndarray:
+        if field == "title":
+            if self._title_rank is None or len(self._title_rank) != n:
+                # Equal titles share a rank so ties break by row order in both directions
+                _, rank = np.unique(np.array(self._titles, dtype=object), return_inverse=True)
+                self._title_rank = rank.astype(np.int32)
+            return self._title_rank
+        return {
+            "viewCount": self._views,
+            "createdAt": self._created,
+            "releaseYear": self._year,
+            "runtime": self._runtime,
+        }[field][:n]
+
+    def query(
+        self,
+        genres: Sequence[str] = (),
+        match_all_genres: bool = True,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        runtime_min: Optional[int] = None,
+        runtime_max: Optional[int] = None,
+        languages: Sequence[str] = (),
+        subtitles: Sequence[str] = (),
+        sort: str = "-viewCount",
+        skip: int = 0,
+        limit: int = 20,
+        facets: bool = True,
+    ) -> dict:
+        n = len(self._ids)
+        mask = self._alive[:n].copy()
+        if genres:
+            mask &= self._genres.match(genres, n, match_all_genres)
+        if year_from is not None:
+            mask &= self._year[:n] >= year_from
+        if year_to is not None:
+            mask &= self._year[:n] <= year_to
+        if runtime_min is not None:
+            mask &= self._runtime[:n] >= runtime_min
+        if runtime_max is not None:
+            mask &= self._runtime[:n] <= runtime_max
+        if languages:
+            allowed = np.zeros(len(self._languages), bool)
+            allowed[[self._languages[language] for language in languages if language in self._languages]] = True
+            mask &= allowed[self._language[:n]]
+        if subtitles:
+            mask &= self._subtitles.match(subtitles, n, True)
+        rows = np.flatnonzero(mask)
+
+        descending = sort.startswith("-")
+        keys = self._sort_key(sort.lstrip("-"), n)[rows]
+        if descending:
+            keys = -keys
+        end = min(skip + limit, len(rows))
+        if skip >= end:
+            page = rows[:0]
+        else:
+            if end < len(rows):
+                # Only the first `end` need ordering; of those tied with the last, the earliest rows win
+                cutoff = np.partition(keys, end - 1)[end - 1]
+                below = np.flatnonzero(keys < cutoff)
+                tied = np.flatnonzero(keys == cutoff)[: end - len(below)]
+                candidates = np.concatenate([below, tied])
+            else:
+                candidates = np.arange(len(rows))
+            # Ties fall back to catalog (row) order so pages do not overlap
+            order = candidates[np.lexsort((rows[candidates], keys[candidates]))]
+            page = rows[order[skip:end]]
+
+        self.queries += 1
+        result = {"total": int(len(rows)), "ids": [self._ids[row] for row in page]}
+        if facets:
+            result["facets"] = self._facets(rows)
+        return result
+
+    def _facets(self, rows: np.ndarray) -> dict:
+        names = list(self._languages)
+        languages = np.bincount(self._language[rows], minlength=len(names))
+        years = self._year[rows]
+        year_counts = {}
+        if len(years):
+            low = int(years.min())
+            year_counts = {
+                str(low + offset): int(count)
+                for offset, count in enumerate(np.bincount(years - low)) if count
+            }
+        return {
+            "genres": self._genres.counts(rows),
+            "languages": {name: int(count) for name, count in zip(names, languages) if count},
+            "subtitles": self._subtitles.counts(rows),
+            "years": year_counts,
+        }
+
+    def stats(self) -> dict:
+        columns = (self._alive, self._year, self._runtime, self._views, self._created, self._language,
+                   self._genres.ids, self._subtitles.ids)
+        return {
+            "ready": self.ready,
+            "movies": len(self._rows),
+            "genres": len(self._genres.bits),
+            "genreSets": len(self._genres.sets),
+            "languages": len(self._languages),
+            "columnBytes": int(sum(column.nbytes for column in columns)),
+            "updates": self.updates,
+            "queries": self.queries,
+        }
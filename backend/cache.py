@@ -0,0 +1,142 @@
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+_MISSING = object()
+
+
+def estimate_size(value: Any) -> int:
+    # Approximate JSON size, sampling the first element of each list: pages hold documents of one
+    # shape, and encoding a page just to measure it would serialize it a second time on every miss
+    if isinstance(value, dict):
+        return 2 + sum(len(key) + 4 + estimate_size(item) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return 2 + len(value) * (estimate_size(value[0]) + 1) if value else 2
+    if isinstance(value, (str, bytes)):
+        return len(value) + 2
+    # Numbers, booleans, None and datetimes
+    return 8 if value is None or isinstance(value, (bool, int, float)) else 32
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "size", "tags")
+
+    def __init__(self, value: Any, expires_at: float, size: int, tags: tuple):
+        self.value = value
+        self.expires_at = expires_at
+        self.size = size
+        self.tags = tags
+
+
+class ResponseCache:
+    """LRU cache for endpoint results with per-entry TTLs, a memory cap and tag-based invalidation."""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: int = 10000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._bytes = 0
+        # Bumped on every invalidation so loads that raced with one are not cached
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(route: str, params: Optional[dict] = None) -> tuple:
+        # Parameter order and unset parameters must not produce distinct entries
+        items = sorted((k, v) for k, v in (params or {}).items() if v is not None)
+        return (route, tuple(items))
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float, tags: Iterable[str] = ()):
+        # Pre-encoded responses are sized exactly, anything else estimated without encoding it
+        size = len(value) if isinstance(value, bytes) else estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        entry = _Entry(value, time.monotonic() + ttl, size, tuple(tags))
+        self._entries[key] = entry
+        self._bytes += size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    async def get_or_load(
+        self,
+        route: str,
+        params: Optional[dict],
+        ttl: float,
+        tags: Iterable[str],
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        key = self.make_key(route, params)
+        value = self.get(key)
+        if value is _MISSING:
+            generation = self._generation
+            value = await loader()
+            if generation == self._generation:
+                self.set(key, value, ttl, tags)
+        return value
+
+    def invalidate(self, *tags: str):
+        self._generation += 1
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self):
+        self._generation += 1
+        self._entries.clear()
+        self._tags.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,193 @@
+import secrets
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime as format_http_date, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+class CatalogVersion:
+    """Version counters behind the ETag/Last-Modified validators of catalog reads.
+
+    Validators are weak (W/): a cached body can lag its validator by up to the cache TTL, and
+    view counts move list validators only every views_interval, so two responses with the same
+    validator are equivalent but not necessarily byte for byte identical.
+
+    A single process names catalog states by its own counters. Workers sharing catalog events
+    call share() and follow(), and name them by event ids instead, so every worker issues the
+    same validator for the same state and a revalidation can land on any of them.
+    """
+
+    def __init__(self, views_interval: float = 60.0):
+        # A fresh epoch per process, so validators issued before a restart never match
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self.last_modified = _now()
+        self._started_at = self.last_modified
+
+        self._revisions: Dict[str, Tuple[int, datetime]] = {}
+
+        # View counts change constantly; let them move list validators at most once per interval
+        self.views_interval = views_interval
+        self.views_generation = 0
+        self._views_bumped_at = 0.0
+
+        # The home feed is rebuilt on a timer in each worker, which changes its body without any catalog change
+        self.feed_tag = secrets.token_hex(4)
+        self.feed_modified = self.last_modified
+
+        # Shared mode: the last catalog event, the last event touching each movie, and the event
+        # naming movies no event has touched since this worker joined
+        self.shared = False
+        self._position = ""
+        self._base = ""
+        self._movie_events: Dict[str, str] = {}
+        # Changes made here that the stream has not carried back yet are named with a per-worker salt
+        self._salt: Optional[str] = None
+        self._unsettled: Set[str] = set()
+
+    def list_validators(self) -> Tuple[str, datetime]:
+        return f'W/"{self.epoch}.{self.version}.{self.views_generation}"', self.last_modified
+
+    def feed_validators(self) -> Tuple[str, datetime]:
+        return (
+            f'W/"{self.epoch}.{self.version}.{self.views_generation}.f{self.feed_tag}"',
+            max(self.last_modified, self.feed_modified),
+        )
+
+    def feed_refreshed(self):
+        self.feed_tag = secrets.token_hex(4)
+        self.feed_modified = _now()
+
+    def movie_validators(self, movie_id: str) -> Tuple[str, datetime]:
+        revision, modified = self._revisions.get(movie_id, (0, self._started_at))
+        if not self.shared:
+            return f'W/"{self.epoch}.m{revision}"', modified
+        event = self._movie_events.get(movie_id, self._base)
+        if movie_id in self._unsettled:
+            return f'W/"{event}-{self._salt}.m{revision}"', modified
+        return f'W/"{event}"', modified
+
+    def catalog_changed(self, movie_ids: Iterable[str] = ()):
+        self.version += 1
+        self.last_modified = _now()
+        self._bump(movie_ids, self.last_modified)
+
+    def reset(self):
+        # Invalidates every validator issued so far, e.g. after missing catalog changes
+        self.epoch = secrets.token_hex(4)
+        if self.shared:
+            self._position = self._base = self.epoch
+            self._movie_events.clear()
+        self._revisions.clear()
+        self.catalog_changed()
+
+    def views_flushed(self, counts: Dict[str, int]):
+        now = _now()
+        self._bump(counts, now)
+        if self.shared:
+            # List validators follow the views events every worker reads (see follow)
+            return
+        if time.monotonic() - self._views_bumped_at >= self.views_interval:
+            self._views_bumped_at = time.monotonic()
+            self.views_generation += 1
+            self.last_modified = now
+
+    def _bump(self, movie_ids: Iterable[str], modified: datetime):
+        if self.shared:
+            self._unsettle()
+        for movie_id in movie_ids:
+            revision, _ = self._revisions.get(movie_id, (0, modified))
+            self._revisions[movie_id] = (revision + 1, modified)
+            if self.shared:
+                self._unsettled.add(movie_id)
+
+    def _unsettle(self):
+        if self._salt is None:
+            self._salt = secrets.token_hex(4)
+            self.epoch = f"{self._position}-{self._salt}"
+
+    def share(self, base: str, catalog: Optional[Tuple[str, float]], views_at: Optional[float]):
+        # base: the last event written before this worker joined; catalog: the last catalog event and its time
+        self.shared = True
+        self._base = base
+        self._position = catalog[0] if catalog else base
+        self.epoch = self._position
+        self.version = 0
+        self.views_generation = int(views_at // self.views_interval) if views_at is not None else 0
+        if catalog:
+            self.last_modified = _from_timestamp(catalog[1])
+
+    def follow(self, event_id: str, movie_ids: Iterable[str], catalog: bool, at: float, settled: bool):
+        # Called for every event read from the shared stream, after it was applied here
+        for movie_id in movie_ids:
+            self._movie_events[movie_id] = event_id
+        if catalog:
+            self._position = event_id
+            self.last_modified = max(self.last_modified, _from_timestamp(at))
+        else:
+            # Views move list validators once per interval of the publishing worker's clock
+            generation = int(at // self.views_interval)
+            if generation > self.views_generation:
+                self.views_generation = generation
+                self.last_modified = max(self.last_modified, _from_timestamp(at))
+        if settled:
+            self._salt = None
+            self._unsettled.clear()
+            self.version = 0
+        self.epoch = f"{self._position}-{self._salt}" if self._salt else self._position
+
+
+def _now() -> datetime:
+    # HTTP dates have one-second resolution
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+
+def _from_timestamp(at: float) -> datetime:
+    return datetime.fromtimestamp(int(at), timezone.utc)
+
+
+def validator_headers(etag: str, last_modified: datetime, max_age: float) -> Dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_http_date(last_modified, usegmt=True),
+        "Cache-Control": f"public, max-age={int(max_age)}, stale-while-revalidate={int(max_age)}",
+    }
+
+
+def _opaque(tag: str) -> str:
+    # If-None-Match uses the weak comparison: W/"x" and "x" match
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def if_none_match_any(request: Request) -> bool:
+    return "*" in (tag.strip() for tag in request.headers.get("if-none-match", "").split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime, exists: bool = True) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2)
+        tags = {_opaque(tag.strip()) for tag in if_none_match.split(",")}
+        # "*" matches any current representation, so only a resource that exists
+        return ("*" in tags and exists) or _opaque(etag) in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified <= since
+    return False
+
+
+def not_modified_response(request: Request, headers: Dict[str, str], exists: bool = True) -> Optional[Response]:
+    last_modified = parsedate_to_datetime(headers["Last-Modified"])
+    if is_not_modified(request, headers["ETag"], last_modified, exists):
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import time
+from typing import Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import ConnectionFailure, OperationFailure
+from pymongo.read_preferences import make_read_preference, read_pref_mode_from_name
+
+logger = logging.getLogger(__name__)
+
+
+class DatabaseNotConnected(RuntimeError):
+    pass
+
+
+class Database:
+    """Owns the Motor client: pool settings, startup readiness, and per-workload read preferences."""
+
+    def __init__(
+        self,
+        url: str,
+        name: str,
+        max_pool_size: int = 100,
+        min_pool_size: int = 0,
+        max_idle_time_ms: Optional[int] = None,
+        wait_queue_timeout_ms: Optional[int] = 2000,
+        server_selection_timeout_ms: int = 5000,
+        connect_timeout_ms: int = 5000,
+        catalog_read_preference: str = "secondaryPreferred",
+        connect_attempts: int = 5,
+        event_listeners: Sequence = (),
+    ):
+        self.url = url
+        self.name = name
+        self.catalog_read_preference = catalog_read_preference
+        self.connect_attempts = connect_attempts
+        self.options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "maxIdleTimeMS": max_idle_time_ms,
+            # Bursts beyond the pool fail fast with a 503 instead of queueing behind slow queries
+            "waitQueueTimeoutMS": wait_queue_timeout_ms,
+            "serverSelectionTimeoutMS": server_selection_timeout_ms,
+            "connectTimeoutMS": connect_timeout_ms,
+            "event_listeners": list(event_listeners),
+        }
+        # Raises on a typo at import time rather than on the first catalog read
+        try:
+            mode = read_pref_mode_from_name(catalog_read_preference)
+        except ValueError:
+            raise ValueError(f"Unknown read preference {catalog_read_preference!r}") from None
+        self._catalog_preference = make_read_preference(mode, None)
+
+        self.client: Optional[AsyncIOMotorClient] = None
+        self._primary: Optional[AsyncIOMotorDatabase] = None
+        self._catalog: Optional[AsyncIOMotorDatabase] = None
+
+    @property
+    def primary(self) -> AsyncIOMotorDatabase:
+        # Writes, and reads that must see them (admin paths, in-memory index builds)
+        if self._primary is None:
+            raise DatabaseNotConnected("Database is not connected")
+        return self._primary
+
+    @property
+    def catalog(self) -> AsyncIOMotorDatabase:
+        # Public catalog reads; may be served by secondaries, so can lag a write by the replication delay
+        if self._catalog is None:
+            raise DatabaseNotConnected("Database is not connected")
+        return self._catalog
+
+    async def connect(self):
+        # A client assigned beforehand (benchmarks swap in mongomock) is kept; calling again only re-checks readiness
+        if self.client is None:
+            self.client = AsyncIOMotorClient(self.url, **{k: v for k, v in self.options.items() if v is not None})
+        self._primary = self.client.get_database(self.name)
+        self._catalog = self.client.get_database(self.name, read_preference=self._catalog_preference)
+
+        # Cold starts race the database (containers, failovers); retry instead of failing the first requests
+        for attempt in range(1, self.connect_attempts + 1):
+            try:
+                await self.client.admin.command("ping")
+                break
+            except ConnectionFailure as e:
+                if attempt == self.connect_attempts:
+                    raise
+                delay = min(2 ** attempt, 10)
+                logger.warning("MongoDB not ready (attempt %d/%d), retrying in %ds: %s",
+                               attempt, self.connect_attempts, delay, e)
+                await asyncio.sleep(delay)
+        logger.info("Connected to MongoDB database %s (catalog reads: %s)", self.name, self.catalog_read_preference)
+
+    def close(self):
+        if self.client is not None:
+            self.client.close()
+        self.client = self._primary = self._catalog = None
+
+    async def health(self, timeout: float = 2.0) -> dict:
+        if self.client is None:
+            return {"ok": False, "error": "not connected"}
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.client.admin.command("ping"), timeout)
+        except (asyncio.TimeoutError, ConnectionFailure, OperationFailure) as e:
+            return {"ok": False, "error": str(e) or type(e).__name__}
+        return {"ok": True, "latencyMs": round((time.perf_counter() - start) * 1000, 2)}
@@ -0,0 +1,223 @@
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional
+
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[dict], Awaitable[None]]
+# Called with every event read from the collection, and whether this worker has nothing left in flight
+SeenHandler = Callable[[dict, bool], None]
+
+CATALOG_EVENT_TYPES = ("movies", "genres")
+
+
+def event_movie_ids(event: dict):
+    if event["type"] == "views":
+        return list(event["counts"])
+    return event.get("ids") or [deleted["id"] for deleted in event.get("movies", ())]
+
+
+class CatalogEvents:
+    """Broadcasts catalog changes between worker processes through a tailed capped collection."""
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        collection_name: str = "catalog_events",
+        size_bytes: int = 16 * 1024 * 1024,
+        max_await_ms: int = 1000,
+        retry_interval: float = 1.0,
+        views_interval: float = 5.0,
+        views_per_event: int = 2000,
+    ):
+        self.enabled = enabled
+        self.collection_name = collection_name
+        self.size_bytes = size_bytes
+        self.max_await_ms = max_await_ms
+        self.retry_interval = retry_interval
+        # View flushes are merged and published every views_interval, in events of at most views_per_event
+        # movies and about a sixteenth of the collection per round; the rest waits for the next round.
+        # Per-flush events of every movie played would overrun the collection on a large catalog.
+        self.views_interval = views_interval
+        self.views_per_event = views_per_event
+        # Events published by this process are applied locally before publishing, and skipped when tailed
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._collection = None
+        self._on_event: Optional[EventHandler] = None
+        self._on_gap: Optional[Callable[[], Awaitable[None]]] = None
+        self._on_seen: Optional[SeenHandler] = None
+        self._last_id = None
+        self._task: Optional[asyncio.Task] = None
+        self._views_task: Optional[asyncio.Task] = None
+        self._views: Dict[str, int] = {}
+        # Events this worker published and has not yet read back
+        self._outstanding = 0
+        # The latest event, catalog event and views event written before this worker joined
+        self.positions: Dict[str, Optional[dict]] = {}
+
+        self.published = 0
+        self.publish_failures = 0
+        self.applied = 0
+        self.apply_failures = 0
+        self.gaps = 0
+        self.last_lag_ms: Optional[float] = None
+
+    async def start(
+        self, db, on_event: EventHandler, on_gap: Callable[[], Awaitable[None]], on_seen: Optional[SeenHandler] = None
+    ):
+        if not self.enabled or self._task is not None:
+            return
+        try:
+            await db.create_collection(self.collection_name, capped=True, size=self.size_bytes)
+        except CollectionInvalid:
+            pass  # Another worker created it first
+        self._collection = db[self.collection_name]
+        self._on_event = on_event
+        self._on_gap = on_gap
+        self._on_seen = on_seen
+
+        # Tailing starts at this marker: anything before it is already reflected in what this
+        # worker loads at startup. It also keeps the capped collection non-empty, which tailable
+        # cursors need to stay open.
+        result = await self._collection.insert_one(self._envelope({"type": "worker-started"}))
+        self._last_id = result.inserted_id
+        self.positions = await self._positions(result.inserted_id)
+        self._task = asyncio.create_task(self._run())
+        self._views_task = asyncio.create_task(self._publish_views())
+
+    async def _positions(self, marker) -> Dict[str, Optional[dict]]:
+        # One pass over at most size_bytes, once per worker start
+        positions = {"latest": None, "catalog": None, "views": None}
+        async for event in self._collection.find({}, {"_id": 1, "type": 1, "at": 1}):
+            if event["_id"] == marker:
+                break
+            positions["latest"] = event
+            if event["type"] in CATALOG_EVENT_TYPES:
+                positions["catalog"] = event
+            elif event["type"] == "views":
+                positions["views"] = event
+        return positions
+
+    async def stop(self):
+        for task in (self._task, self._views_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._views_task = None
+        if self._collection is not None:
+            await self._flush_views()
+
+    @property
+    def settled(self) -> bool:
+        # Every change this worker made has come back through the stream
+        return self._outstanding <= 0 and not self._views
+
+    def _envelope(self, event: dict) -> dict:
+        return {**event, "worker": self.worker_id, "at": time.time()}
+
+    async def publish(self, event: dict):
+        if self._collection is None:
+            return
+        self._outstanding += 1
+        try:
+            await self._collection.insert_one(self._envelope(event))
+            self.published += 1
+        except PyMongoError as e:
+            # The change is already applied and stored; other workers catch up when their caches expire
+            self._outstanding -= 1
+            self.publish_failures += 1
+            logger.error("Failed to publish catalog event %s: %s", event.get("type"), e)
+
+    def views_flushed(self, counts: Dict[str, int]):
+        if self._collection is None:
+            return
+        for movie_id, count in counts.items():
+            self._views[movie_id] = self._views.get(movie_id, 0) + count
+
+    async def _publish_views(self):
+        while True:
+            await asyncio.sleep(self.views_interval)
+            await self._flush_views()
+
+    async def _flush_views(self):
+        budget = self.size_bytes // 16
+        while self._views and budget > 0:
+            counts = dict(itertools.islice(self._views.items(), self.views_per_event))
+            for movie_id in counts:
+                del self._views[movie_id]
+            # Roughly the BSON size: key, int64 value and element overhead
+            budget -= sum(len(movie_id) + 11 for movie_id in counts)
+            await self.publish({"type": "views", "counts": counts})
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tail()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Catalog event tailing failed, restarting")
+            await asyncio.sleep(self.retry_interval)
+
+    async def _tail(self):
+        # Scan in natural (insertion) order up to the last event seen, then apply what follows. _id order
+        # is not insertion order across processes, and natural order survives cursor restarts exactly.
+        cursor = self._collection.find({}, cursor_type=CursorType.TAILABLE_AWAIT).max_await_time_ms(self.max_await_ms)
+        caught_up = False
+        scanned = None
+        while cursor.alive:
+            async for event in cursor:
+                if not caught_up:
+                    caught_up = event["_id"] == self._last_id
+                    scanned = event["_id"]
+                    continue
+                self._last_id = event["_id"]
+                if event["type"] == "worker-started":
+                    continue
+                if event.get("worker") != self.worker_id:
+                    await self._apply(event)
+                else:
+                    self._outstanding -= 1
+                if self._on_seen is not None:
+                    self._on_seen(event, self.settled)
+            if not caught_up:
+                # The last event seen was overwritten: this worker fell behind by more than the collection holds
+                self.gaps += 1
+                logger.warning("Catalog events overran the %d-byte capped collection; resynchronizing", self.size_bytes)
+                await self._on_gap()
+                self._last_id = scanned
+                caught_up = True
+
+    async def _apply(self, event: dict):
+        try:
+            await self._on_event(event)
+            self.applied += 1
+            self.last_lag_ms = round((time.time() - event["at"]) * 1000, 2)
+        except Exception:
+            self.apply_failures += 1
+            logger.exception("Failed to apply catalog event %s", event.get("type"))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "worker": self.worker_id,
+            "published": self.published,
+            "publishFailures": self.publish_failures,
+            "applied": self.applied,
+            "applyFailures": self.apply_failures,
+            "gaps": self.gaps,
+            "lastLagMs": self.last_lag_ms,
+            "viewsPending": len(self._views),
+        }
@@ -0,0 +1,115 @@
+import asyncio
+import csv
+import io
+import logging
+import time
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, List, Optional
+
+import fast_json
+from fast_json import format_datetime
+
+logger = logging.getLogger(__name__)
+
+# Column order of CSV exports; the first columns match what bulk-import reads
+EXPORT_CSV_FIELDS = {
+    "movies": [
+        "title", "synopsis", "genres", "cast", "releaseYear", "runtime", "posterUrl", "videoUrl", "language",
+        "id", "subtitles", "viewCount", "createdAt", "updatedAt",
+    ],
+    "genres": ["id", "name", "slug"],
+}
+
+# Encoded output is handed to the response in chunks of about this size
+CHUNK_BYTES = 256 * 1024
+
+
+def _csv_value(value):
+    # Lists are joined the way bulk-import splits them
+    if isinstance(value, list):
+        return "|".join(str(item) for item in value)
+    if isinstance(value, datetime):
+        return format_datetime(value)
+    return value
+
+
+class ExportStats:
+    __slots__ = ("documents", "bytes", "compressed_bytes", "started", "finished")
+
+    def __init__(self):
+        self.documents = 0
+        self.bytes = 0
+        self.compressed_bytes = 0
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def as_dict(self) -> dict:
+        seconds = (self.finished or time.perf_counter()) - self.started
+        return {
+            "documents": self.documents,
+            "bytes": self.bytes,
+            "compressedBytes": self.compressed_bytes,
+            "seconds": round(seconds, 3),
+            "mbPerSecond": round(self.bytes / seconds / 1e6, 2) if seconds else None,
+        }
+
+
+async def export_stream(
+    cursor,
+    fmt: str = "ndjson",
+    fields: Optional[List[str]] = None,
+    compress: bool = False,
+    chunk_bytes: int = CHUNK_BYTES,
+    stats: Optional[ExportStats] = None,
+) -> AsyncIterator[bytes]:
+    """Encode documents from a cursor as NDJSON or CSV, optionally gzipped, holding one chunk at a time."""
+    stats = stats or ExportStats()
+    # wbits=31 writes a gzip container rather than a bare zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    async def emit(data: bytes) -> bytes:
+        stats.bytes += len(data)
+        if compressor is None:
+            return data
+        # zlib releases the GIL; compress off the event loop so other requests keep flowing
+        data = await asyncio.to_thread(compressor.compress, data)
+        stats.compressed_bytes += len(data)
+        return data
+
+    if fmt == "csv":
+        text = io.StringIO()
+        writer = csv.writer(text)
+        writer.writerow(fields)
+        async for doc in cursor:
+            writer.writerow([_csv_value(doc.get(field, "")) for field in fields])
+            stats.documents += 1
+            if text.tell() >= chunk_bytes:
+                chunk = await emit(text.getvalue().encode("utf-8"))
+                text.seek(0)
+                text.truncate()
+                if chunk:
+                    yield chunk
+        tail = text.getvalue().encode("utf-8")
+    else:
+        buffer = bytearray()
+        async for doc in cursor:
+            buffer += fast_json.dumps(doc)
+            buffer += b"\n"
+            stats.documents += 1
+            if len(buffer) >= chunk_bytes:
+                chunk = await emit(bytes(buffer))
+                buffer.clear()
+                if chunk:
+                    yield chunk
+        tail = bytes(buffer)
+
+    chunk = await emit(tail) if tail else b""
+    if compressor is not None:
+        tail = compressor.flush()
+        stats.compressed_bytes += len(tail)
+        chunk += tail
+    if chunk:
+        yield chunk
+    stats.finished = time.perf_counter()
+    logger.info("Exported %d documents (%d bytes) in %.2fs", stats.documents, stats.bytes, stats.finished - stats.started)
@@ -0,0 +1,164 @@
+import asyncio
+import csv
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on per-row errors kept in memory for a single job
+MAX_REPORTED_ERRORS = 10000
+
+
+class ImportJob:
+    def __init__(self, filename: str, path: str, total_bytes: int):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.path = path
+        self.total_bytes = total_bytes
+        self.status = "queued"
+        self.rows_parsed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.bytes_read = 0
+        self.errors: List[dict] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def add_error(self, row: int, line: int, message: str):
+        # row counts data rows from 1; line is where the row starts in the file (the header is line 1)
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "line": line, "error": message})
+
+    def progress(self) -> dict:
+        elapsed = ((self.finished_at or time.monotonic()) - self.started_at) if self.started_at else 0.0
+        throughput = self.rows_parsed / elapsed if elapsed else 0.0
+        eta = None
+        if self.status == "running" and self.bytes_read:
+            # Estimate remaining time from the share of the file consumed so far
+            remaining = max(self.total_bytes - self.bytes_read, 0)
+            eta = round(elapsed * remaining / self.bytes_read, 1)
+        return {
+            "jobId": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "rowsParsed": self.rows_parsed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "bytesRead": self.bytes_read,
+            "totalBytes": self.total_bytes,
+            "elapsedSeconds": round(elapsed, 2),
+            "rowsPerSecond": round(throughput, 1),
+            "etaSeconds": eta,
+        }
+
+
+class CsvImporter:
+    """Streams a CSV file into a collection in validated chunks of unordered insert_many batches."""
+
+    def __init__(
+        self,
+        collection,
+        row_to_doc: Callable[[dict], dict],
+        on_inserted: Optional[Callable[[List[dict]], Awaitable[None]]] = None,
+        batch_size: int = 1000,
+        max_jobs: int = 50,
+    ):
+        self.collection = collection
+        self.row_to_doc = row_to_doc
+        self.on_inserted = on_inserted
+        self.batch_size = batch_size
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+
+    async def create_job(self, upload) -> ImportJob:
+        # Copy the upload to our own temp file in chunks; the request's file is closed once it returns
+        fd, path = tempfile.mkstemp(prefix="movie-import-", suffix=".csv")
+        with os.fdopen(fd, "wb") as out:
+            await asyncio.to_thread(shutil.copyfileobj, upload.file, out, 1024 * 1024)
+        job = ImportJob(upload.filename, path, os.path.getsize(path))
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def start(self, job: ImportJob) -> ImportJob:
+        job.task = asyncio.create_task(self.run(job))
+        return job
+
+    def get(self, job_id: str) -> Optional[ImportJob]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in ("completed", "failed")]
+        while len(self.jobs) > self.max_jobs and finished:
+            del self.jobs[finished.pop(0)]
+
+    async def run(self, job: ImportJob):
+        job.status = "running"
+        job.started_at = time.monotonic()
+        try:
+            with open(job.path, "rb") as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                reader = csv.DictReader(text)
+                done = False
+                while not done:
+                    # Parsing and validation are CPU-bound; keep them off the event loop
+                    docs, positions, done = await asyncio.to_thread(self._read_chunk, reader, job)
+                    job.bytes_read = raw.tell()
+                    if docs:
+                        await self._insert(job, docs, positions)
+            job.status = "completed"
+        except Exception as e:
+            logger.exception("Import job %s failed", job.id)
+            job.add_error(0, 0, f"Import aborted: {e}")
+            job.status = "failed"
+        finally:
+            job.finished_at = time.monotonic()
+            os.unlink(job.path)
+        return job
+
+    def _read_chunk(self, reader: csv.DictReader, job: ImportJob):
+        docs, positions = [], []
+        count = 0
+        # Reads the header on the first chunk, so line_num counts it
+        reader.fieldnames
+        line = reader.line_num + 1
+        for row in reader:
+            job.rows_parsed += 1
+            count += 1
+            position = (job.rows_parsed, line)
+            # Quoted fields can span lines; the next row starts after this one's last line
+            line = reader.line_num + 1
+            try:
+                docs.append(self.row_to_doc(row))
+                positions.append(position)
+            except Exception as e:
+                job.add_error(*position, str(e))
+            if count >= self.batch_size:
+                return docs, positions, False
+        return docs, positions, True
+
+    async def _insert(self, job: ImportJob, docs: List[dict], positions: List[Tuple[int, int]]):
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+            inserted = docs
+        except BulkWriteError as e:
+            failed = {}
+            for err in e.details.get("writeErrors", []):
+                failed[err["index"]] = err.get("errmsg", "write error")
+            for index, message in failed.items():
+                job.add_error(*positions[index], message)
+            inserted = [doc for i, doc in enumerate(docs) if i not in failed]
+        job.inserted += len(inserted)
+        if inserted and self.on_inserted is not None:
+            await self.on_inserted(inserted)
@@ -0,0 +1,147 @@
+"""Declarative MongoDB index registry.
+
+Run `python indexes.py --check` to ensure the indexes and verify that every
+hot query shape is answered by an index scan; exits non-zero on a COLLSCAN.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from pymongo import IndexModel
+from pymongo.errors import OperationFailure
+
+from pagination import PAGINATION_INDEXES
+
+logger = logging.getLogger(__name__)
+
+# Indexes per collection. Compound indexes also serve queries on their prefix,
+# so e.g. `genres` equality and `viewCount` sorts need no separate index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "movies": [
+        IndexModel([("id", 1)], unique=True),
+        IndexModel([("releaseYear", 1)]),
+        # Incremental exports (`since=`)
+        IndexModel([("updatedAt", 1)]),
+    ] + [IndexModel(keys) for keys in PAGINATION_INDEXES],
+    "genres": [
+        IndexModel([("id", 1)], unique=True),
+        IndexModel([("slug", 1)], unique=True),
+    ],
+}
+
+# Representative query shape for each hot route: (collection, filter, sort)
+QUERY_SHAPES = {
+    "get_movie": ("movies", {"id": "00000000-0000-0000-0000-000000000000"}, None),
+    "get_movies?genre": ("movies", {"genres": "Action"}, None),
+    "get_movies_page?sort=newest": ("movies", {}, [("createdAt", -1), ("id", -1)]),
+    "get_movies_page?sort=popular&genre": ("movies", {"genres": "Action"}, [("viewCount", -1), ("id", -1)]),
+    # Pages after the first: the keyset $or, each branch needing its own index scan
+    "get_movies_page?sort=newest&cursor": ("movies", {"$or": [
+        {"createdAt": {"$lt": "2024-01-01T00:00:00.000000Z"}},
+        {"createdAt": "2024-01-01T00:00:00.000000Z", "id": {"$lt": "00000000-0000-0000-0000-000000000000"}},
+    ]}, [("createdAt", -1), ("id", -1)]),
+    "get_movies_page?sort=popular&genre&cursor": ("movies", {"genres": "Action", "$or": [
+        {"viewCount": {"$lt": 100}},
+        {"viewCount": 100, "id": {"$lt": "00000000-0000-0000-0000-000000000000"}},
+    ]}, [("viewCount", -1), ("id", -1)]),
+    "get_similar_movies (fallback)": ("movies", {"genres": "Action", "id": {"$ne": "00000000-0000-0000-0000-000000000000"}}, [("viewCount", -1), ("id", -1)]),
+    "search_movies": ("movies", {"id": {"$in": ["00000000-0000-0000-0000-000000000000"]}}, None),
+    "search_movies?year (fallback)": ("movies", {"releaseYear": 2023}, None),
+    "get_admin_stats top movies": ("movies", {}, [("viewCount", -1)]),
+    "export_collection?since": ("movies", {"updatedAt": {"$gt": "2024-01-01T00:00:00Z"}}, [("updatedAt", 1)]),
+    "create_genre": ("genres", {"slug": "action"}, None),
+    "delete_genre": ("genres", {"id": "00000000-0000-0000-0000-000000000000"}, None),
+}
+
+
+async def ensure_indexes(db):
+    # create_indexes is a no-op for indexes that already exist with the same spec
+    for collection, models in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(models)
+        except OperationFailure as e:
+            # e.g. duplicate ids in existing data or an index with conflicting options
+            logger.error("Could not ensure indexes on %s: %s", collection, e)
+            continue
+        logger.info("Ensured %d indexes on %s: %s", len(names), collection, ", ".join(names))
+
+
+def _plan_summary(plan: dict) -> dict:
+    # Every branch is walked: an $or (OR, SORT_MERGE) can scan the collection under any one of its inputs
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        plan = pending.pop()
+        stages.append(plan["stage"])
+        if "indexName" in plan:
+            indexes.append(plan["indexName"])
+        children = plan.get("inputStages") or ([plan["inputStage"]] if "inputStage" in plan else [])
+        pending.extend(reversed(children))
+    return {"stages": stages, "indexes": indexes, "collscan": "COLLSCAN" in stages}
+
+
+async def explain_query_shapes(db) -> List[dict]:
+    results = []
+    for route, (collection, query, sort) in QUERY_SHAPES.items():
+        command = {"find": collection, "filter": query, "limit": 20}
+        if sort:
+            command["sort"] = dict(sort)
+        explain = await db.command({"explain": command, "verbosity": "queryPlanner"})
+        winning_plan = explain["queryPlanner"]["winningPlan"]
+        # Plans of sharded or SBE-executed queries nest the classic plan one level down
+        winning_plan = winning_plan.get("queryPlan", winning_plan)
+        results.append({"route": route, "collection": collection, **_plan_summary(winning_plan)})
+    return results
+
+
+async def index_usage(db) -> Dict[str, List[dict]]:
+    usage = {}
+    for collection in INDEXES:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        usage[collection] = sorted(
+            (
+                {"name": s["name"], "ops": s["accesses"]["ops"], "since": s["accesses"]["since"]}
+                for s in stats
+            ),
+            key=lambda s: s["name"],
+        )
+    return usage
+
+
+async def _check(db) -> int:
+    await ensure_indexes(db)
+    failures = 0
+    for result in await explain_query_shapes(db):
+        status = "COLLSCAN" if result["collscan"] else "IXSCAN"
+        print(f"{status:8} {result['route']:40} {' -> '.join(result['stages'])} {result['indexes']}")
+        failures += result["collscan"]
+    return failures
+
+
+def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="ensure indexes and fail if a hot query is a COLLSCAN")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        if args.check:
+            failures = asyncio.run(_check(db))
+            sys.exit(1 if failures else 0)
+        asyncio.run(ensure_indexes(db))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+
+class MovieLoader:
+    """Coalesces concurrent single-movie reads into one `$in` query per event-loop iteration."""
+
+    def __init__(self, collection, projection: dict):
+        self.collection = collection
+        self.projection = projection
+
+        # Ids requested since the last dispatch, and ids whose query is already running
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._scheduled = False
+        # The loop only keeps weak references to tasks; a fetch collected mid-query would strand its callers
+        self._fetches: Set[asyncio.Task] = set()
+
+        self.loads = 0
+        self.coalesced = 0
+        self.batches = 0
+
+    async def load(self, movie_id: str) -> Optional[dict]:
+        self.loads += 1
+        future = self._in_flight.get(movie_id) or self._pending.get(movie_id)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[movie_id] = future
+            if not self._scheduled:
+                # Dispatch once every request that is ready to run this iteration has queued its id
+                self._scheduled = True
+                asyncio.get_running_loop().call_soon(self._dispatch)
+        else:
+            self.coalesced += 1
+
+        # Shielded so one cancelled caller does not cancel the read for everyone else
+        doc = await asyncio.shield(future)
+        # Each caller gets its own copy; responses mutate documents while normalizing them
+        return dict(doc) if doc is not None else None
+
+    def clear(self, movie_ids: Iterable[str] = ()):
+        # A read already in flight may predate a write; later loads must not join it
+        for movie_id in movie_ids:
+            self._in_flight.pop(movie_id, None)
+
+    def _dispatch(self):
+        batch, self._pending = self._pending, {}
+        self._scheduled = False
+        self._in_flight.update(batch)
+        self.batches += 1
+        fetch = asyncio.create_task(self._fetch(batch))
+        self._fetches.add(fetch)
+        fetch.add_done_callback(self._fetches.discard)
+
+    async def _fetch(self, batch: Dict[str, asyncio.Future]):
+        try:
+            docs = await self.collection.find({"id": {"$in": list(batch)}}, self.projection).to_list(len(batch))
+        except Exception as e:
+            self._resolve(batch, {}, e)
+        else:
+            self._resolve(batch, {doc["id"]: doc for doc in docs}, None)
+
+    def _resolve(self, batch: Dict[str, asyncio.Future], found: Dict[str, dict], error: Optional[Exception]):
+        for movie_id, future in batch.items():
+            if self._in_flight.get(movie_id) is future:
+                del self._in_flight[movie_id]
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(found.get(movie_id))
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "inFlight": len(self._in_flight),
+        }
+
+
+class SingleFlight:
+    """Runs one call per key at a time; identical concurrent calls share its result."""
+
+    def __init__(self, on_coalesced: Optional[Callable[[], None]] = None):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._on_coalesced = on_coalesced
+
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            if self._on_coalesced is not None:
+                self._on_coalesced()
+            return await asyncio.shield(future)
+
+        self.calls += 1
+        future = asyncio.ensure_future(fn())
+        self._calls[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        # Shielded so one cancelled caller does not cancel the call for everyone else
+        return await asyncio.shield(future)
+
+    def clear(self):
+        # Calls already running may predate a write; later callers must not join them
+        self._calls.clear()
+
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "coalesced": self.coalesced, "inFlight": len(self._calls)}
@@ -0,0 +1,227 @@
+import asyncio
+import mimetypes
+import mmap
+import os
+from email.utils import formatdate
+from typing import Mapping, Optional, Tuple
+
+from starlette.responses import Response
+
+from metrics import MediaMetrics
+
+# Send modes: "auto" hands the file to the server when it offers sendfile (the ASGI zerocopysend or
+# pathsend extensions) and otherwise reads chunks in a thread; "read" always reads chunks; "mmap"
+# sends slices of a memory map instead of reading. Maps save a copy per chunk, but page faults on
+# uncached pages run on the event loop, and a file truncated in place while mapped kills the
+# worker with SIGBUS, so "mmap" is only for local files that are replaced by rename.
+SEND_MODES = ("auto", "read", "mmap")
+
+
+class RangeNotSatisfiable(Exception):
+    def __init__(self, size: int):
+        super().__init__(f"Range not satisfiable for {size} bytes")
+        self.size = size
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """First and last byte of a single `bytes=` range, or None to send the whole file."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Other units and multi-range requests get the whole file, which HTTP allows
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not all(part.isdigit() for part in (first, last) if part):
+        # Malformed ranges (including signs and stray dashes) are ignored, as if absent
+        return None
+    try:
+        if not first:
+            # bytes=-N: the last N bytes
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise RangeNotSatisfiable(size)
+            return max(0, size - suffix), size - 1
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    if start < 0 or end < start:
+        return None
+    return start, end
+
+
+class MediaFiles:
+    """Serves files under a directory with single byte-range support and a cap on concurrent streams."""
+
+    def __init__(self, root: str, metrics: MediaMetrics, max_streams: int = 64, chunk_bytes: int = 1024 * 1024,
+                 mode: str = "auto"):
+        self.root = os.path.realpath(root)
+        self.metrics = metrics
+        self.max_streams = max_streams
+        self.chunk_bytes = chunk_bytes
+        self.mode = mode
+
+    def resolve(self, relative: str) -> Optional[str]:
+        # Paths outside the media directory (../, symlinks out of it) are treated as missing
+        path = os.path.realpath(os.path.join(self.root, relative))
+        if os.path.commonpath([self.root, path]) != self.root or not os.path.isfile(path):
+            return None
+        return path
+
+    def response(self, path: str, headers: Mapping[str, str], send_body: bool = True) -> "MediaResponse":
+        stat = os.stat(path)
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+        last_modified = formatdate(stat.st_mtime, usegmt=True)
+
+        byte_range = None
+        if "range" in headers:
+            # If-Range: only honour the range if the client's copy is still this version of the file
+            if_range = headers.get("if-range")
+            if if_range is None or if_range in (etag, last_modified):
+                byte_range = parse_range(headers["range"], size)
+
+        response_headers = {
+            "accept-ranges": "bytes",
+            "etag": etag,
+            "last-modified": last_modified,
+        }
+        if byte_range is None:
+            start, end, status = 0, size - 1, 200
+        else:
+            start, end = byte_range
+            status = 206
+            response_headers["content-range"] = f"bytes {start}-{end}/{size}"
+        response_headers["content-length"] = str(end - start + 1)
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return MediaResponse(self, path, start, end, byte_range is None, status, response_headers, media_type, send_body)
+
+
+class MediaResponse(Response):
+    """Response for one file or byte range; the body is sent without copying it through Python where possible."""
+
+    def __init__(self, files: MediaFiles, path: str, start: int, end: int, whole: bool, status: int,
+                 headers: dict, media_type: str, send_body: bool):
+        self.files = files
+        self.path = path
+        self.start = start
+        self.end = end
+        self.whole = whole
+        self.status_code = status
+        self.media_type = media_type
+        self.send_body = send_body
+        self.background = None
+        self.init_headers({**headers, "content-type": media_type})
+
+    async def __call__(self, scope, receive, send):
+        files = self.files
+        metrics = files.metrics
+        if metrics.open >= files.max_streams:
+            # Players retry; refusing beats every stream on the worker slowing down
+            metrics.rejected += 1
+            body = b'{"detail":"Too many open streams"}'
+            await send({"type": "http.response.start", "status": 503, "headers": [
+                (b"content-type", b"application/json"), (b"retry-after", b"1"), (b"content-length", str(len(body)).encode()),
+            ]})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if not self.send_body or self.end < self.start:
+            mode = "empty"
+        elif files.mode == "read":
+            mode = "read"
+        elif "http.response.zerocopysend" in extensions:
+            mode = "zerocopysend"
+        elif "http.response.pathsend" in extensions and self.whole:
+            mode = "pathsend"
+        elif files.mode == "mmap":
+            mode = "mmap"
+        else:
+            mode = "read"
+
+        metrics.stream_started(mode)
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+            if mode == "empty":
+                await send({"type": "http.response.body", "body": b""})
+            elif mode == "zerocopysend":
+                await self._zerocopysend(send)
+            elif mode == "pathsend":
+                await send({"type": "http.response.pathsend", "path": self.path})
+                metrics.sent(mode, self.end + 1)
+            else:
+                await self._chunks(mode, send, receive)
+        finally:
+            metrics.stream_finished()
+
+    async def _zerocopysend(self, send):
+        # The server sendfile()s straight from the page cache to the socket
+        with open(self.path, "rb") as f:
+            count = self.end - self.start + 1
+            await send({"type": "http.response.zerocopysend", "file": f, "offset": self.start, "count": count})
+        self.files.metrics.sent("zerocopysend", count)
+
+    async def _chunks(self, mode: str, send, receive):
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.create_task(watch())
+        try:
+            if mode == "mmap":
+                await self._send_mapped(send, disconnected)
+            else:
+                await self._send_read(send, disconnected)
+        finally:
+            watcher.cancel()
+
+    async def _send_mapped(self, send, disconnected: asyncio.Event):
+        chunk = self.files.chunk_bytes
+        metrics = self.files.metrics
+        with open(self.path, "rb") as f:
+            # The map holds its own descriptor; it is unmapped once the server drops the last slice
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            offset = self.start
+            while offset <= self.end and not disconnected.is_set():
+                # Touching a page past a truncated end raises SIGBUS; stop short instead. This narrows
+                # the window rather than closing it, which is why mmap mode needs atomic replacement.
+                if os.fstat(f.fileno()).st_size <= self.end:
+                    break
+                count = min(chunk, self.end + 1 - offset)
+                # Read ahead the next chunk in the kernel while this one goes out
+                ahead = offset + count
+                if ahead <= self.end:
+                    aligned = ahead - ahead % mmap.PAGESIZE
+                    mapped.madvise(mmap.MADV_WILLNEED, aligned, min(chunk, self.end + 1 - aligned))
+                # A slice of the map: no read() and no copy into a bytes object
+                await send({"type": "http.response.body", "body": view[offset:offset + count], "more_body": True})
+                metrics.sent("mmap", count)
+                offset += count
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _send_read(self, send, disconnected: asyncio.Event):
+        chunk = self.files.chunk_bytes
+        metrics = self.files.metrics
+        with open(self.path, "rb", buffering=0) as f:
+            offset = self.start
+            while offset <= self.end and not disconnected.is_set():
+                # Positioned reads, unbuffered: each chunk is read once, straight into its own bytes
+                data = await asyncio.to_thread(os.pread, f.fileno(), min(chunk, self.end + 1 - offset), offset)
+                if not data:
+                    # Truncated since the response started
+                    break
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+                metrics.sent("read", len(data))
+                offset += len(data)
+        await send({"type": "http.response.body", "body": b""})
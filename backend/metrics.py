@@ -0,0 +1,395 @@
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds, Prometheus-style (an implicit +Inf bucket follows)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Handshake and session housekeeping are not queries anyone asked for
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "buildInfo", "saslStart", "saslContinue"}
+
+# Queries in flight for the current request; Motor copies the context into its executor threads
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestTrace:
+    __slots__ = ("queries", "mongo_seconds")
+
+    def __init__(self):
+        self.queries: List[tuple] = []
+        self.mongo_seconds = 0.0
+
+
+def _collection(command_name: str, command) -> str:
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+def _documents(command_name: str, reply) -> int:
+    cursor = reply.get("cursor")
+    if cursor is not None:
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or ())
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") is not None else 0
+    return reply.get("n", 0)
+
+
+def _shape(value):
+    # Keep field names and operators, replace literals so the shape can be logged safely
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shape(value[0])] if value else []
+    return "?"
+
+
+def query_shape(command_name: str, command) -> str:
+    parts = [command_name, _collection(command_name, command)]
+    for key in ("filter", "q", "query"):
+        if key in command:
+            parts.append(f"filter={_shape(command[key])}")
+    if "sort" in command:
+        parts.append(f"sort={dict(command['sort'])}")
+    if "pipeline" in command:
+        parts.append(f"pipeline={[next(iter(stage)) for stage in command['pipeline']]}")
+    for key in ("updates", "deletes"):
+        if command.get(key):
+            parts.append(f"filter={_shape(command[key][0].get('q', {}))}")
+    return " ".join(parts)
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool gauges and counters per server address."""
+
+    COUNTERS = ("created", "closed", "checkouts", "checkoutFailures", "cleared")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Dict[str, int]] = {}
+
+    def _pool(self, event) -> Dict[str, int]:
+        return self._pools.setdefault(_address(event), dict.fromkeys(("checkedOut", "waiting") + self.COUNTERS, 0))
+
+    def _add(self, event, field: str, delta: int = 1):
+        with self._lock:
+            self._pool(event)[field] += delta
+
+    # ConnectionPoolListener callbacks run on Motor's executor and pymongo's background threads
+    def pool_created(self, event):
+        # Report a pool as soon as it exists, not only once it has had traffic
+        with self._lock:
+            self._pool(event)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._add(event, "cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._add(event, "created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._add(event, "closed")
+
+    def connection_check_out_started(self, event):
+        self._add(event, "waiting")
+
+    def connection_check_out_failed(self, event):
+        self._add(event, "waiting", -1)
+        self._add(event, "checkoutFailures")
+
+    def connection_checked_out(self, event):
+        self._add(event, "waiting", -1)
+        self._add(event, "checkedOut")
+        self._add(event, "checkouts")
+
+    def connection_checked_in(self, event):
+        self._add(event, "checkedOut", -1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        totals = dict.fromkeys(("checkedOut", "waiting") + self.COUNTERS, 0)
+        for pool in pools.values():
+            for field, value in pool.items():
+                totals[field] += value
+        return {**totals, "open": totals["created"] - totals["closed"], "pools": pools}
+
+    def render_into(self, lines: List[str]):
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        _gauge(lines, "mongodb_pool_checked_out_connections", "Connections currently checked out.",
+               {f'address="{a}"': p["checkedOut"] for a, p in pools.items()})
+        _gauge(lines, "mongodb_pool_waiting_requests", "Operations waiting for a connection.",
+               {f'address="{a}"': p["waiting"] for a, p in pools.items()})
+        _gauge(lines, "mongodb_pool_open_connections", "Open connections.",
+               {f'address="{a}"': p["created"] - p["closed"] for a, p in pools.items()})
+        _counter(lines, "mongodb_pool_connections_created_total", "Connections created.",
+                 {f'address="{a}"': p["created"] for a, p in pools.items()})
+        _counter(lines, "mongodb_pool_checkout_failures_total", "Checkouts that timed out or failed.",
+                 {f'address="{a}"': p["checkoutFailures"] for a, p in pools.items()})
+        _counter(lines, "mongodb_pool_cleared_total", "Pool clears after network errors or failovers.",
+                 {f'address="{a}"': p["cleared"] for a, p in pools.items()})
+
+
+class MediaMetrics:
+    """Open media streams, and streams and bytes sent by how the body was sent."""
+
+    # Seconds of history behind the current throughput figure
+    WINDOW = 10
+
+    def __init__(self):
+        self.open = 0
+        self.peak_open = 0
+        self.rejected = 0
+        self._streams: Dict[str, int] = {}
+        self._bytes: Dict[str, int] = {}
+        # [second, bytes] per recent second
+        self._recent: deque = deque(maxlen=self.WINDOW)
+
+    def stream_started(self, mode: str):
+        self.open += 1
+        self.peak_open = max(self.peak_open, self.open)
+        self._streams[mode] = self._streams.get(mode, 0) + 1
+
+    def stream_finished(self):
+        self.open -= 1
+
+    def sent(self, mode: str, count: int):
+        self._bytes[mode] = self._bytes.get(mode, 0) + count
+        second = int(time.monotonic())
+        if self._recent and self._recent[-1][0] == second:
+            self._recent[-1][1] += count
+        else:
+            self._recent.append([second, count])
+
+    def throughput(self) -> float:
+        # Bytes per second over the last WINDOW seconds
+        since = int(time.monotonic()) - self.WINDOW
+        return sum(count for second, count in self._recent if second > since) / self.WINDOW
+
+    def snapshot(self) -> dict:
+        return {
+            "openStreams": self.open,
+            "peakOpenStreams": self.peak_open,
+            "rejected": self.rejected,
+            "streams": dict(self._streams),
+            "bytesSent": dict(self._bytes),
+            "mbPerSecond": round(self.throughput() / 1e6, 2),
+        }
+
+    def render_into(self, lines: List[str]):
+        _gauge(lines, "media_open_streams", "Media responses currently streaming.", {"": self.open})
+        _counter(lines, "media_streams_total", "Media responses started, by send mode.",
+                 {f'mode="{m}"': v for m, v in self._streams.items()})
+        _counter(lines, "media_bytes_sent_total", "Media bytes handed to the server, by send mode.",
+                 {f'mode="{m}"': v for m, v in self._bytes.items()})
+        _counter(lines, "media_streams_rejected_total", "Media requests refused because too many streams were open.",
+                 {"": self.rejected})
+
+
+class Metrics(monitoring.CommandListener):
+    """Per-route latency histograms and per-collection MongoDB command metrics."""
+
+    def __init__(self, slow_request_seconds: float = 0.5, max_slow_requests: int = 100):
+        self.slow_request_seconds = slow_request_seconds
+        self.slow_requests: deque = deque(maxlen=max_slow_requests)
+        # Registered on the client alongside this listener
+        self.pool = PoolMetrics()
+        self.media = MediaMetrics()
+
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], Histogram] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self._route_mongo_seconds: Dict[Tuple[str, str], float] = {}
+        self._commands: Dict[Tuple[str, str], Histogram] = {}
+        self._command_failures: Dict[Tuple[str, str], int] = {}
+        self._command_documents: Dict[Tuple[str, str], int] = {}
+        self._in_flight: Dict[Tuple[int, object], tuple] = {}
+        self._throttled: Dict[str, int] = {}
+        self._coalesced: Dict[str, int] = {}
+
+    # CommandListener callbacks run on Motor's executor threads
+    def started(self, event):
+        if event.command_name in IGNORED_COMMANDS:
+            return
+        key = (event.request_id, event.connection_id)
+        with self._lock:
+            self._in_flight[key] = (_current_trace.get(), _collection(event.command_name, event.command), event.command)
+
+    def succeeded(self, event):
+        self._finished(event, _documents(event.command_name, event.reply), failed=False)
+
+    def failed(self, event):
+        self._finished(event, 0, failed=True)
+
+    def _finished(self, event, documents: int, failed: bool):
+        with self._lock:
+            in_flight = self._in_flight.pop((event.request_id, event.connection_id), None)
+            if in_flight is None:
+                return
+            trace, collection, command = in_flight
+            seconds = event.duration_micros / 1e6
+            key = (collection, event.command_name)
+            self._commands.setdefault(key, Histogram()).observe(seconds)
+            self._command_documents[key] = self._command_documents.get(key, 0) + documents
+            if failed:
+                self._command_failures[key] = self._command_failures.get(key, 0) + 1
+            if trace is not None:
+                trace.queries.append((seconds, event.command_name, command, documents))
+                trace.mongo_seconds += seconds
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, trace: RequestTrace):
+        key = (method, route)
+        with self._lock:
+            self._routes.setdefault(key, Histogram()).observe(seconds)
+            status_key = (method, route, status)
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+            self._route_mongo_seconds[key] = self._route_mongo_seconds.get(key, 0.0) + trace.mongo_seconds
+
+        if seconds >= self.slow_request_seconds:
+            slowest = sorted(trace.queries, key=lambda query: query[0], reverse=True)[:3]
+            entry = {
+                "at": time.time(),
+                "method": method,
+                "route": route,
+                "status": status,
+                "seconds": round(seconds, 4),
+                "mongoSeconds": round(trace.mongo_seconds, 4),
+                "queries": len(trace.queries),
+                "slowestQueries": [
+                    {"shape": query_shape(name, command), "seconds": round(duration, 4), "documents": documents}
+                    for duration, name, command, documents in slowest
+                ],
+            }
+            self.slow_requests.append(entry)
+            logger.warning(
+                "Slow request %s %s -> %d in %.3fs (%d queries, %.3fs in MongoDB)%s",
+                method, route, status, seconds, len(trace.queries), trace.mongo_seconds,
+                "".join(f"\n    {q['seconds']:.3f}s {q['shape']} docs={q['documents']}" for q in entry["slowestQueries"]),
+            )
+
+    def record_throttled(self, route: str):
+        with self._lock:
+            self._throttled[route] = self._throttled.get(route, 0) + 1
+
+    def record_coalesced(self, route: str):
+        with self._lock:
+            self._coalesced[route] = self._coalesced.get(route, 0) + 1
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+            _histogram(lines, "http_request_duration_seconds", "HTTP request latency by route.",
+                       {f'method="{m}",route="{r}"': h for (m, r), h in self._routes.items()})
+            _counter(lines, "http_responses_total", "HTTP responses by route and status.",
+                     {f'method="{m}",route="{r}",status="{s}"': v for (m, r, s), v in self._responses.items()})
+            _counter(lines, "http_request_mongo_seconds_total", "Time spent in MongoDB commands by route.",
+                     {f'method="{m}",route="{r}"': v for (m, r), v in self._route_mongo_seconds.items()})
+            _histogram(lines, "mongodb_command_duration_seconds", "MongoDB command latency by collection and command.",
+                       {f'collection="{c}",command="{n}"': h for (c, n), h in self._commands.items()})
+            _counter(lines, "mongodb_command_failures_total", "Failed MongoDB commands.",
+                     {f'collection="{c}",command="{n}"': v for (c, n), v in self._command_failures.items()})
+            _counter(lines, "mongodb_command_documents_total", "Documents returned or written by MongoDB commands.",
+                     {f'collection="{c}",command="{n}"': v for (c, n), v in self._command_documents.items()})
+            _counter(lines, "http_requests_throttled_total", "Requests rejected by the rate limiter.",
+                     {f'route="{r}"': v for r, v in self._throttled.items()})
+            _counter(lines, "http_requests_coalesced_total", "Requests served by joining an identical request in flight.",
+                     {f'route="{r}"': v for r, v in self._coalesced.items()})
+        self.pool.render_into(lines)
+        self.media.render_into(lines)
+        return "\n".join(lines) + "\n"
+
+
+def _counter(lines: List[str], name: str, help_text: str, samples: Dict[str, float]):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+
+def _gauge(lines: List[str], name: str, help_text: str, samples: Dict[str, float]):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+
+
+def _histogram(lines: List[str], name: str, help_text: str, samples: Dict[str, Histogram]):
+    lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in sorted(samples.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request against its route template."""
+
+    def __init__(self, app, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current_trace.set(trace)
+        status = 500
+        start = time.perf_counter()
+        # Timed to the response start: streamed bodies (exports, media) last as long as the client reads
+        responded: Optional[float] = None
+
+        async def send_wrapper(message):
+            nonlocal status, responded
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                responded = time.perf_counter()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
+            # The router records the matched route in the scope; label by template to bound cardinality
+            route = scope.get("route")
+            self.metrics.record_request(
+                scope["method"], getattr(route, "path", "unmatched"), status, (responded or time.perf_counter()) - start, trace
+            )
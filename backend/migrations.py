@@ -0,0 +1,119 @@
+"""One-off data migrations, each applied once per database.
+
+The API runs pending migrations in the background at startup; run
+`python migrations.py` to apply them ahead of a deploy instead, or
+`python migrations.py --list` to see which have been applied. Every
+migration is idempotent, so workers starting together may safely run the
+same one concurrently.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+async def _rewrite(collection, query: dict, projection: dict, change: Callable[[dict], dict]) -> int:
+    # Cursor over the matching documents, written back in unordered batches
+    modified = 0
+    batch = []
+    async for doc in collection.find(query, projection).batch_size(BATCH_SIZE):
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": change(doc)}))
+        if len(batch) == BATCH_SIZE:
+            modified += (await collection.bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        modified += (await collection.bulk_write(batch, ordered=False)).modified_count
+    return modified
+
+
+async def created_at_utc_z(db) -> int:
+    # Movies stored before the fast JSON path kept isoformat()'s "+00:00"; new ones use the "Z" form
+    # Pydantic emits. One format keeps createdAt sorts, keyset cursors and fast responses consistent.
+    return await _rewrite(
+        db.movies,
+        {"createdAt": {"$regex": r"\+00:00$"}},
+        {"_id": 1, "createdAt": 1},
+        lambda doc: {"createdAt": doc["createdAt"][:-len("+00:00")] + "Z"},
+    )
+
+
+async def updated_at_backfill(db) -> int:
+    # Incremental exports filter on updatedAt; movies stored before it existed would never match `since`.
+    # Their last change is their creation, or the migration itself if that is missing or unreadable.
+    now = datetime.now(timezone.utc)
+
+    def change(doc: dict) -> dict:
+        created_at = doc.get("createdAt")
+        if isinstance(created_at, str):
+            try:
+                created_at = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            except ValueError:
+                created_at = None
+        if not isinstance(created_at, datetime):
+            created_at = now
+        return {"updatedAt": created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)}
+
+    return await _rewrite(db.movies, {"updatedAt": {"$exists": False}}, {"_id": 1, "createdAt": 1}, change)
+
+
+# Applied in this order; names are recorded in the `migrations` collection once applied
+MIGRATIONS: Dict[str, Callable[..., Awaitable[int]]] = {
+    "created_at_utc_z": created_at_utc_z,
+    "updated_at_backfill": updated_at_backfill,
+}
+
+
+async def run_migrations(db) -> List[dict]:
+    applied = {doc["_id"] async for doc in db.migrations.find({}, {"_id": 1})}
+    results = []
+    for name, migration in MIGRATIONS.items():
+        if name in applied:
+            continue
+        started = datetime.now(timezone.utc)
+        modified = await migration(db)
+        await db.migrations.update_one(
+            {"_id": name},
+            {"$set": {"appliedAt": datetime.now(timezone.utc), "startedAt": started, "modified": modified}},
+            upsert=True,
+        )
+        logger.info("Applied migration %s: %d documents changed", name, modified)
+        results.append({"name": name, "modified": modified})
+    return results
+
+
+def main():
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="show applied migrations and exit")
+    args = parser.parse_args()
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    async def list_applied():
+        applied = {doc["_id"]: doc async for doc in db.migrations.find()}
+        for name in MIGRATIONS:
+            doc = applied.get(name)
+            print(f"{name:30} {doc['appliedAt'].isoformat() if doc else 'pending'}")
+
+    try:
+        asyncio.run(list_applied() if args.list else run_migrations(db))
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,66 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+# Stable sort orders for keyset pagination; `id` breaks ties so every position is unique
+SORTS = {
+    "newest": "createdAt",
+    "popular": "viewCount",
+}
+
+# Compound indexes backing each sort, with and without the genre filter
+PAGINATION_INDEXES = [
+    [(field, -1), ("id", -1)] for field in SORTS.values()
+] + [
+    [("genres", 1), (field, -1), ("id", -1)] for field in SORTS.values()
+]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, doc: dict) -> str:
+    payload = json.dumps([sort, doc.get(SORTS[sort]), doc["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise InvalidCursor("Malformed cursor")
+    if cursor_sort != sort:
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    # Cursors come from clients: anything but a plain value (a {"$regex": ...} say) would become a query operator
+    if not isinstance(last_id, str) or not _valid_value(SORTS[sort], value):
+        raise InvalidCursor("Malformed cursor")
+    return value, last_id
+
+
+def _valid_value(field: str, value) -> bool:
+    if field == "viewCount":
+        return isinstance(value, int) and not isinstance(value, bool)
+    # createdAt is stored as an ISO 8601 string
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def keyset_query(sort: str, cursor: Optional[str], base_query: dict) -> tuple:
+    field = SORTS[sort]
+    query = dict(base_query)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        query["$or"] = [
+            {field: {"$lt": value}},
+            {field: value, "id": {"$lt": last_id}},
+        ]
+    return query, [(field, -1), ("id", -1)]
@@ -0,0 +1,298 @@
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Dict, NamedTuple, Optional
+
+from loader import SingleFlight
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional; without it posters are only served, not rendered
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+
+class Derivative(NamedTuple):
+    width: int
+    height: int
+
+
+# Cards and thumbnails are sized for MovieCard (w-48 h-72) and list rows at 2x pixel density;
+# the hero is a 16:9 crop for HeroCarousel and the detail page backdrop
+DERIVATIVES = {
+    "thumbnail": Derivative(96, 144),
+    "card": Derivative(384, 576),
+    "hero": Derivative(1920, 1080),
+}
+
+# URL extension -> Pillow format, media type, encoder options
+FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+class InvalidPoster(ValueError):
+    pass
+
+
+class PosterUnavailable(RuntimeError):
+    pass
+
+
+def _fit_size(width: int, height: int, target: Derivative) -> Derivative:
+    # Largest crop of the target's aspect ratio, scaled down to the target but never up
+    crop_width = min(width, height * target.width / target.height)
+    scale = min(1.0, crop_width / target.width)
+    return Derivative(max(1, round(target.width * scale)), max(1, round(target.height * scale)))
+
+
+def render_derivatives(data: bytes) -> Dict[str, dict]:
+    """Decode a poster once and encode every derivative size in every format (runs in a worker process)."""
+    try:
+        with Image.open(BytesIO(data)) as source:
+            # JPEG sources decode straight at a reduced scale when even the largest derivative is much smaller
+            largest = max(DERIVATIVES.values(), key=lambda size: size.width * size.height)
+            source.draft("RGB", largest)
+            image = ImageOps.exif_transpose(source)
+            if image.mode != "RGB":
+                # Transparent areas go black, like the page behind the posters
+                background = Image.new("RGB", image.size)
+                rgba = image.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                image = background
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        raise InvalidPoster("Not a supported image") from e
+
+    rendered = {}
+    for name, target in DERIVATIVES.items():
+        size = _fit_size(image.width, image.height, target)
+        resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+        encoded = {}
+        for extension, (pillow_format, _, options) in FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pillow_format, **options)
+            encoded[extension] = buffer.getvalue()
+        rendered[name] = {"width": size.width, "height": size.height, "files": encoded}
+    return rendered
+
+
+class PosterStore:
+    """Content-addressed poster originals and rendered derivatives on disk.
+
+    Originals are kept; derivatives are a cache bounded by max_bytes, evicted least recently
+    served first and re-rendered from the original when requested again. Each process tracks
+    and evicts only the derivatives it has written or served, so workers sharing the directory
+    can together hold up to workers x max_bytes.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024, workers: int = 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._originals = os.path.join(root, "originals")
+        self._derivatives = os.path.join(root, "derivatives")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # Derivative path -> size, least recently used first
+        self._files: "OrderedDict[str, int]" = OrderedDict()
+        self._bytes = 0
+        # Concurrent requests for the same poster share one render
+        self._renders = SingleFlight()
+
+        self.rendered = 0
+        self.render_seconds = 0.0
+        self.evicted = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    async def start(self):
+        self._files, self._bytes = await asyncio.to_thread(self._scan)
+        logger.info("Poster cache holds %d derivatives (%d bytes)", len(self._files), self._bytes)
+
+    def _scan(self):
+        os.makedirs(self._originals, exist_ok=True)
+        os.makedirs(self._derivatives, exist_ok=True)
+        found = []
+        for directory, _, names in os.walk(self._derivatives):
+            for name in names:
+                path = os.path.join(directory, name)
+                if name.startswith(".tmp-"):
+                    # Left behind by a write that was interrupted
+                    _remove([path])
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                found.append((stat.st_mtime, path, stat.st_size))
+        # Recency from before a restart is approximated by write time
+        found.sort()
+        files = OrderedDict((path, size) for _, path, size in found)
+        return files, sum(files.values())
+
+    async def stop(self):
+        if self._pool is not None:
+            await asyncio.to_thread(self._pool.shutdown)
+            self._pool = None
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned, not forked: the server process has driver and event loop threads running
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def _original_path(self, digest: str) -> str:
+        return os.path.join(self._originals, digest[:2], digest)
+
+    def derivative_path(self, digest: str, name: str, extension: str) -> str:
+        return os.path.join(self._derivatives, digest[:2], f"{digest}-{name}.{extension}")
+
+    async def ingest(self, data: bytes) -> Dict[str, dict]:
+        """Store a poster and render its derivatives; returns the content hash and each derivative's size."""
+        if not self.available:
+            raise PosterUnavailable("Poster processing needs Pillow installed")
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        rendered = await self._render(digest, data)
+        # Written after rendering succeeds, so only decodable images are kept
+        await asyncio.to_thread(_write_once, self._original_path(digest), data)
+        sizes = {name: {"width": result["width"], "height": result["height"]} for name, result in rendered.items()}
+        return {"hash": digest, "sizes": sizes}
+
+    async def _render(self, digest: str, data: Optional[bytes] = None) -> Dict[str, dict]:
+        async def render():
+            source = data
+            if source is None:
+                source = await asyncio.to_thread(_read, self._original_path(digest))
+            started = time.perf_counter()
+            try:
+                rendered = await asyncio.get_running_loop().run_in_executor(self._executor(), render_derivatives, source)
+            except BrokenProcessPool:
+                # A worker died (out of memory on a huge image, say); start a fresh pool next time
+                self._pool = None
+                raise PosterUnavailable("Poster renderer crashed") from None
+            self.render_seconds += time.perf_counter() - started
+            self.rendered += 1
+
+            written = await asyncio.to_thread(self._write_derivatives, digest, rendered)
+            for path, size in written.items():
+                self._track(path, size)
+            await self._evict()
+            return rendered
+
+        return await self._renders.do(digest, render)
+
+    def _write_derivatives(self, digest: str, rendered: Dict[str, dict]) -> Dict[str, int]:
+        written = {}
+        for name, result in rendered.items():
+            for extension, encoded in result["files"].items():
+                path = self.derivative_path(digest, name, extension)
+                _write_once(path, encoded)
+                written[path] = len(encoded)
+        return written
+
+    def _track(self, path: str, size: int):
+        self._untrack(path)
+        self._files[path] = size
+        self._bytes += size
+
+    def _untrack(self, path: str):
+        previous = self._files.pop(path, None)
+        if previous is not None:
+            self._bytes -= previous
+
+    async def _evict(self):
+        victims = []
+        while self._bytes > self.max_bytes and len(self._files) > 1:
+            path, size = self._files.popitem(last=False)
+            self._bytes -= size
+            victims.append(path)
+        if victims:
+            await asyncio.to_thread(_remove, victims)
+            self.evicted += len(victims)
+
+    async def derivative(self, digest: str, name: str, extension: str) -> Optional[bytes]:
+        """A derivative's bytes, re-rendered from the original if it was evicted; None if unknown.
+
+        Read whole instead of served by path: another request or worker may evict the file
+        before a response opens it. Derivatives are at most a few hundred kilobytes.
+        """
+        path = self.derivative_path(digest, name, extension)
+        data = await asyncio.to_thread(_read_if_exists, path)
+        if data is not None:
+            if path in self._files:
+                self._files.move_to_end(path)
+            else:
+                # Written by another worker sharing the directory
+                self._track(path, len(data))
+            self.hits += 1
+            return data
+        self._untrack(path)
+        if not self.available or not os.path.exists(self._original_path(digest)):
+            return None
+        self.misses += 1
+        # Served from the render itself, which may already have been evicted from disk again
+        rendered = await self._render(digest)
+        return rendered[name]["files"][extension]
+
+    def stats(self) -> dict:
+        return {
+            "available": self.available,
+            "derivatives": len(self._files),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "rendered": self.rendered,
+            "renderSeconds": round(self.render_seconds, 3),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evicted": self.evicted,
+        }
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _read_if_exists(path: str) -> Optional[bytes]:
+    try:
+        return _read(path)
+    except FileNotFoundError:
+        return None
+
+
+def _write_once(path: str, data: bytes):
+    # Content-addressed: an existing file already has these bytes. Renamed into place so a
+    # concurrent reader (or another worker) never sees a partial file.
+    if os.path.exists(path):
+        return
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,130 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimit(NamedTuple):
+    rate: float  # tokens added per second
+    burst: int  # bucket capacity
+
+
+class MemoryBuckets:
+    """Token buckets in process memory, least recently used clients evicted past max_keys."""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def start(self, db):
+        pass
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(limit.burst), now]
+            if len(self._buckets) > self.max_keys:
+                # An evicted client just starts again with a full bucket
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / limit.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class MongoBuckets:
+    """Token buckets shared by every worker, one document per key updated atomically on the server."""
+
+    def __init__(self, collection_name: str = "rate_limits"):
+        self.collection_name = collection_name
+        self._collection = None
+
+    async def start(self, db):
+        self._collection = db[self.collection_name]
+        # Idle buckets are full again after burst / rate seconds; let MongoDB drop them then
+        await self._collection.create_index("expiresAt", expireAfterSeconds=0)
+
+    async def take(self, key: str, limit: RateLimit) -> float:
+        # Refill and take in one pipeline update, timed by the server clock ($$NOW) so workers agree
+        elapsed = {"$divide": [{"$subtract": ["$$NOW", {"$ifNull": ["$at", "$$NOW"]}]}, 1000]}
+        refilled = {"$min": [limit.burst, {"$add": [{"$ifNull": ["$tokens", limit.burst]}, {"$multiply": [elapsed, limit.rate]}]}]}
+        pipeline = [
+            {"$set": {"tokens": refilled, "at": "$$NOW"}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {"$set": {
+                "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                "expiresAt": {"$add": ["$$NOW", int(limit.burst / limit.rate * 1000)]},
+            }},
+        ]
+        for attempt in range(2):
+            try:
+                bucket = await self._collection.find_one_and_update(
+                    {"_id": key}, pipeline, {"tokens": 1, "allowed": 1},
+                    upsert=True, return_document=ReturnDocument.AFTER,
+                )
+                break
+            except DuplicateKeyError:
+                # Two first requests raced to create the bucket; the second one retries as an update
+                if attempt:
+                    raise
+        return 0.0 if bucket["allowed"] else (1 - bucket["tokens"]) / limit.rate
+
+    def __len__(self):
+        return 0
+
+
+class RateLimiter:
+    """Per-client, per-route token bucket limits."""
+
+    def __init__(self, limits: Dict[str, RateLimit], backend=None):
+        # Routes with a zero rate are left unlimited
+        self.limits = {route: limit for route, limit in limits.items() if limit.rate > 0}
+        self.backend = backend if backend is not None else MemoryBuckets()
+        self.allowed = 0
+        self.throttled: Dict[str, int] = {}
+        self.backend_errors = 0
+
+    async def start(self, db):
+        await self.backend.start(db)
+
+    async def check(self, route: str, client: str) -> Optional[float]:
+        # Seconds to wait before retrying, or None when the request may proceed
+        limit = self.limits.get(route)
+        if limit is None:
+            return None
+        try:
+            retry_after = await self.backend.take(f"{route}:{client}", limit)
+        except PyMongoError as e:
+            # Fail open: an unavailable shared backend must not take the endpoints down with it
+            self.backend_errors += 1
+            logger.warning("Rate limit backend unavailable, allowing request: %s", e)
+            return None
+        if retry_after:
+            self.throttled[route] = self.throttled.get(route, 0) + 1
+            return retry_after
+        self.allowed += 1
+        return None
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "limits": {route: {"perSecond": limit.rate, "burst": limit.burst} for route, limit in self.limits.items()},
+            "trackedClients": len(self.backend),
+            "allowed": self.allowed,
+            "throttled": dict(self.throttled),
+            "backendErrors": self.backend_errors,
+        }
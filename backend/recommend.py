@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import math
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Projection used when (re)loading documents into the recommender
+SIMILAR_PROJECTION = {"_id": 0, "id": 1, "synopsis": 1, "cast": 1, "genres": 1, "language": 1, "releaseYear": 1}
+
+# Each feature group is normalized on its own, then weighted, so a long synopsis cannot drown out shared genres
+GROUP_WEIGHTS = {"genres": 1.0, "cast": 0.8, "synopsis": 0.8, "language": 0.3, "decade": 0.3}
+
+# Bound on the similarity block held in memory during the batch pass (floats)
+MAX_BLOCK_CELLS = 1 << 26
+
+
+def _bucket(feature: str, dim: int):
+    # crc32 rather than hash() so vectors do not depend on the process's hash seed
+    h = zlib.crc32(feature.encode("utf-8"))
+    return h % dim, 1.0 if h & 0x80000000 else -1.0
+
+
+def _top_neighbors(scores: np.ndarray, k: int):
+    # Rows of `scores` are candidate similarities; returns the k best columns per row, best first
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), np.int32), np.empty((scores.shape[0], 0), np.float32)
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-part, axis=1, kind="stable")
+    return np.take_along_axis(idx, order, axis=1).astype(np.int32), np.take_along_axis(part, order, axis=1)
+
+
+class SimilarMovies:
+    """Content-based neighbors from hashed genre/cast/TF-IDF vectors, precomputed for O(1) lookup."""
+
+    def __init__(self, dim: int = 256, k: int = 20):
+        self.dim = dim
+        self.k = k
+        self.ready = False
+        self._building = False
+
+        self._rows: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._vectors = np.zeros((0, dim), np.float32)
+        self._alive = np.zeros(0, bool)
+        # Row indexes of each row's neighbors and their cosine similarity, best first; -1 pads short lists
+        self._neighbors = np.full((0, k), -1, np.int32)
+        self._scores = np.full((0, k), -np.inf, np.float32)
+
+        # Synopsis term document frequencies for IDF
+        self._df: Dict[str, int] = {}
+        self._doc_terms: Dict[str, List[str]] = {}
+
+        # Changes not yet applied (None for a removal); held while the batch pass runs
+        self._pending: Dict[str, Optional[dict]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+        self.updates = 0
+        self.rows_recomputed = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    # Vectorization
+
+    def _terms(self, doc: dict) -> List[str]:
+        return sorted(set(tokenize(doc.get("synopsis") or "")))
+
+    def _vector(self, doc: dict, terms: List[str]) -> np.ndarray:
+        n_docs = max(len(self._doc_terms), 1)
+        year = doc.get("releaseYear")
+        groups = {
+            "genres": [(f"g:{genre}", 1.0) for genre in doc.get("genres") or ()],
+            "cast": [(f"c:{name.strip().lower()}", 1.0) for name in doc.get("cast") or ()],
+            "synopsis": [(f"s:{term}", math.log((1 + n_docs) / (1 + self._df.get(term, 0))) + 1) for term in terms],
+            "language": [(f"l:{doc.get('language') or 'English'}", 1.0)],
+            "decade": [(f"d:{year // 10}", 1.0)] if isinstance(year, int) else [],
+        }
+        vector = np.zeros(self.dim, np.float32)
+        for group, features in groups.items():
+            if not features:
+                continue
+            part = np.zeros(self.dim, np.float32)
+            for feature, weight in features:
+                bucket, sign = _bucket(feature, self.dim)
+                part[bucket] += sign * weight
+            norm = np.linalg.norm(part)
+            if norm:
+                vector += GROUP_WEIGHTS[group] * part / norm
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _count_terms(self, movie_id: str, terms: List[str]):
+        self._doc_terms[movie_id] = terms
+        for term in terms:
+            self._df[term] = self._df.get(term, 0) + 1
+
+    def _uncount_terms(self, movie_id: str):
+        for term in self._doc_terms.pop(movie_id, ()):
+            self._df[term] -= 1
+            if not self._df[term]:
+                del self._df[term]
+
+    # Batch pass
+
+    async def build(self, collection, batch_size: int = 1000):
+        self._building = True
+        docs = []
+        try:
+            async for doc in collection.find({}, SIMILAR_PROJECTION).batch_size(batch_size):
+                terms = self._terms(doc)
+                self._count_terms(doc["id"], terms)
+                docs.append((doc, terms))
+
+            # Vectors need the final document frequencies, so they come after the full scan
+            n = len(docs)
+            self._reset(n)
+            for row, (doc, terms) in enumerate(docs):
+                self._rows[doc["id"]] = row
+                self._ids.append(doc["id"])
+                self._vectors[row] = self._vector(doc, terms)
+            self._alive[:n] = True
+
+            # The matrix products release the GIL; keep them off the event loop
+            neighbors, scores = await asyncio.to_thread(self._all_neighbors, n)
+            self._neighbors[:n] = neighbors
+            self._scores[:n] = scores
+        finally:
+            self._building = False
+
+        if self._pending and self._task is None:
+            self._task = asyncio.create_task(self._drain())
+        self.ready = True
+        logger.info("Similar-movie neighbors computed for %d movies", n)
+
+    def _reset(self, n: int):
+        capacity = max(n, 16)
+        self._rows = {}
+        self._ids = []
+        self._free = []
+        self._vectors = np.zeros((capacity, self.dim), np.float32)
+        self._alive = np.zeros(capacity, bool)
+        self._neighbors = np.full((capacity, self.k), -1, np.int32)
+        self._scores = np.full((capacity, self.k), -np.inf, np.float32)
+
+    def _all_neighbors(self, n: int):
+        vectors = self._vectors[:n]
+        neighbors = np.full((n, self.k), -1, np.int32)
+        scores = np.full((n, self.k), -np.inf, np.float32)
+        block = max(1, MAX_BLOCK_CELLS // max(n, 1))
+        for start in range(0, n, block):
+            end = min(start + block, n)
+            sims = self._similarities(vectors[start:end], n)
+            sims[np.arange(end - start), np.arange(start, end)] = -np.inf
+            idx, best = _top_neighbors(sims, self.k)
+            neighbors[start:end, : idx.shape[1]] = idx
+            scores[start:end, : best.shape[1]] = best
+        return neighbors, scores
+
+    def _similarities(self, vectors: np.ndarray, n: int) -> np.ndarray:
+        sims = vectors @ self._vectors[:n].T
+        sims[:, ~self._alive[:n]] = -np.inf
+        return sims
+
+    # Incremental updates
+
+    def add(self, doc: dict):
+        self._queue(doc["id"], doc)
+
+    def add_many(self, docs: Iterable[dict]):
+        for doc in docs:
+            self._queue(doc["id"], doc)
+
+    def remove(self, movie_id: str):
+        self._queue(movie_id, None)
+
+    def _queue(self, movie_id: str, doc: Optional[dict]):
+        # Applied in batches by a background task; an import batch costs one pass, not one per movie
+        self._pending[movie_id] = doc
+        if not self._building and self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def _drain(self):
+        try:
+            while self._pending:
+                changes, self._pending = self._pending, {}
+                try:
+                    # The matrix products release the GIL; keep them off the event loop
+                    await asyncio.to_thread(self._apply, changes)
+                except Exception:
+                    logger.exception("Failed to update similar-movie neighbors for %d movies", len(changes))
+        finally:
+            self._task = None
+
+    async def flush(self):
+        # Wait until every queued change is reflected in the neighbor lists
+        while self._task is not None:
+            await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    def _apply(self, changes: Dict[str, Optional[dict]]):
+        stale, changed = [], []
+        for movie_id, doc in changes.items():
+            row = self._rows.get(movie_id)
+            if row is not None:
+                self._clear_row(movie_id, row)
+                stale.append(row)
+            if doc is not None:
+                changed.append(self._set_row(doc))
+        n = len(self._ids)
+        changed = np.array(changed, np.int64)
+
+        # Rows listing a changed or removed movie hold stale similarities; recompute them exactly,
+        # along with the changed rows themselves
+        holders = np.nonzero(np.isin(self._neighbors[:n], stale + list(changed)).any(axis=1))[0]
+        exact = np.union1d(changed, holders[self._alive[holders]])
+        self._recompute(exact)
+
+        # Everyone else only gains candidates: insert each where it beats the current worst neighbor
+        block = max(1, MAX_BLOCK_CELLS // max(n, 1))
+        for start in range(0, len(changed), block):
+            rows = changed[start:start + block]
+            sims = self._similarities(self._vectors[rows], n)
+            sims[:, exact] = -np.inf
+            for row, row_sims in zip(rows, sims):
+                for other in np.nonzero(row_sims > self._scores[:n, -1])[0]:
+                    self._insert(other, row, row_sims[other])
+        self.updates += len(changes)
+
+    def _set_row(self, doc: dict) -> int:
+        movie_id = doc["id"]
+        terms = self._terms(doc)
+        self._count_terms(movie_id, terms)
+        row = self._allocate(movie_id)
+        self._vectors[row] = self._vector(doc, terms)
+        self._alive[row] = True
+        return row
+
+    def _clear_row(self, movie_id: str, row: int):
+        del self._rows[movie_id]
+        self._uncount_terms(movie_id)
+        self._ids[row] = None
+        self._alive[row] = False
+        self._vectors[row] = 0
+        self._neighbors[row] = -1
+        self._scores[row] = -np.inf
+        self._free.append(row)
+
+    def _allocate(self, movie_id: str) -> int:
+        if self._free:
+            row = self._free.pop()
+            self._ids[row] = movie_id
+        else:
+            row = len(self._ids)
+            self._ids.append(movie_id)
+            if row >= len(self._vectors):
+                self._grow(max(16, 2 * len(self._vectors)))
+        self._rows[movie_id] = row
+        return row
+
+    def _grow(self, capacity: int):
+        extra = capacity - len(self._vectors)
+        self._vectors = np.vstack([self._vectors, np.zeros((extra, self.dim), np.float32)])
+        self._alive = np.concatenate([self._alive, np.zeros(extra, bool)])
+        self._neighbors = np.vstack([self._neighbors, np.full((extra, self.k), -1, np.int32)])
+        self._scores = np.vstack([self._scores, np.full((extra, self.k), -np.inf, np.float32)])
+
+    def _recompute(self, rows: np.ndarray):
+        n = len(self._ids)
+        block = max(1, MAX_BLOCK_CELLS // max(n, 1))
+        for start in range(0, len(rows), block):
+            part = rows[start:start + block]
+            sims = self._similarities(self._vectors[part], n)
+            sims[np.arange(len(part)), part] = -np.inf
+            idx, best = _top_neighbors(sims, self.k)
+            for i, row in enumerate(part):
+                self._set_neighbors(row, idx[i], best[i])
+        self.rows_recomputed += len(rows)
+
+    def _set_neighbors(self, row: int, idx: np.ndarray, best: np.ndarray):
+        self._neighbors[row] = -1
+        self._scores[row] = -np.inf
+        self._neighbors[row, : len(idx)] = idx
+        self._scores[row, : len(best)] = best
+
+    def _insert(self, row: int, neighbor: int, score: float):
+        scores = self._scores[row]
+        pos = int(np.searchsorted(-scores, -score, side="right"))
+        self._neighbors[row, pos + 1:] = self._neighbors[row, pos:-1].copy()
+        self._scores[row, pos + 1:] = scores[pos:-1].copy()
+        self._neighbors[row, pos] = neighbor
+        self._scores[row, pos] = score
+
+    # Lookup
+
+    def similar(self, movie_id: str, limit: int = 10) -> Optional[List[str]]:
+        row = self._rows.get(movie_id)
+        if row is None:
+            return None
+        ids = []
+        for neighbor, score in zip(self._neighbors[row], self._scores[row]):
+            # Nothing in common at all is not a recommendation
+            if neighbor < 0 or score <= 0 or len(ids) >= limit:
+                break
+            # A removed neighbor lingers until the background update recomputes this row
+            if self._ids[neighbor] is not None:
+                ids.append(self._ids[neighbor])
+        return ids
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "movies": len(self._rows),
+            "dimensions": self.dim,
+            "neighbors": self.k,
+            "vectorBytes": int(self._vectors.nbytes),
+            "updates": self.updates,
+            "rowsRecomputed": self.rows_recomputed,
+            "pending": len(self._pending),
+        }
@@ -0,0 +1,288 @@
+import bisect
+import heapq
+import logging
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has he her his in into is it its of on or she "
+    "that the their them they this to was were will with".split()
+)
+
+# Field weights for the BM25F-style scoring: a hit in the title counts more than one in the synopsis
+FIELD_WEIGHTS = {"title": 3.0, "cast": 2.0, "synopsis": 1.0}
+
+# Projection used when (re)loading documents into the index
+INDEX_PROJECTION = {"_id": 0, "id": 1, "title": 1, "synopsis": 1, "cast": 1, "genres": 1, "releaseYear": 1}
+
+MAX_PREFIX_EXPANSIONS = 50
+
+# Relative change in average document length that invalidates cached impacts
+IMPACT_DRIFT = 0.05
+
+
+def stem(token: str) -> str:
+    # Light suffix stripping; good enough to fold plurals and common verb forms
+    if len(token) <= 3 or token.isdigit():
+        return token
+    for suffix, replacement in (("sses", "ss"), ("ies", "y"), ("ing", ""), ("edly", ""), ("ed", ""), ("ly", ""), ("s", "")):
+        if token.endswith(suffix) and not (suffix == "s" and token.endswith("ss")):
+            stemmed = token[: -len(suffix)] + replacement
+            if len(stemmed) >= 3:
+                return stemmed
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    return [stem(t) for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class SearchIndex:
+    """In-process inverted index over movie title, synopsis and cast with BM25 ranking."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ready = False
+        self._loading = False
+
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._vocabulary: List[str] = []
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self._doc_len: Dict[str, float] = {}
+        self._total_len = 0.0
+
+        self._genre_postings: Dict[str, Set[str]] = {}
+        self._year_postings: Dict[int, Set[str]] = {}
+        self._doc_filters: Dict[str, tuple] = {}
+
+        # Per-term postings sorted by BM25 impact, built lazily and dropped when the term changes
+        self._impacts: Dict[str, List[tuple]] = {}
+        self._impact_avg_len = 0.0
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    async def build(self, collection, batch_size: int = 1000):
+        # Vocabulary is appended unsorted while loading and sorted once at the end
+        self._loading = True
+        count = 0
+        try:
+            async for doc in collection.find({}, INDEX_PROJECTION).batch_size(batch_size):
+                self.add(doc)
+                count += 1
+        finally:
+            self._vocabulary.sort()
+            self._loading = False
+        self.ready = True
+        logger.info("Search index built with %d movies and %d terms", count, len(self._postings))
+
+    def add(self, doc: dict):
+        movie_id = doc["id"]
+        if movie_id in self._doc_len:
+            self.remove(movie_id)
+
+        weighted_tf: Dict[str, float] = {}
+        length = 0.0
+        for field, weight in FIELD_WEIGHTS.items():
+            value = doc.get(field) or ""
+            if isinstance(value, list):
+                value = " ".join(value)
+            tokens = tokenize(value)
+            length += weight * len(tokens)
+            for token in tokens:
+                weighted_tf[token] = weighted_tf.get(token, 0.0) + weight
+
+        for term, tf in weighted_tf.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if self._loading:
+                    self._vocabulary.append(term)
+                else:
+                    bisect.insort(self._vocabulary, term)
+            postings[movie_id] = tf
+            self._impacts.pop(term, None)
+
+        self._doc_terms[movie_id] = set(weighted_tf)
+        self._doc_len[movie_id] = length
+        self._total_len += length
+
+        genres = tuple(doc.get("genres") or ())
+        year = doc.get("releaseYear")
+        for genre in genres:
+            self._genre_postings.setdefault(genre, set()).add(movie_id)
+        if year is not None:
+            self._year_postings.setdefault(year, set()).add(movie_id)
+        self._doc_filters[movie_id] = (genres, year)
+
+    def add_many(self, docs: Iterable[dict]):
+        for doc in docs:
+            self.add(doc)
+
+    def remove(self, movie_id: str):
+        terms = self._doc_terms.pop(movie_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(movie_id, None)
+            self._impacts.pop(term, None)
+            if not postings:
+                del self._postings[term]
+                if self._loading:
+                    self._vocabulary.remove(term)
+                else:
+                    del self._vocabulary[bisect.bisect_left(self._vocabulary, term)]
+        self._total_len -= self._doc_len.pop(movie_id)
+
+        genres, year = self._doc_filters.pop(movie_id)
+        for genre in genres:
+            _discard(self._genre_postings, genre, movie_id)
+        if year is not None:
+            _discard(self._year_postings, year, movie_id)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        i = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        while i < len(self._vocabulary) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            term = self._vocabulary[i]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            i += 1
+        return terms
+
+    def search(
+        self,
+        q: str,
+        genre: Optional[str] = None,
+        year: Optional[int] = None,
+        limit: int = 20,
+    ) -> List[str]:
+        raw_tokens = [t for t in TOKEN_RE.findall(q.lower()) if t not in STOPWORDS]
+        if not raw_tokens:
+            return []
+
+        terms = {stem(t) for t in raw_tokens}
+        # The last word may still be being typed; match it as a prefix as well
+        if not q[-1:].isspace():
+            terms.update(self._expand_prefix(raw_tokens[-1]))
+
+        # Filters are posting-list intersections, smallest list first
+        allowed: Optional[Set[str]] = None
+        filter_sets = []
+        if genre:
+            filter_sets.append(self._genre_postings.get(genre, set()))
+        if year:
+            filter_sets.append(self._year_postings.get(year, set()))
+        if filter_sets:
+            filter_sets.sort(key=len)
+            allowed = set(filter_sets[0])
+            for other in filter_sets[1:]:
+                allowed &= other
+            if not allowed:
+                return []
+
+        n_docs = len(self._doc_len)
+        self._check_impact_cache()
+        weights = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings:
+                weights[term] = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+        if not weights:
+            return []
+
+        # Small filtered candidate sets are cheaper to score exhaustively
+        if allowed is not None and len(allowed) <= sum(len(self._postings[t]) for t in weights):
+            scores = {movie_id: self._score(movie_id, weights) for movie_id in allowed}
+            return heapq.nlargest(limit, (m for m in scores if scores[m] > 0), key=scores.__getitem__)
+
+        return self._top_k(weights, allowed, limit)
+
+    def _impact(self, tf: float, movie_id: str) -> float:
+        norm = self.k1 * (1 - self.b + self.b * self._doc_len[movie_id] / self._impact_avg_len) if self._impact_avg_len else self.k1
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def _score(self, movie_id: str, weights: Dict[str, float]) -> float:
+        score = 0.0
+        for term, idf in weights.items():
+            tf = self._postings[term].get(movie_id)
+            if tf is not None:
+                score += idf * self._impact(tf, movie_id)
+        return score
+
+    def _check_impact_cache(self):
+        # Impacts depend on the average document length; recompute lazily once it drifts
+        n_docs = len(self._doc_len)
+        avg_len = self._total_len / n_docs if n_docs else 0.0
+        if not self._impact_avg_len or abs(avg_len - self._impact_avg_len) > IMPACT_DRIFT * self._impact_avg_len:
+            self._impacts.clear()
+            self._impact_avg_len = avg_len
+
+    def _sorted_impacts(self, term: str) -> List[tuple]:
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            impacts = sorted(
+                ((self._impact(tf, movie_id), movie_id) for movie_id, tf in self._postings[term].items()),
+                reverse=True,
+            )
+            self._impacts[term] = impacts
+        return impacts
+
+    def _top_k(self, weights: Dict[str, float], allowed: Optional[Set[str]], limit: int) -> List[str]:
+        # Threshold algorithm over impact-ordered postings: stop once no unseen
+        # document can beat the current k-th best score
+        lists = {term: self._sorted_impacts(term) for term in weights}
+        positions = dict.fromkeys(lists, 0)
+        seen: Set[str] = set()
+        top: List[tuple] = []
+
+        while True:
+            threshold = 0.0
+            advanced = False
+            for term, impacts in lists.items():
+                i = positions[term]
+                while i < len(impacts) and allowed is not None and impacts[i][1] not in allowed:
+                    i += 1
+                if i >= len(impacts):
+                    positions[term] = i
+                    continue
+                impact, movie_id = impacts[i]
+                positions[term] = i + 1
+                advanced = True
+                threshold += weights[term] * impact
+                if movie_id not in seen:
+                    seen.add(movie_id)
+                    entry = (self._score(movie_id, weights), movie_id)
+                    if len(top) < limit:
+                        heapq.heappush(top, entry)
+                    elif entry > top[0]:
+                        heapq.heapreplace(top, entry)
+            if not advanced or (len(top) >= limit and top[0][0] >= threshold):
+                break
+
+        return [movie_id for _, movie_id in sorted(top, reverse=True)]
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "movies": len(self._doc_len),
+            "terms": len(self._postings),
+            "genres": len(self._genre_postings),
+            "years": len(self._year_postings),
+        }
+
+
+def _discard(postings: dict, key, movie_id: str):
+    ids = postings.get(key)
+    if ids is not None:
+        ids.discard(movie_id)
+        if not ids:
+            del postings[key]
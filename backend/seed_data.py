@@ -1,17 +1,23 @@
 import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
 import os
 from dotenv import load_dotenv
 from pathlib import Path
 import uuid
 from datetime import datetime, timezone
 
+from db import Database
+from fast_json import format_datetime
+from indexes import ensure_indexes
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Waits for the database to become ready (with retries) instead of racing it
+database = Database(
+    os.environ['MONGO_URL'],
+    os.environ['DB_NAME'],
+    server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+)
 
 # Sample genres
 genres_data = [
@@ -42,7 +48,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish"],
         "viewCount": 12450,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -57,7 +63,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "French"],
         "viewCount": 8920,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -72,7 +78,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 15230,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -87,7 +93,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish", "German"],
         "viewCount": 6780,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -102,7 +108,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 11200,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -117,7 +123,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish"],
         "viewCount": 9340,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -132,7 +138,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Hindi"],
         "viewCount": 7890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -147,7 +153,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 13560,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -162,7 +168,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "French"],
         "viewCount": 5670,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -177,7 +183,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Mandarin"],
         "viewCount": 18920,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -192,7 +198,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 10450,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -207,7 +213,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Japanese"],
         "viewCount": 14230,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -222,7 +228,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish"],
         "viewCount": 16780,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -237,7 +243,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 8120,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -252,7 +258,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 12890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -267,7 +273,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish"],
         "viewCount": 11670,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -282,7 +288,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 9560,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -297,7 +303,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 7230,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -312,7 +318,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 19450,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -327,7 +333,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Spanish"],
         "viewCount": 8890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -342,7 +348,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 15670,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -357,7 +363,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 10230,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -372,7 +378,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 13120,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -387,7 +393,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Arabic"],
         "viewCount": 11890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -402,7 +408,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 12340,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -417,7 +423,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 6450,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -432,7 +438,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Russian"],
         "viewCount": 17890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -447,7 +453,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 14560,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -462,7 +468,7 @@ movies_data = [
         "language": "English",
         "subtitles": ["English"],
         "viewCount": 8770,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     },
     {
         "id": str(uuid.uuid4()),
@@ -477,12 +483,14 @@ movies_data = [
         "language": "English",
         "subtitles": ["English", "Italian"],
         "viewCount": 10890,
-        "createdAt": datetime.now(timezone.utc).isoformat()
+        "createdAt": format_datetime(datetime.now(timezone.utc))
     }
 ]
 
 async def seed_database():
     print("Starting database seeding...")
+    await database.connect()
+    db = database.primary
     
     # Clear existing data
     await db.genres.delete_many({})
@@ -493,13 +501,17 @@ async def seed_database():
     await db.genres.insert_many(genres_data)
     print(f"Inserted {len(genres_data)} genres")
     
-    # Insert movies
-    await db.movies.insert_many(movies_data)
+    # Insert movies; updatedAt drives incremental exports
+    seeded_at = datetime.now(timezone.utc)
+    await db.movies.insert_many([{**movie, "updatedAt": seeded_at} for movie in movies_data])
     print(f"Inserted {len(movies_data)} movies")
     
+    await ensure_indexes(db)
+    print("Ensured indexes")
+    
     print("Database seeding completed successfully!")
     
-    client.close()
+    database.close()
 
 if __name__ == "__main__":
     asyncio.run(seed_database())
\ No newline at end of file
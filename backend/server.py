@@ -1,34 +1,274 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Header, Query, UploadFile, File
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Header, Query, Request, Response, UploadFile, File
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter
+from typing import Any, Dict, List, Literal, Optional
 import uuid
-from datetime import datetime, timezone
-import csv
-import io
+from datetime import datetime, timedelta, timezone
+import asyncio
+import math
+import re
+import time
+
+from browse import SORT_FIELDS, BrowseIndex
+from cache import ResponseCache
+from conditional import CatalogVersion, if_none_match_any, not_modified_response, validator_headers
+from db import Database
+from events import CatalogEvents, event_movie_ids
+from export import EXPORT_CSV_FIELDS, export_stream
+from fast_json import FastJSONResponse, format_datetime
+import fast_json
+from importer import CsvImporter
+from indexes import ensure_indexes, explain_query_shapes, index_usage
+from loader import MovieLoader, SingleFlight
+from migrations import run_migrations
+from media import SEND_MODES, MediaFiles, RangeNotSatisfiable
+from metrics import Metrics, MetricsMiddleware
+from pagination import SORTS, InvalidCursor, encode_cursor, keyset_query
+from posters import DERIVATIVES, FORMATS, InvalidPoster, PosterStore, PosterUnavailable
+from ratelimit import MemoryBuckets, MongoBuckets, RateLimit, RateLimiter
+from recommend import SimilarMovies
+from search_index import SearchIndex
+from stats import CatalogStats
+from suggest import MAX_SUGGESTIONS, Suggester
+from trending import WINDOWS, Trending
+from view_counter import ViewCounter
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Route latencies, MongoDB command and pool metrics; registered as listeners on the client
+metrics = Metrics(slow_request_seconds=float(os.environ.get('SLOW_REQUEST_SECONDS', '0.5')))
+
+# MongoDB connection, opened by the startup hook once the event loop is running
+database = Database(
+    os.environ['MONGO_URL'],
+    os.environ['DB_NAME'],
+    max_pool_size=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    min_pool_size=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    wait_queue_timeout_ms=int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+    server_selection_timeout_ms=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    connect_timeout_ms=int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    catalog_read_preference=os.environ.get('CATALOG_READ_PREFERENCE', 'secondaryPreferred'),
+    event_listeners=[metrics, metrics.pool],
+)
 
 # Admin token from environment
 ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', 'admin_secret_token_12345')
 
+# Token buckets per client IP for the unauthenticated endpoints that hit MongoDB on every call;
+# the mongo backend shares buckets across workers, the default keeps them per process
+rate_limiter = RateLimiter(
+    {
+        "search": RateLimit(
+            float(os.environ.get('RATE_LIMIT_SEARCH_PER_MINUTE', '120')) / 60,
+            int(os.environ.get('RATE_LIMIT_SEARCH_BURST', '30')),
+        ),
+        "increment_view": RateLimit(
+            float(os.environ.get('RATE_LIMIT_VIEWS_PER_MINUTE', '30')) / 60,
+            int(os.environ.get('RATE_LIMIT_VIEWS_BURST', '10')),
+        ),
+    },
+    MongoBuckets() if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'mongo' else MemoryBuckets(),
+)
+# Number of reverse proxies in front of the API whose X-Forwarded-For entries can be trusted
+FORWARDED_PROXIES = int(os.environ.get('FORWARDED_PROXIES', '0'))
+
+# Write-behind view counter
+view_counter = ViewCounter(
+    flush_interval=float(os.environ.get('VIEW_FLUSH_INTERVAL', '1.0')),
+    flush_threshold=int(os.environ.get('VIEW_FLUSH_THRESHOLD', '1000')),
+    max_pending=int(os.environ.get('VIEW_MAX_PENDING', '50000')),
+)
+
+# Admin dashboard totals, maintained by the write paths and the view counter
+catalog_stats = CatalogStats(reconcile_interval=float(os.environ.get('STATS_RECONCILE_INTERVAL', '300')))
+view_counter.add_listener(catalog_stats.views_flushed)
+
+# Full-text search index, built at startup and kept in sync by the admin endpoints
+search_index = SearchIndex()
+
+# Typeahead over titles and cast names, ranked by views
+suggester = Suggester()
+view_counter.add_listener(suggester.views_flushed)
+
+# Precomputed content-based neighbors for "More Like This"
+similar_movies = SimilarMovies(
+    dim=int(os.environ.get('SIMILAR_DIMENSIONS', '256')),
+    k=int(os.environ.get('SIMILAR_NEIGHBORS', '20')),
+)
+MAX_SIMILAR = 20
+
+# Columnar copy of the filterable fields, for multi-filter browsing with facet counts
+browse_index = BrowseIndex()
+view_counter.add_listener(browse_index.views_flushed)
+BROWSE_SORT_PATTERN = "^-?(" + "|".join(SORT_FIELDS) + ")$"
+
+# Recent plays per movie: hourly buckets in MongoDB, decayed top lists per window in memory
+trending = Trending(
+    k=int(os.environ.get('TRENDING_TOP_K', '100')),
+    retention_days=int(os.environ.get('TRENDING_RETENTION_DAYS', '8')),
+)
+view_counter.add_listener(trending.views_flushed)
+view_counter.add_listener(trending.record, local_only=True)
+
+# Poster originals and their rendered card/hero/thumbnail derivatives, content-addressed on disk
+poster_store = PosterStore(
+    os.environ.get('POSTER_DIR', str(ROOT_DIR / 'media' / 'posters')),
+    max_bytes=int(os.environ.get('POSTER_CACHE_MAX_MB', '1024')) * 1024 * 1024,
+    workers=int(os.environ.get('POSTER_WORKERS', '2')),
+)
+# Directory that local (non-URL) posterUrl values are read from when ingesting
+POSTER_SOURCE_DIR = os.environ.get('POSTER_SOURCE_DIR')
+MAX_POSTER_BYTES = int(os.environ.get('POSTER_MAX_UPLOAD_MB', '20')) * 1024 * 1024
+# Derivative URLs never change content, so clients and CDNs may keep them forever
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Locally stored videos, served with byte ranges; streams beyond the cap get 503 + Retry-After
+MEDIA_SEND_MODE = os.environ.get('MEDIA_SEND_MODE', 'auto')
+if MEDIA_SEND_MODE not in SEND_MODES:
+    raise ValueError(f"MEDIA_SEND_MODE must be one of {', '.join(SEND_MODES)}")
+media_files = MediaFiles(
+    os.environ.get('MEDIA_DIR', str(ROOT_DIR / 'media' / 'videos')),
+    metrics.media,
+    max_streams=int(os.environ.get('MEDIA_MAX_STREAMS', '64')),
+    chunk_bytes=int(os.environ.get('MEDIA_CHUNK_KB', '1024')) * 1024,
+    mode=MEDIA_SEND_MODE,
+)
+
+# Identical searches in flight at the same time share one database round trip
+search_flight = SingleFlight(on_coalesced=lambda: metrics.record_coalesced("search"))
+
+# Response cache for read-mostly catalog endpoints, invalidated by the admin endpoints
+response_cache = ResponseCache(max_bytes=int(os.environ.get('CACHE_MAX_BYTES', str(64 * 1024 * 1024))))
+CACHE_TTLS = {
+    "movies": float(os.environ.get('CACHE_TTL_MOVIES', '30')),
+    "movie": float(os.environ.get('CACHE_TTL_MOVIE', '60')),
+    "genres": float(os.environ.get('CACHE_TTL_GENRES', '300')),
+}
+
+# Home page feed
+HOME_FEED_TTL = float(os.environ.get('HOME_FEED_TTL', '120'))
+HOME_FEED_REFRESH = float(os.environ.get('HOME_FEED_REFRESH', '30'))
+HOME_GENRE_ROWS = 6
+HOME_ROW_SIZE = 20
+
+# Validators for HTTP conditional requests, bumped together with cache invalidation
+catalog_version = CatalogVersion(views_interval=float(os.environ.get('ETAG_VIEWS_INTERVAL', '60')))
+view_counter.add_listener(catalog_version.views_flushed)
+
+def invalidate_movies(*movie_ids: str):
+    response_cache.invalidate("movies", *(f"movie:{movie_id}" for movie_id in movie_ids))
+    catalog_version.catalog_changed(movie_ids)
+    movie_loader.clear(movie_ids)
+    search_flight.clear()
+
+def invalidate_genres():
+    response_cache.invalidate("genres")
+    catalog_version.catalog_changed()
+
+# In-process side effects of catalog writes: run by the worker that made the write, and by every
+# other worker once the change reaches it through catalog_events
+def movies_added(docs: List[dict]):
+    search_index.add_many(docs)
+    suggester.add_many(docs)
+    similar_movies.add_many(docs)
+    browse_index.add_many(docs)
+    for doc in docs:
+        catalog_stats.movie_added(doc)
+    invalidate_movies()
+
+def movie_updated(doc: dict):
+    search_index.add(doc)
+    suggester.add(doc)
+    similar_movies.add(doc)
+    browse_index.add(doc)
+    catalog_stats.movie_updated(doc)
+    invalidate_movies(doc["id"])
+
+def movie_removed(deleted: dict):
+    search_index.remove(deleted["id"])
+    suggester.remove(deleted["id"])
+    similar_movies.remove(deleted["id"])
+    trending.remove(deleted["id"])
+    browse_index.remove(deleted["id"])
+    catalog_stats.movie_removed(deleted)
+    invalidate_movies(deleted["id"])
+
+def genre_changed(op: str):
+    if op == "created":
+        catalog_stats.genre_added()
+    else:
+        catalog_stats.genre_removed()
+    invalidate_genres()
+
+# Keeps caches and in-memory indexes coherent across worker processes (uvicorn --workers, several hosts)
+catalog_events = CatalogEvents(
+    enabled=os.environ.get('CATALOG_EVENTS', 'false').lower() in ('1', 'true', 'yes'),
+    size_bytes=int(os.environ.get('CATALOG_EVENTS_SIZE_MB', '16')) * 1024 * 1024,
+    views_interval=float(os.environ.get('CATALOG_EVENTS_VIEWS_INTERVAL', '5')),
+)
+# Publishes this worker's view flushes; flushes received from other workers are not re-published
+view_counter.add_listener(catalog_events.views_flushed, local_only=True)
+
+async def apply_catalog_event(event: dict):
+    op = event.get("op")
+    if event["type"] == "views":
+        view_counter.apply_remote(event["counts"])
+    elif event["type"] == "genres":
+        genre_changed(op)
+    elif event["type"] == "movies":
+        if op == "deleted":
+            for deleted in event["movies"]:
+                movie_removed(deleted)
+            return
+        # Events carry ids only; read the current documents, later edits may already have landed
+        docs = await database.primary.movies.find({"id": {"$in": event["ids"]}}, {"_id": 0}).to_list(None)
+        if op == "created":
+            movies_added(docs)
+        else:
+            for doc in docs:
+                movie_updated(doc)
+
+def catalog_event_seen(event: dict, settled: bool):
+    # Every worker names catalog states by the same event ids, so their validators agree
+    catalog_version.follow(str(event["_id"]), event_movie_ids(event), event["type"] != "views", event["at"], settled)
+
+async def join_catalog_events(db):
+    await catalog_events.start(db, apply_catalog_event, resync_catalog, catalog_event_seen)
+    if catalog_events.enabled:
+        positions = catalog_events.positions
+        latest, catalog, views = positions["latest"], positions["catalog"], positions["views"]
+        catalog_version.share(
+            str(latest["_id"]) if latest else catalog_events.worker_id,
+            (str(catalog["_id"]), catalog["at"]) if catalog else None,
+            views["at"] if views else None,
+        )
+
+async def resync_catalog():
+    # Events were missed: drop everything cached and recount. In-memory indexes may keep stale
+    # entries until restart; search and similar-movie reads still fetch current documents by id.
+    response_cache.clear()
+    catalog_version.reset()
+    await catalog_stats.reconcile()
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
 
 # Models
+class PosterImage(BaseModel):
+    webp: str
+    jpg: str
+    width: int
+    height: int
+
 class Movie(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -45,6 +285,31 @@ class Movie(BaseModel):
     subtitles: List[str] = []
     viewCount: int = 0
     createdAt: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Resized copies of the poster (card, hero, thumbnail), once one has been ingested
+    posters: Optional[Dict[str, PosterImage]] = None
+
+class MovieCard(BaseModel):
+    # What MovieCard/MovieRow render; `fields=card` on list endpoints returns just these
+    model_config = ConfigDict(extra="ignore")
+    
+    id: str
+    title: str
+    posterUrl: str
+    releaseYear: int
+    runtime: int
+    genres: List[str]
+    viewCount: int = 0
+    createdAt: datetime
+    posters: Optional[Dict[str, PosterImage]] = None
+
+class TrendingMovie(MovieCard):
+    trendingScore: float
+
+class BrowseResult(BaseModel):
+    items: List[MovieCard]
+    total: int
+    # Value -> matching movies, per field: genres, languages, subtitles, years
+    facets: Optional[Dict[str, Dict[str, int]]] = None
 
 class MovieCreate(BaseModel):
     title: str
@@ -70,6 +335,43 @@ class MovieUpdate(BaseModel):
     language: Optional[str] = None
     subtitles: Optional[List[str]] = None
 
+class MovieListChanges(BaseModel):
+    genres: Optional[List[str]] = None
+    cast: Optional[List[str]] = None
+    subtitles: Optional[List[str]] = None
+
+class MovieBatchOperation(BaseModel):
+    op: Literal["update", "delete"]
+    id: str
+    # Updates only: fields to replace, and values to add to or remove from list fields
+    set: Optional[MovieUpdate] = None
+    add: Optional[MovieListChanges] = None
+    remove: Optional[MovieListChanges] = None
+
+MAX_BATCH_OPERATIONS = 5000
+
+class MovieBatch(BaseModel):
+    operations: List[MovieBatchOperation] = Field(..., min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+class MovieBatchResult(BaseModel):
+    index: int
+    id: str
+    op: str
+    status: Literal["updated", "deleted", "not_found", "invalid", "failed"]
+    error: Optional[str] = None
+
+class MovieBatchResponse(BaseModel):
+    matched: int
+    modified: int
+    deleted: int
+    failed: int
+    elapsedMs: float
+    results: List[MovieBatchResult]
+
+class MoviePage(BaseModel):
+    items: List[Movie]
+    next_cursor: Optional[str] = None
+
 class Genre(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -86,11 +388,72 @@ class AdminStats(BaseModel):
     totalViews: int
     totalGenres: int
     topMovies: List[dict]
+    updatedAt: Optional[datetime] = None
+    reconciledAt: Optional[datetime] = None
 
 class TokenValidation(BaseModel):
     valid: bool
     message: str
 
+# Fields returned by movie read endpoints
+MOVIE_PROJECTION = {"_id": 0, **{field: 1 for field in Movie.model_fields}}
+CARD_PROJECTION = {"_id": 0, **{field: 1 for field in MovieCard.model_fields}}
+
+def movie_projection(fields: Optional[List[str]]) -> Optional[dict]:
+    # Sparse fieldsets: None means full movies, "card" the MovieCard summary
+    if not fields:
+        return None
+    if fields == ["card"]:
+        return CARD_PROJECTION
+    unknown = sorted(set(fields) - set(Movie.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return {"_id": 0, "id": 1, **{field: 1 for field in fields}}
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    return [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+# Concurrent detail reads (including for the same id) share one `$in` query; bound to a collection at startup
+movie_loader = MovieLoader(None, MOVIE_PROJECTION)
+
+MAX_BATCH_IDS = int(os.environ.get('MAX_BATCH_IDS', '300'))
+
+class MovieBatchRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+    fields: Optional[List[str]] = None
+
+# Opt-in fast path: read endpoints encode documents straight to JSON bytes instead of
+# re-validating every document through the response model
+FAST_JSON_RESPONSES = os.environ.get('FAST_JSON_RESPONSES', 'false').lower() in ('1', 'true', 'yes')
+
+def normalize_movies(movies: List[dict]) -> List[dict]:
+    # createdAt is stored as an ISO string; only the validated path needs a datetime back. The fast path
+    # rewrites the "+00:00" of documents the created_at_utc_z migration has not reached yet.
+    for movie in movies:
+        created_at = movie.get('createdAt')
+        if isinstance(created_at, str):
+            if not FAST_JSON_RESPONSES:
+                movie['createdAt'] = datetime.fromisoformat(created_at)
+            elif created_at.endswith('+00:00'):
+                movie['createdAt'] = created_at[:-len('+00:00')] + 'Z'
+    return movies
+
+UNVALIDATED = TypeAdapter(Any)
+
+def render(content):
+    return fast_json.dumps(content) if FAST_JSON_RESPONSES else content
+
+def respond(content, response: Optional[Response] = None, headers: Optional[dict] = None, validate: bool = True):
+    # Pre-encoded bytes bypass response-model validation and serialization entirely
+    if isinstance(content, bytes):
+        return FastJSONResponse(content, headers=headers)
+    if not validate:
+        # Sparse fieldsets do not satisfy the response model; let pydantic-core encode them as they are
+        return FastJSONResponse(UNVALIDATED.dump_json(content), headers=headers)
+    if response is not None and headers:
+        response.headers.update(headers)
+    return content
+
 # Admin middleware
 async def verify_admin_token(authorization: Optional[str] = Header(None)):
     if not authorization:
@@ -101,83 +464,417 @@ async def verify_admin_token(authorization: Optional[str] = Header(None)):
     
     return True
 
+def client_ip(request: Request) -> str:
+    if FORWARDED_PROXIES:
+        # Each trusted proxy appends the address it received the request from
+        hops = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+        if len(hops) >= FORWARDED_PROXIES:
+            return hops[-FORWARDED_PROXIES]
+    return request.client.host if request.client else "unknown"
+
+async def enforce_rate_limit(request: Request, route: str):
+    retry_after = await rate_limiter.check(route, client_ip(request))
+    if retry_after is not None:
+        metrics.record_throttled(route)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
 # Public endpoints
 @api_router.get("/")
 async def root():
     return {"message": "MovieStream API v1.0"}
 
+@api_router.get("/health")
+async def health():
+    # Readiness probe: 503 while MongoDB is unreachable so load balancers hold traffic back
+    mongo = await database.health()
+    content = {
+        "status": "ok" if mongo["ok"] else "unavailable",
+        "mongo": {**mongo, "catalogReadPreference": database.catalog_read_preference},
+        "pool": metrics.pool.snapshot(),
+        "indexes": {"search": search_index.ready, "suggest": suggester.ready, "similar": similar_movies.ready,
+                    "trending": trending.ready, "browse": browse_index.ready},
+        "worker": catalog_events.worker_id,
+    }
+    return JSONResponse(content, status_code=200 if mongo["ok"] else 503)
+
+async def build_home_feed():
+    genres = await database.catalog.genres.find({}, {"_id": 0}).to_list(100)
+    row_genres = genres[:HOME_GENRE_ROWS]
+    by_views = [("viewCount", -1), ("id", -1)]
+    trending_ids = [movie_id for movie_id, _ in trending.top("day", 10)] if trending.ready else []
+    
+    # $facet cannot use indexes, so each row is its own small indexed query, run concurrently
+    hot, most_viewed, recent, *genre_rows = await asyncio.gather(
+        database.catalog.movies.find({"id": {"$in": trending_ids}}, {**CARD_PROJECTION, "synopsis": 1}).to_list(10),
+        database.catalog.movies.find({}, {**CARD_PROJECTION, "synopsis": 1}).sort(by_views).limit(10).to_list(10),
+        database.catalog.movies.find({}, CARD_PROJECTION).sort([("createdAt", -1), ("id", -1)]).limit(10).to_list(10),
+        *(
+            database.catalog.movies.find({"genres": genre["name"]}, CARD_PROJECTION).sort(by_views).limit(HOME_ROW_SIZE).to_list(HOME_ROW_SIZE)
+            for genre in row_genres
+        )
+    )
+    
+    # Most played in the last day first; all-time favourites fill the row while there are few recent plays
+    rank = {movie_id: i for i, movie_id in enumerate(trending_ids)}
+    hot.sort(key=lambda movie: rank[movie["id"]])
+    trending_row = (hot + [movie for movie in most_viewed if movie["id"] not in rank])[:10]
+    
+    return {
+        "hero": trending_row[:5],
+        "trending": trending_row,
+        "rows": [
+            {"genre": genre, "movies": movies}
+            for genre, movies in zip(row_genres, genre_rows) if movies
+        ],
+        "recent": recent,
+        "generatedAt": format_datetime(datetime.now(timezone.utc))
+    }
+
+@api_router.get("/home")
+async def get_home_feed(request: Request, response: Response):
+    headers = validator_headers(*catalog_version.feed_validators(), HOME_FEED_REFRESH)
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        return render(await build_home_feed())
+    
+    return respond(await response_cache.get_or_load("home", None, HOME_FEED_TTL, ["movies", "genres"], load), response, headers)
+
 @api_router.get("/movies", response_model=List[Movie])
 async def get_movies(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    genre: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated Movie fields, or `card`")
+):
+    field_list = parse_fields(fields)
+    projection = movie_projection(field_list)
+    
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        query = {}
+        if genre:
+            query["genres"] = genre
+        
+        movies = await database.catalog.movies.find(query, projection or MOVIE_PROJECTION).skip(skip).limit(limit).to_list(limit)
+        
+        return render(normalize_movies(movies))
+    
+    params = {"skip": skip, "limit": limit, "genre": genre, "fields": ",".join(sorted(field_list)) if field_list else None}
+    content = await response_cache.get_or_load("movies", params, CACHE_TTLS["movies"], ["movies"], load)
+    return respond(content, response, headers, validate=projection is None)
+
+@api_router.get("/movies/page", response_model=MoviePage)
+async def get_movies_page(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = None,
+    sort: str = Query("newest", pattern="^(" + "|".join(SORTS) + ")$"),
+    limit: int = Query(20, ge=1, le=100),
     genre: Optional[str] = None
 ):
-    query = {}
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    base_query = {}
     if genre:
-        query["genres"] = genre
+        base_query["genres"] = genre
     
-    movies = await db.movies.find(query, {"_id": 0}).skip(skip).limit(limit).to_list(limit)
+    try:
+        query, sort_spec = keyset_query(sort, cursor, base_query)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    for movie in movies:
-        if isinstance(movie.get('createdAt'), str):
-            movie['createdAt'] = datetime.fromisoformat(movie['createdAt'])
+    async def load():
+        # Fetch one extra document to know whether another page exists
+        movies = await database.catalog.movies.find(query, MOVIE_PROJECTION).sort(sort_spec).limit(limit + 1).to_list(limit + 1)
+        next_cursor = encode_cursor(sort, movies[limit - 1]) if len(movies) > limit else None
+        movies = movies[:limit]
+        
+        return render({"items": normalize_movies(movies), "next_cursor": next_cursor})
     
-    return movies
+    params = {"cursor": cursor, "sort": sort, "limit": limit, "genre": genre}
+    return respond(await response_cache.get_or_load("movies/page", params, CACHE_TTLS["movies"], ["movies"], load), response, headers)
+
+@api_router.get("/movies/suggest")
+async def suggest_movies(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(8, ge=1, le=MAX_SUGGESTIONS)
+):
+    # Served entirely from memory; cheap enough to call on every keystroke
+    if not suggester.ready:
+        raise HTTPException(status_code=503, detail="Suggestions are not available yet")
+    
+    return suggester.suggest(q, limit)
+
+@api_router.get("/movies/browse", response_model=BrowseResult)
+async def browse_movies(
+    request: Request,
+    response: Response,
+    genres: Optional[str] = Query(None, description="Comma-separated genres"),
+    match: str = Query("all", pattern="^(all|any)$", description="Movies must have all listed genres, or any of them"),
+    yearFrom: Optional[int] = None,
+    yearTo: Optional[int] = None,
+    runtimeMin: Optional[int] = Query(None, ge=0),
+    runtimeMax: Optional[int] = Query(None, ge=0),
+    language: Optional[str] = Query(None, description="Comma-separated languages, any of them"),
+    subtitles: Optional[str] = Query(None, description="Comma-separated subtitle languages, all of them"),
+    sort: str = Query("-viewCount", pattern=BROWSE_SORT_PATTERN),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=0, le=100),
+    facets: bool = True
+):
+    # Filtered, sorted and counted from memory in one vectorized pass; MongoDB only serves the page's cards
+    if not browse_index.ready:
+        raise HTTPException(status_code=503, detail="Browsing is not available yet")
+    
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    params = {
+        "genres": ",".join(sorted(parse_fields(genres) or ())),
+        "match": match,
+        "yearFrom": yearFrom,
+        "yearTo": yearTo,
+        "runtimeMin": runtimeMin,
+        "runtimeMax": runtimeMax,
+        "language": ",".join(sorted(parse_fields(language) or ())),
+        "subtitles": ",".join(sorted(parse_fields(subtitles) or ())),
+        "sort": sort,
+        "skip": skip,
+        "limit": limit,
+        "facets": facets,
+    }
+    
+    async def load():
+        result = browse_index.query(
+            genres=parse_fields(genres) or (),
+            match_all_genres=match == "all",
+            year_from=yearFrom,
+            year_to=yearTo,
+            runtime_min=runtimeMin,
+            runtime_max=runtimeMax,
+            languages=parse_fields(language) or (),
+            subtitles=parse_fields(subtitles) or (),
+            sort=sort,
+            skip=skip,
+            limit=limit,
+            facets=facets,
+        )
+        ids = result.pop("ids")
+        movies = await database.catalog.movies.find({"id": {"$in": ids}}, CARD_PROJECTION).to_list(len(ids)) if ids else []
+        # Restore the browse order, $in does not preserve it
+        rank = {movie_id: i for i, movie_id in enumerate(ids)}
+        movies.sort(key=lambda movie: rank[movie["id"]])
+        return render({"items": normalize_movies(movies), **result})
+    
+    return respond(await response_cache.get_or_load("movies/browse", params, CACHE_TTLS["movies"], ["movies"], load), response, headers)
+
+@api_router.get("/movies/trending", response_model=List[TrendingMovie])
+async def get_trending_movies(
+    request: Request,
+    response: Response,
+    window: str = Query("day", pattern="^(" + "|".join(WINDOWS) + ")$"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    # Ranked from memory; declared before /movies/{movie_id} so "trending" is not taken for an id
+    if not trending.ready:
+        raise HTTPException(status_code=503, detail="Trending is not available yet")
+    
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        ranked = trending.top(window, min(limit, trending.k))
+        scores = dict(ranked)
+        movies = await database.catalog.movies.find({"id": {"$in": list(scores)}}, CARD_PROJECTION).to_list(len(scores))
+        for movie in movies:
+            movie["trendingScore"] = round(scores[movie["id"]], 3)
+        movies.sort(key=lambda movie: -movie["trendingScore"])
+        return render(normalize_movies(movies))
+    
+    params = {"window": window, "limit": limit}
+    return respond(await response_cache.get_or_load("movies/trending", params, CACHE_TTLS["movies"], ["movies"], load), response, headers)
 
 @api_router.get("/movies/{movie_id}", response_model=Movie)
-async def get_movie(movie_id: str):
-    movie = await db.movies.find_one({"id": movie_id}, {"_id": 0})
-    if not movie:
-        raise HTTPException(status_code=404, detail="Movie not found")
+async def get_movie(movie_id: str, request: Request, response: Response):
+    headers = validator_headers(*catalog_version.movie_validators(movie_id), CACHE_TTLS["movie"])
+    # If-None-Match: * only matches a movie that exists; every other validator needs no read
+    exists = await movie_loader.load(movie_id) is not None if if_none_match_any(request) else True
+    not_modified = not_modified_response(request, headers, exists)
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        movie = await movie_loader.load(movie_id)
+        if not movie:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        
+        return render(normalize_movies([movie])[0])
     
-    if isinstance(movie.get('createdAt'), str):
-        movie['createdAt'] = datetime.fromisoformat(movie['createdAt'])
+    return respond(await response_cache.get_or_load("movie", {"id": movie_id}, CACHE_TTLS["movie"], [f"movie:{movie_id}"], load), response, headers)
+
+@api_router.post("/movies/batch")
+async def get_movies_batch(batch: MovieBatchRequest):
+    # Watchlist and history pages fetch all their movies in one round trip
+    ids = list(dict.fromkeys(batch.ids))
+    projection = movie_projection(batch.fields) or MOVIE_PROJECTION
+    
+    movies = await database.catalog.movies.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+    # Restore the requested order, $in does not preserve it
+    found = {movie["id"]: movie for movie in movies}
     
-    return movie
+    return respond(render({
+        "movies": normalize_movies([found[movie_id] for movie_id in ids if movie_id in found]),
+        "missing": [movie_id for movie_id in ids if movie_id not in found]
+    }), validate=False)
 
 @api_router.get("/movies/search/query")
 async def search_movies(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=1),
     genre: Optional[str] = None,
     year: Optional[int] = None,
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated Movie fields, or `card`")
 ):
-    query = {
-        "$or": [
-            {"title": {"$regex": q, "$options": "i"}},
-            {"synopsis": {"$regex": q, "$options": "i"}}
-        ]
-    }
+    await enforce_rate_limit(request, "search")
+    projection = movie_projection(parse_fields(fields)) or MOVIE_PROJECTION
     
-    if genre:
-        query["genres"] = genre
-    if year:
-        query["releaseYear"] = year
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
     
-    movies = await db.movies.find(query, {"_id": 0}).limit(limit).to_list(limit)
+    async def load():
+        if search_index.ready:
+            movie_ids = search_index.search(q, genre=genre, year=year, limit=limit)
+            movies = await database.catalog.movies.find({"id": {"$in": movie_ids}}, projection).to_list(len(movie_ids))
+            # Restore relevance order, $in does not preserve it
+            rank = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+            movies.sort(key=lambda movie: rank[movie["id"]])
+        else:
+            # Index still building: fall back to a literal (escaped) regex scan
+            pattern = re.escape(q)
+            query = {
+                "$or": [
+                    {"title": {"$regex": pattern, "$options": "i"}},
+                    {"synopsis": {"$regex": pattern, "$options": "i"}}
+                ]
+            }
+            
+            if genre:
+                query["genres"] = genre
+            if year:
+                query["releaseYear"] = year
+            
+            movies = await database.catalog.movies.find(query, projection).limit(limit).to_list(limit)
+        return render(normalize_movies(movies))
     
-    for movie in movies:
-        if isinstance(movie.get('createdAt'), str):
-            movie['createdAt'] = datetime.fromisoformat(movie['createdAt'])
+    key = (q, genre, year, limit, tuple(projection))
+    return respond(await search_flight.do(key, load), response, headers)
+
+@api_router.get("/movies/{movie_id}/similar", response_model=List[MovieCard])
+async def get_similar_movies(
+    movie_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(12, ge=1, le=MAX_SIMILAR)
+):
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["movies"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
     
-    return movies
+    async def load():
+        movie_ids = similar_movies.similar(movie_id, limit) if similar_movies.ready else None
+        if movie_ids is not None:
+            movies = await database.catalog.movies.find({"id": {"$in": movie_ids}}, CARD_PROJECTION).to_list(len(movie_ids))
+            # Restore similarity order, $in does not preserve it
+            rank = {similar_id: i for i, similar_id in enumerate(movie_ids)}
+            movies.sort(key=lambda movie: rank[movie["id"]])
+            return render(normalize_movies(movies))
+        
+        # Neighbors not computed yet (or movie added mid-build): most viewed movies sharing its first genre
+        movie = await database.catalog.movies.find_one({"id": movie_id}, {"_id": 0, "genres": 1})
+        if not movie:
+            raise HTTPException(status_code=404, detail="Movie not found")
+        query = {"genres": movie["genres"][0], "id": {"$ne": movie_id}} if movie.get("genres") else {"id": {"$ne": movie_id}}
+        movies = await database.catalog.movies.find(query, CARD_PROJECTION).sort([("viewCount", -1), ("id", -1)]).limit(limit).to_list(limit)
+        return render(normalize_movies(movies))
+    
+    params = {"id": movie_id, "limit": limit}
+    return respond(await response_cache.get_or_load("movie/similar", params, CACHE_TTLS["movies"], ["movies"], load), response, headers)
 
 @api_router.post("/movies/{movie_id}/increment-view")
-async def increment_view(movie_id: str):
-    result = await db.movies.update_one(
-        {"id": movie_id},
-        {"$inc": {"viewCount": 1}}
-    )
+async def increment_view(movie_id: str, request: Request):
+    await enforce_rate_limit(request, "increment_view")
+    # Known ids are checked in memory; only ids the browse index lacks (or before it is built) cost a read,
+    # since a movie created on another worker may not have reached this one yet
+    if not (browse_index.ready and movie_id in browse_index):
+        movie = await database.primary.movies.find_one({"id": movie_id}, {"_id": 1})
+        if not movie:
+            raise HTTPException(status_code=404, detail="Movie not found")
     
-    if result.matched_count == 0:
-        raise HTTPException(status_code=404, detail="Movie not found")
+    # Increments are coalesced and flushed in batches by the view counter
+    if not await view_counter.add(movie_id):
+        raise HTTPException(status_code=503, detail="View counter is overloaded, try again later")
     
     return {"success": True, "message": "View count incremented"}
 
+@api_router.get("/posters/{digest}/{name}.{extension}")
+async def get_poster(digest: str, name: str, extension: str):
+    if not re.fullmatch(r"[0-9a-f]{32}", digest) or name not in DERIVATIVES or extension not in FORMATS:
+        raise HTTPException(status_code=404, detail="Poster not found")
+    try:
+        data = await poster_store.derivative(digest, name, extension)
+    except PosterUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if data is None:
+        raise HTTPException(status_code=404, detail="Poster not found")
+    # The URL names the content, so it can be cached for good
+    return Response(data, media_type=FORMATS[extension][1], headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@api_router.api_route("/media/{path:path}", methods=["GET", "HEAD"])
+async def get_media(path: str, request: Request):
+    file = media_files.resolve(path)
+    if file is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    try:
+        return media_files.response(file, request.headers, send_body=request.method != "HEAD")
+    except RangeNotSatisfiable as e:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{e.size}"})
+
 @api_router.get("/genres", response_model=List[Genre])
-async def get_genres():
-    genres = await db.genres.find({}, {"_id": 0}).to_list(100)
-    return genres
+async def get_genres(request: Request, response: Response):
+    headers = validator_headers(*catalog_version.list_validators(), CACHE_TTLS["genres"])
+    not_modified = not_modified_response(request, headers)
+    if not_modified:
+        return not_modified
+    
+    async def load():
+        return render(await database.catalog.genres.find({}, {"_id": 0}).to_list(100))
+    
+    return respond(await response_cache.get_or_load("genres", None, CACHE_TTLS["genres"], ["genres"], load), response, headers)
 
 # Admin endpoints
 @api_router.post("/admin/validate-token", response_model=TokenValidation)
@@ -197,9 +894,12 @@ async def create_movie(
     
     movie_obj = Movie(**movie.model_dump())
     doc = movie_obj.model_dump()
-    doc['createdAt'] = doc['createdAt'].isoformat()
+    doc['updatedAt'] = doc['createdAt']
+    doc['createdAt'] = format_datetime(doc['createdAt'])
     
-    await db.movies.insert_one(doc)
+    await database.primary.movies.insert_one(doc)
+    movies_added([doc])
+    await catalog_events.publish({"type": "movies", "op": "created", "ids": [doc["id"]]})
     return movie_obj
 
 @api_router.put("/admin/movies/{movie_id}", response_model=Movie)
@@ -215,15 +915,19 @@ async def update_movie(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await db.movies.update_one(
+    # One round trip: the update returns the document it produced
+    updated_movie = await database.primary.movies.find_one_and_update(
         {"id": movie_id},
-        {"$set": update_data}
+        {"$set": {**update_data, "updatedAt": datetime.now(timezone.utc)}},
+        {"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if updated_movie is None:
         raise HTTPException(status_code=404, detail="Movie not found")
     
-    updated_movie = await db.movies.find_one({"id": movie_id}, {"_id": 0})
+    movie_updated(updated_movie)
+    await catalog_events.publish({"type": "movies", "op": "updated", "ids": [movie_id]})
     if isinstance(updated_movie.get('createdAt'), str):
         updated_movie['createdAt'] = datetime.fromisoformat(updated_movie['createdAt'])
     
@@ -236,13 +940,164 @@ async def delete_movie(
 ):
     await verify_admin_token(authorization)
     
-    result = await db.movies.delete_one({"id": movie_id})
+    deleted = await database.primary.movies.find_one_and_delete({"id": movie_id}, {"_id": 0, "id": 1, "viewCount": 1})
     
-    if result.deleted_count == 0:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Movie not found")
     
+    movie_removed(deleted)
+    await catalog_events.publish({"type": "movies", "op": "deleted", "movies": [deleted]})
     return {"success": True, "message": "Movie deleted"}
 
+def batch_update(operation: MovieBatchOperation) -> dict:
+    # Raises ValueError for operations MongoDB would reject or that change nothing
+    changes = {
+        "$set": operation.set.model_dump(exclude_none=True) if operation.set else {},
+        "$addToSet": {field: {"$each": values} for field, values in (operation.add.model_dump(exclude_none=True) if operation.add else {}).items()},
+        "$pull": {field: {"$in": values} for field, values in (operation.remove.model_dump(exclude_none=True) if operation.remove else {}).items()},
+    }
+    seen = set()
+    for fields in changes.values():
+        conflicting = seen & set(fields)
+        if conflicting:
+            raise ValueError(f"{', '.join(sorted(conflicting))} changed more than once")
+        seen |= set(fields)
+    if not seen:
+        raise ValueError("No fields to update")
+    changes["$set"]["updatedAt"] = datetime.now(timezone.utc)
+    return {operator: fields for operator, fields in changes.items() if fields}
+
+@api_router.post("/admin/movies/{movie_id}/poster", response_model=Movie)
+async def ingest_poster(
+    movie_id: str,
+    file: Optional[UploadFile] = File(None),
+    authorization: Optional[str] = Header(None)
+):
+    await verify_admin_token(authorization)
+    
+    movie = await database.primary.movies.find_one({"id": movie_id}, {"_id": 0, "posterUrl": 1})
+    if movie is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    
+    if file is not None:
+        data = await file.read(MAX_POSTER_BYTES + 1)
+    else:
+        # No upload: the movie's posterUrl must name a file under POSTER_SOURCE_DIR
+        data = await asyncio.to_thread(read_local_poster, movie.get("posterUrl") or "")
+    if len(data) > MAX_POSTER_BYTES:
+        raise HTTPException(status_code=413, detail="Poster is too large")
+    
+    try:
+        poster = await poster_store.ingest(data)
+    except InvalidPoster as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except PosterUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    base = f"/api/posters/{poster['hash']}"
+    changes = {
+        "posters": {
+            name: {**size, **{extension: f"{base}/{name}.{extension}" for extension in FORMATS}}
+            for name, size in poster["sizes"].items()
+        },
+        "updatedAt": datetime.now(timezone.utc),
+    }
+    if file is not None:
+        # An uploaded poster has no other URL; anything still reading posterUrl gets the card
+        changes["posterUrl"] = f"{base}/card.jpg"
+    updated_movie = await database.primary.movies.find_one_and_update(
+        {"id": movie_id}, {"$set": changes}, {"_id": 0}, return_document=ReturnDocument.AFTER
+    )
+    if updated_movie is None:
+        raise HTTPException(status_code=404, detail="Movie not found")
+    
+    movie_updated(updated_movie)
+    await catalog_events.publish({"type": "movies", "op": "updated", "ids": [movie_id]})
+    return updated_movie
+
+def read_local_poster(poster_url: str) -> bytes:
+    if not POSTER_SOURCE_DIR or "://" in poster_url:
+        raise HTTPException(status_code=400, detail="Upload a poster file, or set posterUrl to a file in POSTER_SOURCE_DIR")
+    root = os.path.realpath(POSTER_SOURCE_DIR)
+    path = os.path.realpath(os.path.join(root, poster_url.lstrip("/")))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise HTTPException(status_code=400, detail="Poster file not found")
+    with open(path, "rb") as f:
+        return f.read(MAX_POSTER_BYTES + 1)
+
+@api_router.post("/admin/movies/batch", response_model=MovieBatchResponse)
+async def batch_movies(batch: MovieBatch, authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    started = time.perf_counter()
+    
+    results: List[dict] = [{"index": i, "id": op.id, "op": op.op} for i, op in enumerate(batch.operations)]
+    requests, request_indexes, seen_ids = [], [], set()
+    for i, operation in enumerate(batch.operations):
+        # Unordered writes to one movie could land in either order; one operation per movie
+        if operation.id in seen_ids:
+            results[i].update(status="invalid", error="Movie appears in more than one operation")
+            continue
+        seen_ids.add(operation.id)
+        if operation.op == "delete":
+            requests.append(DeleteOne({"id": operation.id}))
+        else:
+            try:
+                requests.append(UpdateOne({"id": operation.id}, batch_update(operation)))
+            except ValueError as e:
+                results[i].update(status="invalid", error=str(e))
+                continue
+        request_indexes.append(i)
+    
+    delete_ids = [results[i]["id"] for i in request_indexes if results[i]["op"] == "delete"]
+    update_ids = [results[i]["id"] for i in request_indexes if results[i]["op"] == "update"]
+    # Removal bookkeeping (admin stats) needs the view counts of what is deleted
+    to_delete = await database.primary.movies.find({"id": {"$in": delete_ids}}, {"_id": 0, "id": 1, "viewCount": 1}).to_list(None) if delete_ids else []
+    
+    summary = {"nMatched": 0, "nModified": 0, "nRemoved": 0}
+    errors = {}
+    if requests:
+        try:
+            result = await database.primary.movies.bulk_write(requests, ordered=False)
+            summary = result.bulk_api_result
+        except BulkWriteError as e:
+            # Unordered: everything except the reported operations was applied
+            summary = e.details
+            errors = {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+    
+    updated = await database.primary.movies.find({"id": {"$in": update_ids}}, {"_id": 0}).to_list(None) if update_ids else []
+    updated_ids = {doc["id"] for doc in updated}
+    deleted_ids = {doc["id"] for doc in to_delete}
+    for position, i in enumerate(request_indexes):
+        result = results[i]
+        if position in errors:
+            result.update(status="failed", error=errors[position])
+        elif result["op"] == "delete":
+            result["status"] = "deleted" if result["id"] in deleted_ids else "not_found"
+        else:
+            result["status"] = "updated" if result["id"] in updated_ids else "not_found"
+    
+    # Same side effects as the single-movie endpoints, then one event per kind for the other workers
+    failed_ids = {results[request_indexes[position]]["id"] for position in errors}
+    updated = [doc for doc in updated if doc["id"] not in failed_ids]
+    removed = [doc for doc in to_delete if doc["id"] not in failed_ids]
+    for doc in updated:
+        movie_updated(doc)
+    for doc in removed:
+        movie_removed(doc)
+    if updated:
+        await catalog_events.publish({"type": "movies", "op": "updated", "ids": [doc["id"] for doc in updated]})
+    if removed:
+        await catalog_events.publish({"type": "movies", "op": "deleted", "movies": removed})
+    
+    return {
+        "matched": summary.get("nMatched", 0),
+        "modified": summary.get("nModified", 0),
+        "deleted": summary.get("nRemoved", 0),
+        "failed": sum(1 for result in results if result["status"] in ("invalid", "failed")),
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 2),
+        "results": results,
+    }
+
 @api_router.post("/admin/genres", response_model=Genre)
 async def create_genre(
     genre: GenreCreate,
@@ -251,14 +1106,16 @@ async def create_genre(
     await verify_admin_token(authorization)
     
     # Check if genre already exists
-    existing = await db.genres.find_one({"slug": genre.slug})
+    existing = await database.primary.genres.find_one({"slug": genre.slug})
     if existing:
         raise HTTPException(status_code=400, detail="Genre already exists")
     
     genre_obj = Genre(**genre.model_dump())
     doc = genre_obj.model_dump()
     
-    await db.genres.insert_one(doc)
+    await database.primary.genres.insert_one(doc)
+    genre_changed("created")
+    await catalog_events.publish({"type": "genres", "op": "created"})
     return genre_obj
 
 @api_router.delete("/admin/genres/{genre_id}")
@@ -268,43 +1125,180 @@ async def delete_genre(
 ):
     await verify_admin_token(authorization)
     
-    result = await db.genres.delete_one({"id": genre_id})
+    result = await database.primary.genres.delete_one({"id": genre_id})
     
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Genre not found")
     
+    genre_changed("deleted")
+    await catalog_events.publish({"type": "genres", "op": "deleted"})
     return {"success": True, "message": "Genre deleted"}
 
-@api_router.get("/admin/stats", response_model=AdminStats)
-async def get_admin_stats(authorization: Optional[str] = Header(None)):
+@api_router.get("/admin/metrics")
+async def get_metrics(authorization: Optional[str] = Header(None)):
     await verify_admin_token(authorization)
     
-    total_movies = await db.movies.count_documents({})
-    total_genres = await db.genres.count_documents({})
+    # Prometheus text exposition format
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@api_router.get("/admin/slow-requests")
+async def get_slow_requests(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
     
-    # Calculate total views
-    pipeline = [
-        {"$group": {"_id": None, "totalViews": {"$sum": "$viewCount"}}}
-    ]
-    views_result = await db.movies.aggregate(pipeline).to_list(1)
-    total_views = views_result[0]["totalViews"] if views_result else 0
+    return {
+        "thresholdSeconds": metrics.slow_request_seconds,
+        "requests": list(reversed(metrics.slow_requests))
+    }
+
+@api_router.get("/admin/view-counter")
+async def get_view_counter_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
     
-    # Get top movies by view count
-    top_movies = await db.movies.find(
-        {}, 
-        {"_id": 0, "id": 1, "title": 1, "viewCount": 1, "posterUrl": 1}
-    ).sort("viewCount", -1).limit(10).to_list(10)
+    return view_counter.stats()
+
+@api_router.get("/admin/trending")
+async def get_trending_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return trending.stats()
+
+@api_router.get("/admin/media")
+async def get_media_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return {**metrics.media.snapshot(), "maxStreams": media_files.max_streams, "sendMode": media_files.mode}
+
+@api_router.get("/admin/cache")
+async def get_cache_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return {
+        **response_cache.stats(),
+        "movieLoader": movie_loader.stats(),
+        "searchFlights": search_flight.stats(),
+        "posters": poster_store.stats(),
+    }
+
+@api_router.get("/admin/indexes")
+async def get_index_report(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
     
     return {
-        "totalMovies": total_movies,
-        "totalViews": total_views,
-        "totalGenres": total_genres,
-        "topMovies": top_movies
+        "usage": await index_usage(database.primary),
+        "plans": await explain_query_shapes(database.primary)
     }
 
+@api_router.get("/admin/catalog-events")
+async def get_catalog_events_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return catalog_events.stats()
+
+@api_router.get("/admin/search-index")
+async def get_search_index_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return {**search_index.stats(), "suggest": suggester.stats(), "similar": similar_movies.stats(), "browse": browse_index.stats()}
+
+@api_router.get("/admin/stats", response_model=AdminStats)
+async def get_admin_stats(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    # Served from memory; only the very first request after startup waits for a reconciliation
+    if not catalog_stats.ready:
+        await catalog_stats.reconcile()
+    
+    return catalog_stats.snapshot()
+
+def movie_doc_from_csv_row(row: dict) -> dict:
+    movie_obj = Movie(
+        title=row["title"],
+        synopsis=row["synopsis"],
+        genres=row["genres"].split("|"),
+        cast=row["cast"].split("|"),
+        releaseYear=int(row["releaseYear"]),
+        runtime=int(row["runtime"]),
+        posterUrl=row["posterUrl"],
+        videoUrl=row["videoUrl"],
+        language=row.get("language") or "English",
+    )
+    doc = movie_obj.model_dump()
+    doc['updatedAt'] = doc['createdAt']
+    doc['createdAt'] = format_datetime(doc['createdAt'])
+    return doc
+
+async def movies_imported(docs: List[dict]):
+    movies_added(docs)
+    await catalog_events.publish({"type": "movies", "op": "created", "ids": [doc["id"] for doc in docs]})
+
+# Documents per cursor batch when exporting; bounds memory per export
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', '2000'))
+# How far before an export began the `since` it advertises reaches back; covers writes stamped before
+# they commit and clock differences between API servers
+EXPORT_SINCE_MARGIN = timedelta(seconds=int(os.environ.get('EXPORT_SINCE_MARGIN_SECONDS', '60')))
+
+# Bound to a collection at startup
+csv_importer = CsvImporter(
+    None,
+    movie_doc_from_csv_row,
+    on_inserted=movies_imported,
+    batch_size=int(os.environ.get('IMPORT_BATCH_SIZE', '1000')),
+)
+
+@api_router.get("/admin/export/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+    since: Optional[datetime] = Query(None, description="Only movies created or edited after this time"),
+    genre: Optional[str] = None,
+    language: Optional[str] = None,
+    yearFrom: Optional[int] = None,
+    yearTo: Optional[int] = None,
+    authorization: Optional[str] = Header(None)
+):
+    await verify_admin_token(authorization)
+    if collection not in EXPORT_CSV_FIELDS:
+        raise HTTPException(status_code=404, detail="Unknown collection")
+    
+    query = {}
+    sort = None
+    if collection == "movies":
+        if since is not None:
+            query["updatedAt"] = {"$gt": since if since.tzinfo else since.replace(tzinfo=timezone.utc)}
+            # Oldest change first, so an interrupted export can resume from the last updatedAt received
+            sort = [("updatedAt", 1)]
+        if genre:
+            query["genres"] = genre
+        if language:
+            query["language"] = language
+        years = {op: value for op, value in (("$gte", yearFrom), ("$lte", yearTo)) if value is not None}
+        if years:
+            query["releaseYear"] = years
+    elif since is not None or genre or language or yearFrom is not None or yearTo is not None:
+        raise HTTPException(status_code=400, detail="Filters only apply to movies")
+    
+    # Stream so memory stays flat whatever the catalog size. Read from the primary: a secondary could
+    # pass a movie before its latest edit replicates, and the next `since` export would skip it for good.
+    cursor = database.primary[collection].find(query, {"_id": 0}, sort=sort, batch_size=EXPORT_BATCH_SIZE)
+    # updatedAt is stamped before the write commits, so a change stamped just before now may still land
+    # behind the cursor. Resuming a margin earlier re-sends a few movies rather than losing any.
+    next_since = format_datetime(datetime.now(timezone.utc) - EXPORT_SINCE_MARGIN)
+    filename = f"{collection}.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        export_stream(cursor, format, EXPORT_CSV_FIELDS[collection], compress=gzip),
+        media_type="application/gzip" if gzip else ("text/csv" if format == "csv" else "application/x-ndjson"),
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            # Pass as `since` next time to fetch only what changed after this export
+            "X-Export-Since": next_since,
+        },
+    )
+
 @api_router.post("/admin/movies/bulk-import")
 async def bulk_import_movies(
     file: UploadFile = File(...),
+    background: bool = False,
     authorization: Optional[str] = Header(None)
 ):
     await verify_admin_token(authorization)
@@ -312,42 +1306,63 @@ async def bulk_import_movies(
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
-    contents = await file.read()
-    csv_data = io.StringIO(contents.decode('utf-8'))
-    reader = csv.DictReader(csv_data)
+    # The upload is streamed to disk and parsed incrementally in batches
+    job = await csv_importer.create_job(file)
     
-    imported_count = 0
-    errors = []
+    if background:
+        csv_importer.start(job)
+        return JSONResponse(status_code=202, content=job.progress())
     
-    for row in reader:
-        try:
-            movie_data = {
-                "title": row["title"],
-                "synopsis": row["synopsis"],
-                "genres": row["genres"].split("|"),
-                "cast": row["cast"].split("|"),
-                "releaseYear": int(row["releaseYear"]),
-                "runtime": int(row["runtime"]),
-                "posterUrl": row["posterUrl"],
-                "videoUrl": row["videoUrl"],
-                "language": row.get("language", "English"),
-            }
-            
-            movie_obj = Movie(**movie_data)
-            doc = movie_obj.model_dump()
-            doc['createdAt'] = doc['createdAt'].isoformat()
-            
-            await db.movies.insert_one(doc)
-            imported_count += 1
-        except Exception as e:
-            errors.append(f"Row {imported_count + 1}: {str(e)}")
+    await csv_importer.run(job)
+    return {
+        "success": job.status == "completed",
+        "jobId": job.id,
+        "imported": job.inserted,
+        # Same "Row N: ..." strings as before jobs existed; the job's error report also has file line numbers
+        "errors": [f"Row {e['row']}: {e['error']}" for e in job.errors]
+    }
+
+@api_router.get("/admin/import-jobs")
+async def list_import_jobs(authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    return [job.progress() for job in csv_importer.jobs.values()]
+
+@api_router.get("/admin/import-jobs/{job_id}")
+async def get_import_job(job_id: str, authorization: Optional[str] = Header(None)):
+    await verify_admin_token(authorization)
+    
+    job = csv_importer.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    
+    return job.progress()
+
+@api_router.get("/admin/import-jobs/{job_id}/errors")
+async def get_import_job_errors(
+    job_id: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    authorization: Optional[str] = Header(None)
+):
+    await verify_admin_token(authorization)
+    
+    job = csv_importer.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
     
     return {
-        "success": True,
-        "imported": imported_count,
-        "errors": errors
+        "failed": job.failed,
+        "reported": len(job.errors),
+        "errors": job.errors[skip:skip + limit]
     }
 
+@app.exception_handler(ConnectionFailure)
+async def database_unavailable(request: Request, exc: ConnectionFailure):
+    # Pool wait-queue and server-selection timeouts: tell clients to back off rather than returning a bare 500
+    logger.warning("MongoDB unavailable for %s %s: %s", request.method, request.url.path, exc)
+    return JSONResponse({"detail": "Database temporarily unavailable"}, status_code=503, headers={"Retry-After": "1"})
+
 # Include router
 app.include_router(api_router)
 
@@ -359,12 +1374,85 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Added last so it wraps every other middleware and times the whole request
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def connect_database():
+    # Registered first: every other startup hook needs the client
+    await database.connect()
+    movie_loader.collection = database.catalog.movies
+    csv_importer.collection = database.primary.movies
+
+@app.on_event("startup")
+async def start_catalog_events():
+    await join_catalog_events(database.primary)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(database.primary)
+    await rate_limiter.start(database.primary)
+    await trending.start(database.primary)
+
+@app.on_event("startup")
+async def start_migrations():
+    # Pending one-off data migrations (migrations.py); in the background, a large catalog takes a while
+    async def migrate():
+        try:
+            await run_migrations(database.primary)
+        except Exception:
+            logger.exception("Data migrations failed; they are retried at the next start")
+    
+    app.state.migrations_task = asyncio.create_task(migrate())
+
+@app.on_event("startup")
+async def start_view_counter():
+    view_counter.start(database.primary.movies)
+
+@app.on_event("startup")
+async def start_catalog_stats():
+    catalog_stats.start(database.primary)
+
+@app.on_event("startup")
+async def start_poster_store():
+    await poster_store.start()
+
+@app.on_event("startup")
+async def build_search_index():
+    # Built in the background so a large catalog does not delay startup
+    app.state.search_index_task = asyncio.create_task(search_index.build(database.primary.movies))
+    app.state.suggest_task = asyncio.create_task(suggester.build(database.primary.movies))
+    app.state.similar_task = asyncio.create_task(similar_movies.build(database.primary.movies))
+    app.state.trending_task = asyncio.create_task(trending.load())
+    app.state.browse_task = asyncio.create_task(browse_index.build(database.primary.movies))
+
+@app.on_event("startup")
+async def start_home_feed_refresh():
+    # Keep the feed warm so view-count changes show up without any request paying for a rebuild
+    async def refresh():
+        while True:
+            try:
+                feed = render(await build_home_feed())
+                response_cache.set(response_cache.make_key("home"), feed, HOME_FEED_TTL, ["movies", "genres"])
+                catalog_version.feed_refreshed()
+            except Exception:
+                logger.exception("Failed to refresh home feed")
+            await asyncio.sleep(HOME_FEED_REFRESH)
+    
+    app.state.home_feed_task = asyncio.create_task(refresh())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await view_counter.stop()
+    await catalog_stats.stop()
+    await trending.stop()
+    await similar_movies.stop()
+    await catalog_events.stop()
+    await poster_store.stop()
+    database.close()
\ No newline at end of file
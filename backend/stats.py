@@ -0,0 +1,198 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TOP_MOVIE_FIELDS = ("id", "title", "viewCount", "posterUrl")
+
+
+class CatalogStats:
+    """Running catalog totals kept in memory and periodically reconciled against MongoDB."""
+
+    def __init__(self, top_n: int = 10, reconcile_interval: float = 300.0):
+        self.top_n = top_n
+        # Extra candidates absorb deletions of top movies between reconciliations
+        self.capacity = top_n * 2
+        self.reconcile_interval = reconcile_interval
+
+        self.total_movies = 0
+        self.total_genres = 0
+        self.total_views = 0
+        # Bounded min-heap of [viewCount, id] over the candidates, and the candidates by id
+        self._heap: List[list] = []
+        self._top: Dict[str, dict] = {}
+
+        self.ready = False
+        self.updated_at: Optional[datetime] = None
+        self.reconciled_at: Optional[datetime] = None
+        self._db = None
+        self._reconcile_now = asyncio.Event()
+        self._reconcile_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # Changes made while a reconciliation reads, replayed on top of what it read
+        self._replay: Optional[List[tuple]] = None
+        self._lookups: Set[asyncio.Task] = set()
+
+    def start(self, db):
+        self._db = db
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in [self._task, *self._lookups]:
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+        self._lookups.clear()
+
+    async def reconcile(self):
+        async with self._reconcile_lock:
+            db = self._db
+            self._replay = []
+            try:
+                total_movies, total_genres, views, top = await asyncio.gather(
+                    db.movies.count_documents({}),
+                    db.genres.count_documents({}),
+                    db.movies.aggregate([{"$group": {"_id": None, "totalViews": {"$sum": "$viewCount"}}}]).to_list(1),
+                    db.movies.find({}, {"_id": 0, **dict.fromkeys(TOP_MOVIE_FIELDS, 1)})
+                    .sort([("viewCount", -1), ("id", -1)]).limit(self.capacity).to_list(self.capacity),
+                )
+            finally:
+                replay, self._replay = self._replay, None
+            self.total_movies = total_movies
+            self.total_genres = total_genres
+            self.total_views = views[0]["totalViews"] if views else 0
+            self._heap, self._top = [], {}
+            for movie in top:
+                self._offer(movie)
+            # Without the replay a flush landing mid-read would be lost until the next reconciliation;
+            # with it, one whose write the reads already saw is counted twice until then
+            for change, args in replay:
+                change(*args)
+            self.ready = True
+            self.reconciled_at = self.updated_at = datetime.now(timezone.utc)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception:
+                logger.exception("Failed to reconcile catalog stats")
+            self._reconcile_now.clear()
+            try:
+                await asyncio.wait_for(self._reconcile_now.wait(), timeout=self.reconcile_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _record(self, change: Callable, *args):
+        if self._replay is not None:
+            self._replay.append((change, args))
+
+    def _touch(self):
+        self.updated_at = datetime.now(timezone.utc)
+
+    def _offer(self, movie: dict):
+        # Candidates keep the highest count seen: counts only grow, and a lookup may return one a flush has passed
+        movie_id = movie["id"]
+        entry = {field: movie.get(field) for field in TOP_MOVIE_FIELDS}
+        entry["viewCount"] = entry["viewCount"] or 0
+        current = self._top.get(movie_id)
+        if current is not None:
+            entry["viewCount"] = max(entry["viewCount"], current["viewCount"])
+            self._top[movie_id] = entry
+            self._reheap()
+        elif len(self._heap) < self.capacity:
+            self._top[movie_id] = entry
+            heapq.heappush(self._heap, [entry["viewCount"], movie_id])
+        elif [entry["viewCount"], movie_id] > self._heap[0]:
+            _, evicted = heapq.heapreplace(self._heap, [entry["viewCount"], movie_id])
+            del self._top[evicted]
+            self._top[movie_id] = entry
+
+    def _reheap(self):
+        # A few dozen candidates: rebuilding is cheaper than tracking heap positions
+        self._heap = [[movie["viewCount"], movie_id] for movie_id, movie in self._top.items()]
+        heapq.heapify(self._heap)
+
+    def movie_added(self, doc: dict):
+        self._record(self.movie_added, doc)
+        self.total_movies += 1
+        self.total_views += doc.get("viewCount") or 0
+        self._offer(doc)
+        self._touch()
+
+    def movie_updated(self, doc: dict):
+        self._record(self.movie_updated, doc)
+        # The document carries its current viewCount, so an edit can also promote a movie
+        self._offer(doc)
+        self._touch()
+
+    def movie_removed(self, doc: dict):
+        self._record(self.movie_removed, doc)
+        self.total_movies -= 1
+        self.total_views -= doc.get("viewCount") or 0
+        if self._top.pop(doc["id"], None) is not None:
+            self._reheap()
+            if len(self._top) < self.top_n:
+                # Not enough candidates left to know the true top N
+                self._reconcile_now.set()
+        self._touch()
+
+    def genre_added(self):
+        self._record(self.genre_added)
+        self.total_genres += 1
+        self._touch()
+
+    def genre_removed(self):
+        self._record(self.genre_removed)
+        self.total_genres -= 1
+        self._touch()
+
+    def views_flushed(self, counts: Dict[str, int]):
+        self._record(self.views_flushed, counts)
+        self.total_views += sum(counts.values())
+        outside = []
+        for movie_id, count in counts.items():
+            movie = self._top.get(movie_id)
+            if movie is not None:
+                movie["viewCount"] += count
+            else:
+                outside.append(movie_id)
+        if len(outside) < len(counts):
+            self._reheap()
+        if outside and self._db is not None:
+            # Only the flush's deltas are known here; the counts it produced decide whether a movie enters
+            lookup = asyncio.create_task(self._promote(outside))
+            self._lookups.add(lookup)
+            lookup.add_done_callback(self._lookups.discard)
+        self._touch()
+
+    async def _promote(self, movie_ids: List[str]):
+        query = {"id": {"$in": movie_ids}}
+        if len(self._heap) >= self.capacity:
+            # Only movies that would displace the current minimum come back
+            query["viewCount"] = {"$gt": self._heap[0][0]}
+        try:
+            movies = await self._db.movies.find(query, {"_id": 0, **dict.fromkeys(TOP_MOVIE_FIELDS, 1)}).to_list(None)
+        except Exception:
+            logger.exception("Failed to read view counts of flushed movies")
+            return
+        for movie in movies:
+            self._offer(movie)
+
+    def snapshot(self) -> dict:
+        return {
+            "totalMovies": self.total_movies,
+            "totalViews": self.total_views,
+            "totalGenres": self.total_genres,
+            "topMovies": heapq.nlargest(self.top_n, self._top.values(), key=lambda m: (m["viewCount"], m["id"])),
+            "updatedAt": self.updated_at,
+            "reconciledAt": self.reconciled_at,
+        }
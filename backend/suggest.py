@@ -0,0 +1,283 @@
+import bisect
+import heapq
+import logging
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+# Projection used when (re)loading documents into the suggester
+SUGGEST_PROJECTION = {"_id": 0, "id": 1, "title": 1, "cast": 1, "posterUrl": 1, "releaseYear": 1, "viewCount": 1}
+
+MAX_SUGGESTIONS = 20
+
+# Memoized top lists run deeper than a response, so removing a top item rarely forces a rescan
+MEMO_DEPTH = MAX_SUGGESTIONS * 2
+
+# Characters that can follow a prefix once normalized
+KEY_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 "
+
+# A title or name is matched from the start of each of its first few words
+MAX_WORD_STARTS = 6
+
+
+def normalize(text: str) -> str:
+    # Fold case and accents so "Amélie" matches "ame"
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return NON_ALNUM_RE.sub(" ", text).strip()
+
+
+def word_starts(text: str) -> List[str]:
+    words = normalize(text).split()
+    return [" ".join(words[i:]) for i in range(min(len(words), MAX_WORD_STARTS))]
+
+
+class PrefixIndex:
+    """Sorted (key, item) array answering top-k-by-score prefix queries with binary search."""
+
+    def __init__(self, memo_size: int = 50000, max_recent: int = 65536):
+        # Inserts land in a small sorted run that is merged into the main array once it grows,
+        # so bulk imports do not pay an O(n) list shift per key
+        self._entries: List[Tuple[str, str]] = []
+        self._recent: List[Tuple[str, str]] = []
+        self.max_recent = max_recent
+        self._item_keys: Dict[str, List[str]] = {}
+        self.scores: Dict[str, int] = {}
+        self._loading = False
+
+        # Exact top items per prefix, patched in place on adds, removals and score increases.
+        # Prefixes in _complete hold every item under them, not just the best MEMO_DEPTH.
+        self._memo: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._complete: Set[str] = set()
+        self.memo_size = memo_size
+
+    def __len__(self):
+        return len(self._item_keys)
+
+    def __contains__(self, item: str):
+        return item in self._item_keys
+
+    def begin_load(self):
+        self._loading = True
+
+    def end_load(self):
+        self._entries.sort()
+        self._loading = False
+        self._memo.clear()
+        self._complete.clear()
+
+    def set(self, item: str, keys: Iterable[str], score: int):
+        if item in self._item_keys:
+            self.remove(item)
+        keys = list(dict.fromkeys(keys))
+        self._item_keys[item] = keys
+        self.scores[item] = score
+        for key in keys:
+            if self._loading:
+                self._entries.append((key, item))
+            else:
+                bisect.insort(self._recent, (key, item))
+                self._offer(key, item)
+        if len(self._recent) > self.max_recent:
+            self._entries += self._recent
+            self._entries.sort()
+            self._recent = []
+
+    def remove(self, item: str):
+        keys = self._item_keys.pop(item, None)
+        if keys is None:
+            return
+        del self.scores[item]
+        for key in keys:
+            self._discard((key, item))
+            for end in range(1, len(key) + 1):
+                self._drop(key[:end], item)
+
+    def _drop(self, prefix: str, item: str):
+        top = self._memo.get(prefix)
+        if top is None or item not in top:
+            return
+        top.remove(item)
+        if len(top) < MAX_SUGGESTIONS and prefix not in self._complete:
+            # The items below the list are unknown; rescan this prefix on its next lookup
+            del self._memo[prefix]
+
+    def _discard(self, entry: Tuple[str, str]):
+        i = bisect.bisect_left(self._recent, entry)
+        if i < len(self._recent) and self._recent[i] == entry:
+            del self._recent[i]
+        elif self._loading:
+            # Still unsorted; only hit when a movie changes while the index is being built
+            self._entries.remove(entry)
+        else:
+            i = bisect.bisect_left(self._entries, entry)
+            if i < len(self._entries) and self._entries[i] == entry:
+                del self._entries[i]
+
+    def bump(self, item: str, delta: int):
+        if item not in self.scores:
+            return
+        self.scores[item] += delta
+        # Scores only grow here, so patching the memoized top lists keeps them exact
+        for key in self._item_keys[item]:
+            self._offer(key, item)
+
+    def _offer(self, key: str, item: str):
+        if not self._memo:
+            return
+        score = self.scores[item]
+        for end in range(1, len(key) + 1):
+            top = self._memo.get(key[:end])
+            if top is None:
+                continue
+            prefix = key[:end]
+            if item not in top:
+                # A partial list is the exact top of its prefix only while newcomers beat its last item
+                if prefix not in self._complete and (not top or score <= self.scores[top[-1]]):
+                    continue
+                top.append(item)
+            top.sort(key=lambda i: self.scores[i], reverse=True)
+            if len(top) > MEMO_DEPTH:
+                del top[MEMO_DEPTH:]
+                self._complete.discard(prefix)
+
+    def top(self, prefix: str, k: int) -> List[str]:
+        top = self._memo.get(prefix)
+        if top is not None:
+            self._memo.move_to_end(prefix)
+            return top[:k]
+
+        items = set()
+        for entries in (self._entries, self._recent):
+            lo = bisect.bisect_left(entries, (prefix,))
+            hi = bisect.bisect_left(entries, (prefix + "\uffff",), lo)
+            items.update(item for _, item in entries[lo:hi])
+        top = heapq.nlargest(MEMO_DEPTH, items, key=self.scores.__getitem__)
+
+        self._memo[prefix] = top
+        if len(items) <= MEMO_DEPTH:
+            self._complete.add(prefix)
+        else:
+            self._complete.discard(prefix)
+        if len(self._memo) > self.memo_size:
+            evicted, _ = self._memo.popitem(last=False)
+            self._complete.discard(evicted)
+        return top[:k]
+
+    def warm(self, min_range: int = 512):
+        # Memoize every prefix with a large key range, so a cold lookup only ever scans a short one
+        pending = [""]
+        while pending:
+            prefix = pending.pop()
+            lo = bisect.bisect_left(self._entries, (prefix,))
+            hi = bisect.bisect_left(self._entries, (prefix + "\uffff",), lo)
+            if hi - lo <= min_range:
+                continue
+            if prefix:
+                self.top(prefix, MAX_SUGGESTIONS)
+            pending.extend(prefix + ch for ch in KEY_ALPHABET)
+
+    def stats(self) -> dict:
+        return {
+            "items": len(self._item_keys),
+            "keys": len(self._entries) + len(self._recent),
+            "memoizedPrefixes": len(self._memo),
+        }
+
+
+class Suggester:
+    """Typeahead over movie titles and cast names, ranked by view count."""
+
+    def __init__(self):
+        self.ready = False
+        self.titles = PrefixIndex()
+        self.cast = PrefixIndex()
+
+        self._movies: Dict[str, dict] = {}
+        # Movies per cast member and the names credited on each movie; a name's score is its movies' views
+        self._cast_movies: Dict[str, int] = {}
+        self._movie_cast: Dict[str, List[str]] = {}
+
+    async def build(self, collection, batch_size: int = 1000):
+        self.titles.begin_load()
+        self.cast.begin_load()
+        count = 0
+        try:
+            async for doc in collection.find({}, SUGGEST_PROJECTION).batch_size(batch_size):
+                self.add(doc)
+                count += 1
+        finally:
+            self.titles.end_load()
+            self.cast.end_load()
+        self.titles.warm()
+        self.cast.warm()
+        self.ready = True
+        logger.info("Suggestion index built with %d movies and %d cast members", count, len(self.cast))
+
+    def add(self, doc: dict):
+        movie_id = doc["id"]
+        if movie_id in self._movies:
+            self.remove(movie_id)
+
+        views = doc.get("viewCount") or 0
+        self._movies[movie_id] = {
+            "id": movie_id,
+            "title": doc["title"],
+            "posterUrl": doc.get("posterUrl"),
+            "releaseYear": doc.get("releaseYear"),
+        }
+        self.titles.set(movie_id, word_starts(doc["title"]), views)
+
+        names = list(dict.fromkeys(name.strip() for name in doc.get("cast") or () if name.strip()))
+        self._movie_cast[movie_id] = names
+        for name in names:
+            if name in self.cast:
+                self._cast_movies[name] += 1
+                self.cast.bump(name, views)
+            else:
+                self._cast_movies[name] = 1
+                self.cast.set(name, word_starts(name), views)
+
+    def add_many(self, docs: Iterable[dict]):
+        for doc in docs:
+            self.add(doc)
+
+    def remove(self, movie_id: str):
+        if self._movies.pop(movie_id, None) is None:
+            return
+        views = self.titles.scores.get(movie_id, 0)
+        self.titles.remove(movie_id)
+        for name in self._movie_cast.pop(movie_id, ()):
+            self._cast_movies[name] -= 1
+            if not self._cast_movies[name]:
+                del self._cast_movies[name]
+                self.cast.remove(name)
+            else:
+                # Re-set rather than bump: a lower score can change memoized rankings
+                self.cast.set(name, word_starts(name), self.cast.scores[name] - views)
+
+    def views_flushed(self, counts: Dict[str, int]):
+        for movie_id, count in counts.items():
+            self.titles.bump(movie_id, count)
+            for name in self._movie_cast.get(movie_id, ()):
+                self.cast.bump(name, count)
+
+    def suggest(self, q: str, limit: int = 8) -> dict:
+        prefix = normalize(q)
+        if not prefix:
+            return {"movies": [], "cast": []}
+        return {
+            "movies": [
+                {**self._movies[movie_id], "viewCount": self.titles.scores[movie_id]}
+                for movie_id in self.titles.top(prefix, limit)
+            ],
+            "cast": [{"name": name, "viewCount": self.cast.scores[name]} for name in self.cast.top(prefix, limit)],
+        }
+
+    def stats(self) -> dict:
+        return {"ready": self.ready, "titles": self.titles.stats(), "cast": self.cast.stats()}
@@ -0,0 +1,195 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Set, Tuple
+
+from pymongo import ASCENDING, IndexModel, UpdateOne
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Window name -> seconds. Each window is a decayed score with a half-life of half the window,
+# so a play one window ago counts a quarter of a play now.
+WINDOWS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+# Scores are kept relative to a reference time and rebased before 2 ** exponent can overflow
+MAX_EXPONENT = 64
+
+# Decayed scores below this are dropped when rebasing, unless the movie is in the top list
+MIN_SCORE = 0.01
+
+
+def _hour(at: float) -> datetime:
+    return datetime.fromtimestamp(at - at % 3600, timezone.utc)
+
+
+class DecayedTopK:
+    """Exponentially decayed play scores for one window, with the top k kept up to date as plays arrive."""
+
+    def __init__(self, half_life: float, k: int, now: float):
+        self.half_life = half_life
+        self.k = k
+        # Scores in units of plays at _t0; decay scales every movie alike, so rankings only move on new plays
+        self._t0 = now
+        self._scores: Dict[str, float] = {}
+        self._top: Set[str] = set()
+        # Lower bound on the weakest top score: top scores only grow, so it never overstates
+        self._floor = 0.0
+
+    def __len__(self):
+        return len(self._scores)
+
+    def add(self, movie_id: str, count: int, at: float):
+        if (at - self._t0) / self.half_life > MAX_EXPONENT:
+            self._rebase(at)
+        score = self._scores.get(movie_id, 0.0) + count * 2 ** ((at - self._t0) / self.half_life)
+        self._scores[movie_id] = score
+        if movie_id in self._top:
+            return
+        if len(self._top) < self.k:
+            self._top.add(movie_id)
+            return
+        # Scores only grow, so a movie can only enter the top k on one of its own plays
+        if score <= self._floor:
+            return
+        weakest = min(self._top, key=self._scores.__getitem__)
+        if score > self._scores[weakest]:
+            self._top.remove(weakest)
+            self._top.add(movie_id)
+            weakest = min(self._top, key=self._scores.__getitem__)
+        self._floor = self._scores[weakest]
+
+    def remove(self, movie_id: str):
+        if self._scores.pop(movie_id, None) is None:
+            return
+        if movie_id in self._top:
+            self._top.remove(movie_id)
+            # Rare (deleted movies): refill the freed slot from everything else
+            rest = [other for other in self._scores if other not in self._top]
+            if rest:
+                self._top.add(max(rest, key=self._scores.__getitem__))
+            self._floor = 0.0
+
+    def _rebase(self, now: float):
+        scale = 2 ** ((self._t0 - now) / self.half_life)
+        self._t0 = now
+        self._floor *= scale
+        self._scores = {
+            movie_id: score * scale
+            for movie_id, score in self._scores.items()
+            if score * scale >= MIN_SCORE or movie_id in self._top
+        }
+
+    def scores(self, now: float) -> Dict[str, float]:
+        scale = 2 ** ((self._t0 - now) / self.half_life)
+        return {movie_id: score * scale for movie_id, score in self._scores.items()}
+
+    def top(self, limit: int, now: float) -> List[Tuple[str, float]]:
+        scale = 2 ** ((self._t0 - now) / self.half_life)
+        ranked = sorted(self._top, key=lambda movie_id: (-self._scores[movie_id], movie_id))[:limit]
+        return [(movie_id, self._scores[movie_id] * scale) for movie_id in ranked]
+
+
+class Trending:
+    """Plays bucketed per movie and hour in MongoDB, ranked in memory by decayed plays over sliding windows."""
+
+    def __init__(self, k: int = 100, retention_days: int = 8, collection_name: str = "view_buckets"):
+        self.k = k
+        self.retention_days = retention_days
+        self.collection_name = collection_name
+        self.ready = False
+
+        self._collection = None
+        self._windows = self._empty_windows(time.time())
+        self._writing: Set[asyncio.Task] = set()
+
+        self.plays = 0
+        self.bucket_writes = 0
+        self.failed_bucket_writes = 0
+        self.lost = 0
+
+    def _empty_windows(self, now: float) -> Dict[str, DecayedTopK]:
+        return {name: DecayedTopK(seconds / 2, self.k, now) for name, seconds in WINDOWS.items()}
+
+    async def start(self, db):
+        self._collection = db[self.collection_name]
+        await self._collection.create_indexes([
+            IndexModel([("movieId", ASCENDING), ("hour", ASCENDING)], unique=True),
+            # Buckets older than the longest window no longer matter to any score
+            IndexModel([("hour", ASCENDING)], expireAfterSeconds=self.retention_days * 86400),
+        ])
+
+    async def load(self, batch_size: int = 5000):
+        # Replay the stored buckets; each counts as played in the middle of its hour
+        now = time.time()
+        since = datetime.fromtimestamp(now - self.retention_days * 86400, timezone.utc)
+        windows = self._empty_windows(now)
+        buckets = 0
+        async for bucket in self._collection.find({"hour": {"$gte": since}}, {"_id": 0}).batch_size(batch_size):
+            hour = bucket["hour"]
+            if hour.tzinfo is None:
+                hour = hour.replace(tzinfo=timezone.utc)
+            at = min(hour.timestamp() + 1800, now)
+            for window in windows.values():
+                window.add(bucket["movieId"], bucket["count"], at)
+            buckets += 1
+
+        # Plays flushed while the scan ran may be counted twice; they are a few seconds' worth
+        for name, window in self._windows.items():
+            for movie_id, score in window.scores(now).items():
+                windows[name].add(movie_id, score, now)
+        self._windows = windows
+        self.ready = True
+        logger.info("Trending scores loaded from %d hourly buckets", buckets)
+
+    async def stop(self):
+        if self._writing:
+            await asyncio.gather(*self._writing, return_exceptions=True)
+
+    def views_flushed(self, counts: Dict[str, int]):
+        # Every worker's flushes, so each worker ranks the same plays
+        now = time.time()
+        for window in self._windows.values():
+            for movie_id, count in counts.items():
+                window.add(movie_id, count, now)
+        self.plays += sum(counts.values())
+
+    def record(self, counts: Dict[str, int]):
+        # This worker's flushes only: the worker that wrote the views also writes their buckets
+        if self._collection is None:
+            return
+        task = asyncio.get_running_loop().create_task(self._write(counts, _hour(time.time())))
+        self._writing.add(task)
+        task.add_done_callback(self._writing.discard)
+
+    async def _write(self, counts: Dict[str, int], hour: datetime):
+        ops = [
+            UpdateOne({"movieId": movie_id, "hour": hour}, {"$inc": {"count": count}}, upsert=True)
+            for movie_id, count in counts.items()
+        ]
+        try:
+            await self._collection.bulk_write(ops, ordered=False)
+            self.bucket_writes += 1
+        except PyMongoError as e:
+            # In-memory scores already include these plays; only a restart would forget them
+            self.failed_bucket_writes += 1
+            self.lost += sum(counts.values())
+            logger.error("Failed to write play buckets: %s", e)
+
+    def remove(self, movie_id: str):
+        for window in self._windows.values():
+            window.remove(movie_id)
+
+    def top(self, window: str, limit: int) -> List[Tuple[str, float]]:
+        return self._windows[window].top(limit, time.time())
+
+    def stats(self) -> dict:
+        return {
+            "ready": self.ready,
+            "plays": self.plays,
+            "movies": {name: len(window) for name, window in self._windows.items()},
+            "bucketWrites": self.bucket_writes,
+            "failedBucketWrites": self.failed_bucket_writes,
+            "lost": self.lost,
+        }
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Coalesces view increments per movie id and writes them behind in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        flush_threshold: int = 1000,
+        max_pending: int = 50000,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_pending = max_pending
+
+        self._collection = None
+        self._pending: Dict[str, int] = {}
+        self._pending_total = 0
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Tuple[Callable[[Dict[str, int]], None], bool]] = []
+
+        self.flushed = 0
+        self.lost = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.backpressure_waits = 0
+
+    def add_listener(self, listener: Callable[[Dict[str, int]], None], local_only: bool = False):
+        # Called with {movie_id: count} for every batch that reached the database; unless local_only,
+        # also for batches flushed by other workers (see apply_remote)
+        self._listeners.append((listener, local_only))
+
+    def apply_remote(self, counts: Dict[str, int]):
+        # Another worker flushed these counts; keep this worker's in-memory views of them current
+        self._notify(counts, remote=True)
+
+    def start(self, collection):
+        self._collection = collection
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            # Not cancelled: a cancel landing in bulk_write would drop the swapped-out batch uncounted.
+            # The loop finishes any flush in progress and exits.
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # Graceful flush; anything that still cannot be written is counted as lost
+        await self.flush()
+        if self._pending_total:
+            logger.warning("Dropping %d unflushed view increments on shutdown", self._pending_total)
+            self.lost += self._pending_total
+            self._pending.clear()
+            self._pending_total = 0
+
+    async def add(self, movie_id: str, count: int = 1) -> bool:
+        # Backpressure: when the buffer is full, callers wait for a flush to drain it
+        if self._pending_total + count > self.max_pending:
+            self.backpressure_waits += 1
+            await self.flush()
+            if self._pending_total + count > self.max_pending:
+                self.lost += count
+                return False
+
+        self._pending[movie_id] = self._pending.get(movie_id, 0) + count
+        self._pending_total += count
+        if self._pending_total >= self.flush_threshold:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._pending or self._collection is None:
+                return 0
+
+            batch, self._pending = self._pending, {}
+            batch_total = self._pending_total
+            self._pending_total = 0
+
+            movie_ids = list(batch)
+            ops = [UpdateOne({"id": movie_id}, {"$inc": {"viewCount": batch[movie_id]}}) for movie_id in movie_ids]
+            try:
+                await self._collection.bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # Unordered: every op except the reported ones was applied
+                failed_ids = {movie_ids[err["index"]] for err in e.details.get("writeErrors", [])}
+                failed = sum(batch[movie_id] for movie_id in failed_ids)
+                self.failed_flushes += 1
+                self.lost += failed
+                self.flushed += batch_total - failed
+                logger.error("View count flush partially failed: %d increments lost", failed)
+                self._notify({k: v for k, v in batch.items() if k not in failed_ids})
+                return batch_total - failed
+            except PyMongoError as e:
+                self.failed_flushes += 1
+                self._requeue(batch, batch_total)
+                logger.error("View count flush failed: %s", e)
+                return 0
+
+            self.flushes += 1
+            self.flushed += batch_total
+            self._notify(batch)
+            return batch_total
+
+    def _notify(self, counts: Dict[str, int], remote: bool = False):
+        for listener, local_only in self._listeners:
+            if remote and local_only:
+                continue
+            try:
+                listener(counts)
+            except Exception:
+                logger.exception("View counter listener failed")
+
+    def _requeue(self, batch: Dict[str, int], batch_total: int):
+        if self._pending_total + batch_total > self.max_pending:
+            self.lost += batch_total
+            return
+        for movie_id, count in batch.items():
+            self._pending[movie_id] = self._pending.get(movie_id, 0) + count
+        self._pending_total += batch_total
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Unexpected error while flushing view counts")
+
+    def stats(self) -> dict:
+        return {
+            "pending": self._pending_total,
+            "pendingMovies": len(self._pending),
+            "flushed": self.flushed,
+            "lost": self.lost,
+            "flushes": self.flushes,
+            "failedFlushes": self.failed_flushes,
+            "backpressureWaits": self.backpressure_waits,
+            "flushInterval": self.flush_interval,
+            "flushThreshold": self.flush_threshold,
+            "maxPending": self.max_pending,
+        }
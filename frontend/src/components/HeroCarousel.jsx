@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Button } from '@/components/ui/button';
 import { Play, Info, ChevronLeft, ChevronRight } from 'lucide-react';
+import { posterSrc } from '@/lib/posters';
 
 export default function HeroCarousel({ movies }) {
   const navigate = useNavigate();
@@ -34,7 +35,7 @@ export default function HeroCarousel({ movies }) {
       {/* Background Image with Gradient Overlay */}
       <div
         className="absolute inset-0 bg-cover bg-center transition-all duration-1000 ease-in-out"
-        style={{ backgroundImage: `url(${currentMovie.posterUrl})` }}
+        style={{ backgroundImage: `url(${posterSrc(currentMovie, 'hero')})` }}
       >
         <div className="absolute inset-0 bg-gradient-to-t from-black via-black/50 to-transparent" />
         <div className="absolute inset-0 bg-gradient-to-r from-black via-transparent to-transparent" />
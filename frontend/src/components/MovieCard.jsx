@@ -1,6 +1,7 @@
 import { useNavigate } from 'react-router-dom';
 import { Play, Plus } from 'lucide-react';
 import { useState } from 'react';
+import { posterSrc } from '@/lib/posters';
 
 export default function MovieCard({ movie }) {
   const navigate = useNavigate();
@@ -15,11 +16,15 @@ export default function MovieCard({ movie }) {
       data-testid={`movie-card-${movie.id}`}
     >
       <div className="relative overflow-hidden rounded-lg">
-        <img
-          src={movie.posterUrl}
-          alt={movie.title}
-          className="w-full h-72 object-cover transition-transform duration-300 group-hover:scale-110"
-        />
+        <picture>
+          {movie.posters?.card && <source type="image/webp" srcSet={posterSrc(movie, 'card')} />}
+          <img
+            src={posterSrc(movie, 'card', 'jpg')}
+            alt={movie.title}
+            loading="lazy"
+            className="w-full h-72 object-cover transition-transform duration-300 group-hover:scale-110"
+          />
+        </picture>
 
         {/* Overlay on hover */}
         {isHovered && (
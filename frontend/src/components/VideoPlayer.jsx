@@ -1,5 +1,6 @@
 import { useEffect, useRef, useState } from 'react';
 import { X, Volume2, VolumeX } from 'lucide-react';
+import { apiUrl } from '@/lib/api';
 
 export default function VideoPlayer({ movie, onClose }) {
   const videoRef = useRef(null);
@@ -78,7 +79,7 @@ export default function VideoPlayer({ movie, onClose }) {
         className="w-full h-full"
         controls
         autoPlay
-        src={movie.videoUrl}
+        src={apiUrl(movie.videoUrl)}
         data-testid="video-element"
       >
         {movie.subtitles.map((subtitle, idx) => (
@@ -0,0 +1,6 @@
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Media the API serves itself (posters, videos) is referenced by path; other URLs pass through
+export function apiUrl(url) {
+  return url && url.startsWith('/api/') ? `${BACKEND_URL}${url}` : url;
+}
@@ -0,0 +1,8 @@
+import { apiUrl } from '@/lib/api';
+
+// URL of a resized poster rendered by the API ("thumbnail", "card" or "hero"),
+// falling back to the original posterUrl for movies without derivatives
+export function posterSrc(movie, size, format = 'webp') {
+  const image = movie.posters?.[size];
+  return apiUrl(image ? image[format] : movie.posterUrl);
+}
@@ -9,10 +9,8 @@ import { Loader2 } from 'lucide-react';
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 export default function Home() {
-  const [movies, setMovies] = useState([]);
-  const [genres, setGenres] = useState([]);
+  const [feed, setFeed] = useState({ hero: [], trending: [], rows: [], recent: [] });
   const [loading, setLoading] = useState(true);
-  const [featuredMovies, setFeaturedMovies] = useState([]);
 
   useEffect(() => {
     loadData();
@@ -20,20 +18,9 @@ export default function Home() {
 
   const loadData = async () => {
     try {
-      const [moviesRes, genresRes] = await Promise.all([
-        axios.get(`${API}/movies?limit=30`),
-        axios.get(`${API}/genres`)
-      ]);
-
-      setMovies(moviesRes.data);
-      setGenres(genresRes.data);
-      
-      // Select top 5 movies for hero carousel
-      const featured = moviesRes.data
-        .sort((a, b) => b.viewCount - a.viewCount)
-        .slice(0, 5);
-      setFeaturedMovies(featured);
-      
+      // Hero, trending, genre rows and recently added come precomputed in one response
+      const response = await axios.get(`${API}/home`);
+      setFeed(response.data);
       setLoading(false);
     } catch (error) {
       console.error('Error loading data:', error);
@@ -41,10 +28,6 @@ export default function Home() {
     }
   };
 
-  const getMoviesByGenre = (genreName) => {
-    return movies.filter(movie => movie.genres.includes(genreName));
-  };
-
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center bg-black">
@@ -57,33 +40,28 @@ export default function Home() {
     <div className="min-h-screen bg-black" data-testid="home-page">
       <Navbar />
       
-      <HeroCarousel movies={featuredMovies} />
+      <HeroCarousel movies={feed.hero} />
 
       <div className="pb-16">
         {/* Trending Now */}
         <MovieRow 
           title="Trending Now" 
-          movies={movies.sort((a, b) => b.viewCount - a.viewCount).slice(0, 10)}
+          movies={feed.trending}
         />
 
         {/* Genre rows */}
-        {genres.slice(0, 6).map((genre) => {
-          const genreMovies = getMoviesByGenre(genre.name);
-          if (genreMovies.length === 0) return null;
-          
-          return (
-            <MovieRow 
-              key={genre.id}
-              title={genre.name}
-              movies={genreMovies}
-            />
-          );
-        })}
+        {feed.rows.map((row) => (
+          <MovieRow 
+            key={row.genre.id}
+            title={row.genre.name}
+            movies={row.movies}
+          />
+        ))}
 
         {/* Recently Added */}
         <MovieRow 
           title="Recently Added" 
-          movies={movies.sort((a, b) => new Date(b.createdAt) - new Date(a.createdAt)).slice(0, 10)}
+          movies={feed.recent}
         />
       </div>
 
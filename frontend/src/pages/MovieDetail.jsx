@@ -4,6 +4,7 @@ import axios from 'axios';
 import Navbar from '@/components/Navbar';
 import VideoPlayer from '@/components/VideoPlayer';
 import Footer from '@/components/Footer';
+import MovieRow from '@/components/MovieRow';
 import { Button } from '@/components/ui/button';
 import { Play, Plus, ThumbsUp, Loader2, Check } from 'lucide-react';
 import { toast } from 'sonner';
@@ -17,9 +18,11 @@ export default function MovieDetail() {
   const [loading, setLoading] = useState(true);
   const [playing, setPlaying] = useState(false);
   const [inWatchlist, setInWatchlist] = useState(false);
+  const [similar, setSimilar] = useState([]);
 
   useEffect(() => {
     loadMovie();
+    loadSimilar();
     checkWatchlist();
   }, [id]);
 
@@ -35,6 +38,16 @@ export default function MovieDetail() {
     }
   };
 
+  const loadSimilar = async () => {
+    try {
+      const response = await axios.get(`${API}/movies/${id}/similar`);
+      setSimilar(response.data);
+    } catch (error) {
+      // Recommendations are optional; the page works without them
+      setSimilar([]);
+    }
+  };
+
   const checkWatchlist = () => {
     const watchlist = JSON.parse(localStorage.getItem('watchlist') || '[]');
     setInWatchlist(watchlist.includes(id));
@@ -219,6 +232,12 @@ export default function MovieDetail() {
         </div>
       </div>
 
+      {similar.length > 0 && (
+        <div className="pb-16">
+          <MovieRow title="More Like This" movies={similar} />
+        </div>
+      )}
+
       <Footer />
     </div>
   );
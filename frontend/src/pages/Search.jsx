@@ -1,5 +1,5 @@
-import { useEffect, useState } from 'react';
-import { useSearchParams } from 'react-router-dom';
+import { useEffect, useRef, useState } from 'react';
+import { useNavigate, useSearchParams } from 'react-router-dom';
 import axios from 'axios';
 import Navbar from '@/components/Navbar';
 import MovieCard from '@/components/MovieCard';
@@ -18,6 +18,10 @@ export default function Search() {
   const [query, setQuery] = useState(searchParams.get('q') || '');
   const [selectedGenre, setSelectedGenre] = useState(searchParams.get('genre') || '');
   const [selectedYear, setSelectedYear] = useState(searchParams.get('year') || '');
+  const [suggestions, setSuggestions] = useState(null);
+  const [showSuggestions, setShowSuggestions] = useState(false);
+  const suggestRequest = useRef(null);
+  const navigate = useNavigate();
 
   useEffect(() => {
     loadGenres();
@@ -29,6 +33,30 @@ export default function Search() {
     }
   }, [searchParams]);
 
+  // Typeahead: debounced, and a newer keystroke cancels the previous request
+  useEffect(() => {
+    const q = query.trim();
+    if (!q) {
+      setSuggestions(null);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      suggestRequest.current?.abort();
+      const controller = new AbortController();
+      suggestRequest.current = controller;
+      try {
+        const response = await axios.get(`${API}/movies/suggest`, {
+          params: { q, limit: 6 },
+          signal: controller.signal,
+        });
+        setSuggestions(response.data);
+      } catch (error) {
+        if (!axios.isCancel(error)) setSuggestions(null);
+      }
+    }, 120);
+    return () => clearTimeout(timer);
+  }, [query]);
+
   const loadGenres = async () => {
     try {
       const response = await axios.get(`${API}/genres`);
@@ -45,6 +73,7 @@ export default function Search() {
       params.append('q', query);
       if (selectedGenre) params.append('genre', selectedGenre);
       if (selectedYear) params.append('year', selectedYear);
+      params.append('fields', 'card');
 
       const response = await axios.get(`${API}/movies/search/query?${params.toString()}`);
       setMovies(response.data);
@@ -58,6 +87,7 @@ export default function Search() {
   const handleSearch = (e) => {
     e.preventDefault();
     if (!query.trim()) return;
+    setShowSuggestions(false);
     
     const params = new URLSearchParams();
     params.append('q', query);
@@ -67,6 +97,16 @@ export default function Search() {
     setSearchParams(params);
   };
 
+  const searchFor = (text) => {
+    setQuery(text);
+    setShowSuggestions(false);
+    const params = new URLSearchParams();
+    params.append('q', text);
+    if (selectedGenre) params.append('genre', selectedGenre);
+    if (selectedYear) params.append('year', selectedYear);
+    setSearchParams(params);
+  };
+
   const handleGenreChange = (value) => {
     const genre = value === 'all' ? '' : value;
     setSelectedGenre(genre);
@@ -75,6 +115,7 @@ export default function Search() {
       params.append('q', query);
       if (genre) params.append('genre', genre);
       if (selectedYear) params.append('year', selectedYear);
+      params.append('fields', 'card');
       setSearchParams(params);
     }
   };
@@ -91,14 +132,50 @@ export default function Search() {
         {/* Search form */}
         <form onSubmit={handleSearch} className="mb-8">
           <div className="flex flex-col md:flex-row gap-4">
-            <Input
-              type="text"
-              placeholder="Search for movies..."
-              value={query}
-              onChange={(e) => setQuery(e.target.value)}
-              className="flex-1 h-12 bg-gray-900 border-gray-700 text-white placeholder:text-gray-500"
-              data-testid="search-input"
-            />
+            <div className="relative flex-1">
+              <Input
+                type="text"
+                placeholder="Search for movies..."
+                value={query}
+                onChange={(e) => {
+                  setQuery(e.target.value);
+                  setShowSuggestions(true);
+                }}
+                onBlur={() => setShowSuggestions(false)}
+                className="h-12 bg-gray-900 border-gray-700 text-white placeholder:text-gray-500"
+                data-testid="search-input"
+              />
+
+              {showSuggestions && suggestions && (suggestions.movies.length > 0 || suggestions.cast.length > 0) && (
+                <div className="absolute z-20 mt-1 w-full bg-gray-900 border border-gray-700 rounded-md shadow-lg overflow-hidden" data-testid="search-suggestions">
+                  {suggestions.movies.map((movie) => (
+                    <button
+                      key={movie.id}
+                      type="button"
+                      onMouseDown={() => navigate(`/movie/${movie.id}`)}
+                      className="flex items-center gap-3 w-full px-3 py-2 text-left hover:bg-gray-800"
+                      data-testid={`suggestion-movie-${movie.id}`}
+                    >
+                      <img src={movie.posterUrl} alt={movie.title} className="w-8 h-12 object-cover rounded" />
+                      <span className="text-white">{movie.title}</span>
+                      <span className="text-gray-500 text-sm ml-auto">{movie.releaseYear}</span>
+                    </button>
+                  ))}
+                  {suggestions.cast.map((person) => (
+                    <button
+                      key={person.name}
+                      type="button"
+                      onMouseDown={() => searchFor(person.name)}
+                      className="flex items-center w-full px-3 py-2 text-left text-gray-300 hover:bg-gray-800"
+                      data-testid="suggestion-cast"
+                    >
+                      {person.name}
+                      <span className="text-gray-500 text-sm ml-auto">Cast</span>
+                    </button>
+                  ))}
+                </div>
+              )}
+            </div>
             
             <Select value={selectedGenre || "all"} onValueChange={handleGenreChange}>
               <SelectTrigger className="w-full md:w-48 h-12 bg-gray-900 border-gray-700 text-white" data-testid="genre-filter">
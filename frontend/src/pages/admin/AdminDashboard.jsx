@@ -35,6 +35,11 @@ export default function AdminDashboard() {
       <div>
         <h1 className="text-4xl font-bold text-white mb-2">Dashboard</h1>
         <p className="text-gray-400">Overview of your streaming platform</p>
+        {stats.updatedAt && (
+          <p className="text-gray-500 text-sm mt-1" data-testid="stats-updated-at">
+            Updated {new Date(stats.updatedAt).toLocaleString()}
+          </p>
+        )}
       </div>
 
       {/* Stats Grid */}
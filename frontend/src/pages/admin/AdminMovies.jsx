@@ -12,6 +12,7 @@ const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 export default function AdminMovies() {
   const [movies, setMovies] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [genres, setGenres] = useState([]);
   const [dialogOpen, setDialogOpen] = useState(false);
   const [editingMovie, setEditingMovie] = useState(null);
@@ -33,10 +34,13 @@ export default function AdminMovies() {
     loadGenres();
   }, []);
 
-  const loadMovies = async () => {
+  const loadMovies = async (cursor = null) => {
     try {
-      const response = await axios.get(`${API}/movies?limit=100`);
-      setMovies(response.data);
+      const params = new URLSearchParams({ limit: '100' });
+      if (cursor) params.append('cursor', cursor);
+      const response = await axios.get(`${API}/movies/page?${params.toString()}`);
+      setMovies(cursor ? [...movies, ...response.data.items] : response.data.items);
+      setNextCursor(response.data.next_cursor);
     } catch (error) {
       toast.error('Failed to load movies');
     }
@@ -340,6 +344,18 @@ export default function AdminMovies() {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="p-4 border-t border-gray-700 text-center">
+            <Button
+              variant="outline"
+              onClick={() => loadMovies(nextCursor)}
+              className="border-gray-700"
+              data-testid="load-more-movies"
+            >
+              Load more
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
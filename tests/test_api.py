@@ -0,0 +1,401 @@
+import asyncio
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+# Scratch directories for the poster and media stores, set before server reads its environment
+SCRATCH = tempfile.mkdtemp(prefix="moviestream-test-")
+os.environ.setdefault("POSTER_DIR", os.path.join(SCRATCH, "posters"))
+os.environ.setdefault("MEDIA_DIR", os.path.join(SCRATCH, "videos"))
+# Every test plays from the same client address
+os.environ.setdefault("RATE_LIMIT_VIEWS_BURST", "1000")
+
+import server  # noqa: E402
+from conditional import CatalogVersion  # noqa: E402
+from events import CatalogEvents  # noqa: E402
+from tests.test_events import EventsDatabase, Worker, eventually  # noqa: E402
+
+ADMIN = {"Authorization": f"Bearer {server.ADMIN_TOKEN}"}
+
+
+def movie(title, **fields):
+    doc = {
+        "title": title,
+        "synopsis": f"The story of {title}",
+        "genres": ["Drama"],
+        "cast": ["Someone"],
+        "releaseYear": 2001,
+        "runtime": 100,
+        "posterUrl": "poster.jpg",
+        "videoUrl": "video.mp4",
+    }
+    doc.update(fields)
+    return doc
+
+
+@pytest.fixture(scope="module")
+def api():
+    """Runs a coroutine function against the app, started once on mongomock for the whole module.
+
+    The server's singletons hold asyncio primitives, so every test shares one event loop.
+    """
+    loop = asyncio.new_event_loop()
+    server.database.client = AsyncMongoMockClient()
+    lifespan = server.app.router.lifespan_context(server.app)
+    loop.run_until_complete(lifespan.__aenter__())
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+    async def ready():
+        while not (server.search_index.ready and server.browse_index.ready and server.suggester.ready):
+            await asyncio.sleep(0.01)
+
+    loop.run_until_complete(ready())
+    yield lambda test: loop.run_until_complete(test(client))
+    loop.run_until_complete(client.aclose())
+    loop.run_until_complete(lifespan.__aexit__(None, None, None))
+    loop.close()
+
+
+def test_increment_view(api):
+    async def test(client):
+        movie_id = (await client.post("/api/admin/movies", json=movie("Counted"), headers=ADMIN)).json()["id"]
+        assert (await client.post(f"/api/movies/{movie_id}/increment-view")).status_code == 200
+        assert (await client.post("/api/movies/no-such-movie/increment-view")).status_code == 404
+        await server.view_counter.flush()
+        assert (await client.get(f"/api/movies/{movie_id}")).json()["viewCount"] == 1
+
+        await client.delete(f"/api/admin/movies/{movie_id}", headers=ADMIN)
+        assert (await client.post(f"/api/movies/{movie_id}/increment-view")).status_code == 404
+
+    api(test)
+
+
+def test_keyset_pages_cover_the_catalog_once(api):
+    async def test(client):
+        for i in range(7):
+            await client.post("/api/admin/movies", json=movie(f"Paged {i}", genres=["Paged"]), headers=ADMIN)
+        seen, cursor = [], None
+        while True:
+            params = {"genre": "Paged", "limit": 3, **({"cursor": cursor} if cursor else {})}
+            page = (await client.get("/api/movies/page", params=params)).json()
+            seen += [item["id"] for item in page["items"]]
+            cursor = page["next_cursor"]
+            if not cursor:
+                break
+        assert len(seen) == len(set(seen)) == 7
+
+        forged = "WyJuZXdlc3QiLHsiJHJlZ2V4IjoiLioifSwieCJd"  # ["newest",{"$regex":".*"},"x"]
+        response = await client.get("/api/movies/page", params={"cursor": forged})
+        assert response.status_code == 400
+
+    api(test)
+
+
+def test_bulk_import_reports_rows(api):
+    async def test(client):
+        header = "title,synopsis,genres,cast,releaseYear,runtime,posterUrl,videoUrl\n"
+        rows = "Imported,Story,Drama,Someone,2001,90,p,v\nBroken,Story,Drama,Someone,soon,90,p,v\n"
+        response = await client.post(
+            "/api/admin/movies/bulk-import", files={"file": ("movies.csv", header + rows, "text/csv")}, headers=ADMIN,
+        )
+        body = response.json()
+        assert body["imported"] == 1
+        assert len(body["errors"]) == 1 and body["errors"][0].startswith("Row 2: ")
+
+    api(test)
+
+
+def test_home_feed(api):
+    async def test(client):
+        await client.post("/api/admin/genres", json={"name": "Western", "slug": "western"}, headers=ADMIN)
+        ids = [
+            (await client.post("/api/admin/movies", json=movie(f"Western {i}", genres=["Western"]), headers=ADMIN)).json()["id"]
+            for i in range(3)
+        ]
+        for _ in range(3):
+            await client.post(f"/api/movies/{ids[1]}/increment-view")
+        await server.view_counter.flush()
+
+        feed = (await client.get("/api/home")).json()
+        assert set(feed) == {"hero", "trending", "rows", "recent", "generatedAt"}
+        western = next(row for row in feed["rows"] if row["genre"]["name"] == "Western")
+        # Each genre row is ordered by views; cards carry only what the cards render
+        assert western["movies"][0]["id"] == ids[1]
+        assert "synopsis" not in western["movies"][0] and "cast" not in western["movies"][0]
+        assert feed["trending"][0]["id"] == ids[1]
+        assert len(feed["hero"]) <= 5
+
+    api(test)
+
+
+def test_fast_and_validated_paths_render_legacy_dates_alike(monkeypatch):
+    legacy = {**movie("Legacy"), "id": "legacy", "viewCount": 3, "createdAt": "2024-01-15T10:30:00.123456+00:00"}
+
+    monkeypatch.setattr(server, "FAST_JSON_RESPONSES", False)
+    validated = server.Movie.model_validate(server.normalize_movies([dict(legacy)])[0]).model_dump_json()
+    monkeypatch.setattr(server, "FAST_JSON_RESPONSES", True)
+    fast = server.fast_json.dumps(server.normalize_movies([dict(legacy)])[0])
+
+    assert json.loads(fast)["createdAt"] == json.loads(validated)["createdAt"] == "2024-01-15T10:30:00.123456Z"
+
+
+def test_conditional_reads(api):
+    async def test(client):
+        movie_id = (await client.post("/api/admin/movies", json=movie("Revalidated"), headers=ADMIN)).json()["id"]
+        first = await client.get(f"/api/movies/{movie_id}")
+        etag = first.headers["etag"]
+        assert etag.startswith('W/"')
+        assert (await client.get(f"/api/movies/{movie_id}", headers={"If-None-Match": etag})).status_code == 304
+        assert (await client.get(f"/api/movies/{movie_id}", headers={"If-None-Match": "*"})).status_code == 304
+        assert (await client.get("/api/movies/no-such-movie", headers={"If-None-Match": "*"})).status_code == 404
+
+        feed_etag = (await client.get("/api/home")).headers["etag"]
+        server.catalog_version.feed_refreshed()
+        assert (await client.get("/api/home", headers={"If-None-Match": feed_etag})).status_code == 200
+
+    api(test)
+
+
+def test_batch_lookup(api):
+    async def test(client):
+        ids = [
+            (await client.post("/api/admin/movies", json=movie(f"Batched {i}"), headers=ADMIN)).json()["id"]
+            for i in range(3)
+        ]
+        wanted = [ids[2], "no-such-movie", ids[0], ids[2]]
+        body = (await client.post("/api/movies/batch", json={"ids": wanted})).json()
+        # Requested order, duplicates once, unknown ids reported rather than failing the batch
+        assert [item["id"] for item in body["movies"]] == [ids[2], ids[0]]
+        assert body["movies"][0]["title"] == "Batched 2" and "synopsis" in body["movies"][0]
+        assert body["missing"] == ["no-such-movie"]
+
+        picked = (await client.post("/api/movies/batch", json={"ids": ids, "fields": ["title"]})).json()
+        assert [set(item) for item in picked["movies"]] == [{"id", "title"}] * 3
+
+        for bad in ({"ids": []}, {"ids": ["x"] * (server.MAX_BATCH_IDS + 1)}):
+            assert (await client.post("/api/movies/batch", json=bad)).status_code == 422
+        assert (await client.post("/api/movies/batch", json={"ids": ids, "fields": ["password"]})).status_code == 400
+
+    api(test)
+
+
+def test_sparse_fieldsets(api):
+    async def test(client):
+        await client.post("/api/admin/movies", json=movie("Sparse", genres=["Sparse"]), headers=ADMIN)
+        params = {"genre": "Sparse"}
+
+        full = (await client.get("/api/movies", params=params)).json()[0]
+        assert "synopsis" in full and "cast" in full
+
+        card = (await client.get("/api/movies", params={**params, "fields": "card"})).json()[0]
+        assert set(card) <= set(server.MovieCard.model_fields) and "synopsis" not in card
+        assert card["title"] == "Sparse"
+
+        picked = (await client.get("/api/movies", params={**params, "fields": "title, releaseYear"})).json()[0]
+        assert set(picked) == {"id", "title", "releaseYear"}
+
+        assert (await client.get("/api/movies", params={"fields": "title,password"})).status_code == 400
+
+        found = (await client.get("/api/movies/search/query", params={"q": "Sparse", "fields": "title"})).json()
+        assert found and all(set(item) == {"id", "title"} for item in found)
+
+    api(test)
+
+
+def record_events(monkeypatch):
+    published = []
+
+    async def publish(event):
+        published.append(event)
+
+    monkeypatch.setattr(server.catalog_events, "publish", publish)
+    return published
+
+
+def test_admin_batch(api, monkeypatch):
+    published = record_events(monkeypatch)
+
+    async def test(client):
+        ids = [
+            (await client.post("/api/admin/movies", json=movie(f"Bulk {i}", genres=["Bulk"]), headers=ADMIN)).json()["id"]
+            for i in range(4)
+        ]
+        edited, deleted, conflicting, empty = ids
+        # Cached before the batch; the edit must invalidate it
+        assert (await client.get(f"/api/movies/{edited}")).json()["title"] == "Bulk 0"
+        total_movies = server.catalog_stats.total_movies
+        published.clear()
+
+        operations = [
+            {"op": "update", "id": edited, "set": {"title": "Bulk Renamed", "runtime": 95},
+             "add": {"genres": ["Thriller", "Bulk"], "subtitles": ["French"]}, "remove": {"cast": ["Someone"]}},
+            {"op": "delete", "id": deleted},
+            {"op": "update", "id": "no-such-movie", "set": {"title": "Nobody"}},
+            {"op": "delete", "id": "no-such-movie-either"},
+            {"op": "update", "id": conflicting, "set": {"genres": ["Drama"]}, "add": {"genres": ["Thriller"]}},
+            {"op": "delete", "id": edited},
+            {"op": "update", "id": empty},
+        ]
+        body = (await client.post("/api/admin/movies/batch", json={"operations": operations}, headers=ADMIN)).json()
+        statuses = [(result["index"], result["id"], result["status"]) for result in body["results"]]
+        assert statuses == [
+            (0, edited, "updated"), (1, deleted, "deleted"), (2, "no-such-movie", "not_found"),
+            (3, "no-such-movie-either", "not_found"), (4, conflicting, "invalid"), (5, edited, "invalid"),
+            (6, empty, "invalid"),
+        ]
+        errors = [result.get("error") for result in body["results"][4:]]
+        assert errors == ["genres changed more than once", "Movie appears in more than one operation", "No fields to update"]
+        assert (body["matched"], body["modified"], body["deleted"], body["failed"]) == (1, 1, 1, 3)
+
+        stored = (await client.get(f"/api/movies/{edited}")).json()
+        assert (stored["title"], stored["runtime"]) == ("Bulk Renamed", 95)
+        assert stored["genres"] == ["Bulk", "Thriller"] and stored["subtitles"] == ["French"] and stored["cast"] == []
+        assert (await client.get(f"/api/movies/{deleted}")).status_code == 404
+        assert (await client.get(f"/api/movies/{conflicting}")).json()["genres"] == ["Bulk"]
+
+        assert server.catalog_stats.total_movies == total_movies - 1
+        assert deleted not in server.browse_index
+        assert server.browse_index.query(genres=["Thriller"], facets=False)["ids"] == [edited]
+        assert published == [
+            {"type": "movies", "op": "updated", "ids": [edited]},
+            {"type": "movies", "op": "deleted", "movies": [{"id": deleted, "viewCount": 0}]},
+        ]
+
+        assert (await client.post("/api/admin/movies/batch", json={"operations": []}, headers=ADMIN)).status_code == 422
+        assert (await client.post("/api/admin/movies/batch", json={"operations": operations[:1]})).status_code == 401
+
+    api(test)
+
+
+def test_admin_batch_reports_failed_writes_and_applies_the_rest(api, monkeypatch):
+    published = record_events(monkeypatch)
+    movies = server.database.primary.movies
+    bulk_write = type(movies).bulk_write
+
+    async def failing_bulk_write(self, requests, ordered=True):
+        # What MongoDB does when one unordered write fails: the others still apply, then the error names it
+        assert not ordered
+        poisoned = [i for i, request in enumerate(requests) if request._filter["id"] == failed_id]
+        result = await bulk_write(self, [request for i, request in enumerate(requests) if i not in poisoned], ordered)
+        details = dict(result.bulk_api_result)
+        details["writeErrors"] = [{"index": i, "code": 2, "errmsg": "Cannot apply $addToSet to non-array field"} for i in poisoned]
+        raise BulkWriteError(details)
+
+    async def test(client):
+        nonlocal failed_id
+        ids = [
+            (await client.post("/api/admin/movies", json=movie(f"Partial {i}"), headers=ADMIN)).json()["id"]
+            for i in range(3)
+        ]
+        failed_id = ids[1]
+        published.clear()
+        monkeypatch.setattr(type(movies), "bulk_write", failing_bulk_write)
+        operations = [
+            {"op": "update", "id": ids[0], "add": {"cast": ["Newcomer"]}},
+            {"op": "update", "id": ids[1], "add": {"cast": ["Newcomer"]}},
+            {"op": "delete", "id": ids[2]},
+        ]
+        body = (await client.post("/api/admin/movies/batch", json={"operations": operations}, headers=ADMIN)).json()
+
+        assert [result["status"] for result in body["results"]] == ["updated", "failed", "deleted"]
+        assert body["results"][1]["error"] == "Cannot apply $addToSet to non-array field"
+        assert (body["matched"], body["deleted"], body["failed"]) == (1, 1, 1)
+        assert (await client.get(f"/api/movies/{ids[0]}")).json()["cast"] == ["Someone", "Newcomer"]
+        assert (await client.get(f"/api/movies/{ids[1]}")).json()["cast"] == ["Someone"]
+        # No side effects for the failed operation
+        assert [event["op"] for event in published] == ["updated", "deleted"]
+        assert published[0]["ids"] == [ids[0]]
+
+    failed_id = None
+    api(test)
+
+
+def test_incremental_export(api, monkeypatch):
+    # Exports read the primary; catalog reads (possibly from a lagging secondary) would fail here
+    monkeypatch.setattr(server.database, "_catalog", None)
+
+    async def test(client):
+        await client.post("/api/admin/movies", json=movie("Exported before", genres=["Exported"]), headers=ADMIN)
+        started = datetime.now(timezone.utc)
+        full = await client.get("/api/admin/export/movies", params={"genre": "Exported"}, headers=ADMIN)
+        assert [json.loads(line)["title"] for line in full.text.splitlines()] == ["Exported before"]
+
+        # A write stamped before the export began that only committed once the scan had passed it
+        late = server.Movie(**movie("Exported late", genres=["Exported"])).model_dump()
+        late.update(createdAt=server.format_datetime(late["createdAt"]), updatedAt=started - timedelta(seconds=1))
+        await server.database.primary.movies.insert_one(late)
+        await client.post("/api/admin/movies", json=movie("Exported after", genres=["Exported"]), headers=ADMIN)
+
+        since = full.headers["X-Export-Since"]
+        resumed = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        assert resumed == pytest.approx(started - server.EXPORT_SINCE_MARGIN, abs=timedelta(seconds=1))
+        params = {"genre": "Exported", "since": since, "format": "csv"}
+        changed = await client.get("/api/admin/export/movies", params=params, headers=ADMIN)
+        assert changed.headers["content-type"].startswith("text/csv")
+        # Oldest change first; the movie changed within the margin is sent again
+        titles = [line.split(",")[0] for line in changed.text.splitlines()]
+        assert titles == ["title", "Exported late", "Exported before", "Exported after"]
+
+        assert (await client.get("/api/admin/export/genres", params={"since": since}, headers=ADMIN)).status_code == 400
+        assert (await client.get("/api/admin/export/users", headers=ADMIN)).status_code == 404
+
+    api(test)
+
+
+def test_catalog_events_reach_the_other_worker(api, monkeypatch):
+    # This process is one worker; the other writes to the same database and publishes to the same stream
+    monkeypatch.setattr(server, "catalog_events", CatalogEvents(enabled=True, max_await_ms=50))
+    monkeypatch.setattr(server, "catalog_version", CatalogVersion())
+
+    async def test(client):
+        db = EventsDatabase()
+        await server.join_catalog_events(db)
+        other = Worker()
+        await other.start(db)
+        movies = server.database.primary.movies
+
+        async def publish(event):
+            applied = server.catalog_events.applied
+            await other.events.publish(event)
+            await eventually(lambda: server.catalog_events.applied > applied)
+
+        doc = server.Movie(**movie("Remote Heist", genres=["Remote"])).model_dump()
+        doc["createdAt"] = server.format_datetime(doc["createdAt"])
+        await movies.insert_one(dict(doc))
+        await publish({"type": "movies", "op": "created", "ids": [doc["id"]]})
+        assert doc["id"] in server.browse_index
+        assert (await client.get(f"/api/movies/{doc['id']}")).json()["title"] == "Remote Heist"
+        found = (await client.get("/api/movies/search/query", params={"q": "heist"})).json()
+        assert doc["id"] in [item["id"] for item in found]
+
+        # The detail response is cached here; the edit must reach the cache too
+        await movies.update_one({"id": doc["id"]}, {"$set": {"title": "Remote Caper"}})
+        await publish({"type": "movies", "op": "updated", "ids": [doc["id"]]})
+        response = await client.get(f"/api/movies/{doc['id']}")
+        assert response.json()["title"] == "Remote Caper"
+        assert server.suggester.suggest("caper")["movies"][0]["id"] == doc["id"]
+        # Both workers name this state alike, so a revalidation may land on either
+        assert response.headers["etag"] == other.version.movie_validators(doc["id"])[0]
+        genres = await client.get("/api/genres")
+        assert genres.headers["etag"] == other.version.list_validators()[0]
+
+        await movies.update_one({"id": doc["id"]}, {"$inc": {"viewCount": 4}})
+        other.events.views_flushed({doc["id"]: 4})
+        await eventually(lambda: server.suggester.titles.scores.get(doc["id"]) == 4)
+        assert server.browse_index.query(genres=["Remote"], sort="-viewCount", limit=1)["ids"] == [doc["id"]]
+
+        await movies.delete_one({"id": doc["id"]})
+        await publish({"type": "movies", "op": "deleted", "movies": [doc]})
+        assert (await client.get(f"/api/movies/{doc['id']}")).status_code == 404
+        assert doc["id"] not in server.browse_index
+
+        await other.events.stop()
+        await server.catalog_events.stop()
+
+    api(test)
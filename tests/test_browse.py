@@ -0,0 +1,123 @@
+import asyncio
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from browse import SORT_FIELDS, BrowseIndex
+
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Sci-Fi"]
+LANGUAGES = ["English", "French", "Hindi"]
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def movie(rng, movie_id):
+    doc = {
+        "id": movie_id,
+        "title": rng.choice(["Alpha", "beta", "Gamma", "alpha"]) + f" {rng.randrange(5)}",
+        "genres": rng.sample(GENRES, rng.randint(0, 3)),
+        "releaseYear": rng.randint(1990, 2000),
+        "runtime": rng.randint(80, 180),
+        "subtitles": rng.sample(LANGUAGES, rng.randint(0, 2)),
+        "viewCount": rng.randrange(20),
+        "createdAt": EPOCH + timedelta(days=rng.randrange(30)),
+    }
+    # Movies without a language browse as English
+    if rng.random() < 0.8:
+        doc["language"] = rng.choice(LANGUAGES)
+    return doc
+
+
+def brute_force(index, docs, genres=(), match_all_genres=True, year_from=None, year_to=None,
+                runtime_min=None, runtime_max=None, languages=(), subtitles=(), sort="-viewCount"):
+    def keep(doc):
+        if genres and not (all if match_all_genres else any)(genre in doc["genres"] for genre in genres):
+            return False
+        if year_from is not None and doc["releaseYear"] < year_from:
+            return False
+        if year_to is not None and doc["releaseYear"] > year_to:
+            return False
+        if runtime_min is not None and doc["runtime"] < runtime_min:
+            return False
+        if runtime_max is not None and doc["runtime"] > runtime_max:
+            return False
+        if languages and doc.get("language", "English") not in languages:
+            return False
+        return all(language in doc["subtitles"] for language in subtitles)
+
+    field = sort.lstrip("-")
+    matches = sorted((doc for doc in docs.values() if keep(doc)), key=lambda doc: index._rows[doc["id"]])
+    key = (lambda doc: doc["title"].lower()) if field == "title" else (lambda doc: doc[field])
+    # A stable sort, reversed or not, keeps ties in row order
+    matches.sort(key=key, reverse=sort.startswith("-"))
+    facets = {
+        "genres": Counter(genre for doc in matches for genre in doc["genres"]),
+        "languages": Counter(doc.get("language", "English") for doc in matches),
+        "subtitles": Counter(language for doc in matches for language in doc["subtitles"]),
+        "years": Counter(str(doc["releaseYear"]) for doc in matches),
+    }
+    return [doc["id"] for doc in matches], {name: dict(counts) for name, counts in facets.items()}
+
+
+def random_query(rng):
+    query = {"sort": rng.choice(["", "-"]) + rng.choice(SORT_FIELDS)}
+    if rng.random() < 0.5:
+        query["genres"] = rng.sample(GENRES + ["Western"], rng.randint(1, 2))
+        query["match_all_genres"] = rng.random() < 0.5
+    if rng.random() < 0.4:
+        query["year_from"] = rng.randint(1990, 2000)
+    if rng.random() < 0.4:
+        query["year_to"] = rng.randint(1990, 2000)
+    if rng.random() < 0.3:
+        query["runtime_min"], query["runtime_max"] = sorted(rng.sample(range(80, 181), 2))
+    if rng.random() < 0.3:
+        query["languages"] = rng.sample(LANGUAGES + ["German"], rng.randint(1, 2))
+    if rng.random() < 0.3:
+        query["subtitles"] = rng.sample(LANGUAGES, 1)
+    return query
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_query_matches_a_brute_force_filter_through_edits(seed):
+    rng = random.Random(seed)
+    docs = {f"m{i}": movie(rng, f"m{i}") for i in range(150)}
+    collection = AsyncMongoMockClient()["browse"]["movies"]
+    asyncio.run(collection.insert_many([dict(doc) for doc in docs.values()]))
+    index = BrowseIndex()
+    asyncio.run(index.build(collection))
+    assert index.ready and len(index) == len(docs)
+
+    for step in range(300):
+        action = rng.random()
+        movie_id = f"m{rng.randrange(200)}"
+        if action < 0.2:
+            index.remove(movie_id)
+            docs.pop(movie_id, None)
+        elif action < 0.5:
+            docs[movie_id] = movie(rng, movie_id)
+            index.add(dict(docs[movie_id]))
+        elif action < 0.6:
+            counts = {f"m{rng.randrange(200)}": rng.randint(1, 5) for _ in range(5)}
+            index.views_flushed(counts)
+            for flushed, count in counts.items():
+                if flushed in docs:
+                    docs[flushed]["viewCount"] += count
+        else:
+            query = random_query(rng)
+            expected, facets = brute_force(index, docs, **query)
+            skip, limit = rng.randrange(0, 40), rng.randint(1, 30)
+            result = index.query(**query, skip=skip, limit=limit)
+            assert result["total"] == len(expected)
+            assert result["ids"] == expected[skip:skip + limit]
+            assert result["facets"] == facets
+
+
+def test_pages_do_not_overlap_when_every_key_ties():
+    index = BrowseIndex()
+    asyncio.run(index.build(AsyncMongoMockClient()["browse"]["movies"]))
+    index.add_many([{"id": f"m{i}", "title": "Same", "viewCount": 1} for i in range(25)])
+    for sort in ("-viewCount", "viewCount", "title", "-title"):
+        pages = [index.query(sort=sort, skip=skip, limit=10, facets=False)["ids"] for skip in (0, 10, 20)]
+        assert [movie_id for page in pages for movie_id in page] == [f"m{i}" for i in range(25)]
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import time
+
+from cache import ResponseCache, estimate_size
+
+
+def page(n):
+    return [
+        {"id": f"{i:08d}-0000", "title": f"Movie {i}", "genres": ["Drama", "Action"], "viewCount": i * 10,
+         "releaseYear": 2000, "createdAt": "2024-05-01T10:00:00.123456Z", "posters": None}
+        for i in range(n)
+    ]
+
+
+def test_estimate_is_close_to_the_encoded_size():
+    for value in (page(20), {"items": page(50), "next_cursor": "abc"}, {"rows": [{"genre": {"name": "x"}, "movies": page(20)}] * 6}):
+        actual = len(json.dumps(value))
+        assert 0.7 * actual <= estimate_size(value) <= 1.3 * actual
+
+
+def test_bytes_are_sized_exactly():
+    cache = ResponseCache()
+    cache.set("k", b"x" * 100, 60)
+    assert cache.stats()["bytes"] == 100
+
+
+def test_lru_eviction_by_bytes():
+    cache = ResponseCache(max_bytes=250)
+    for key in "abc":
+        cache.set(key, b"x" * 100, 60)
+    # Three entries exceed the cap; "a" was least recently used
+    assert list(cache._entries) == ["b", "c"]
+    cache.get("b")
+    cache.set("d", b"x" * 100, 60)
+    assert list(cache._entries) == ["b", "d"]
+    assert cache.stats()["evictions"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    cache = ResponseCache()
+    cache.set("k", b"v", ttl=10)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    cache.get("k")
+    assert cache.stats()["expirations"] == 1 and not cache._entries
+
+
+def test_invalidation_by_tag_and_racing_loads():
+    async def main():
+        cache = ResponseCache()
+        cache.set(cache.make_key("movie", {"id": "1"}), b"one", 60, ["movie:1"])
+        cache.set(cache.make_key("movies"), b"all", 60, ["movies"])
+        cache.invalidate("movie:1")
+        assert set(cache._entries) == {cache.make_key("movies")}
+
+        async def load():
+            # An edit lands while this page is being read; the stale result must not be cached
+            cache.invalidate("movies")
+            return b"stale"
+
+        assert await cache.get_or_load("movies", {"page": 2}, 60, ["movies"], load) == b"stale"
+        return cache
+
+    cache = asyncio.run(main())
+    assert not cache._entries
+
+
+def test_keys_ignore_parameter_order_and_unset_values():
+    assert ResponseCache.make_key("r", {"a": 1, "b": None, "c": 2}) == ResponseCache.make_key("r", {"c": 2, "a": 1})
@@ -0,0 +1,50 @@
+from datetime import timedelta, timezone
+
+from starlette.requests import Request
+
+from conditional import CatalogVersion, is_not_modified
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def test_validators_are_weak_and_compared_weakly():
+    version = CatalogVersion()
+    etag, modified = version.list_validators()
+    assert etag.startswith('W/"')
+    assert is_not_modified(request(if_none_match=etag), etag, modified)
+    # Intermediaries may strip the weak prefix; the weak comparison still matches
+    assert is_not_modified(request(if_none_match=etag[2:]), etag, modified)
+    assert is_not_modified(request(if_none_match=f'"other", {etag}'), etag, modified)
+    assert not is_not_modified(request(if_none_match='W/"other"'), etag, modified)
+
+
+def test_list_validators_change_with_the_catalog():
+    version = CatalogVersion()
+    before = version.list_validators()[0]
+    version.catalog_changed(["a"])
+    assert version.list_validators()[0] != before
+    assert version.movie_validators("a")[0] != version.movie_validators("b")[0]
+
+
+def test_feed_validator_changes_on_refresh():
+    version = CatalogVersion()
+    before, list_etag = version.feed_validators()[0], version.list_validators()[0]
+    version.feed_refreshed()
+    assert version.feed_validators()[0] != before
+    assert version.list_validators()[0] == list_etag
+
+
+def test_star_matches_only_existing_resources():
+    etag, modified = CatalogVersion().movie_validators("missing")
+    assert is_not_modified(request(if_none_match="*"), etag, modified)
+    assert not is_not_modified(request(if_none_match="*"), etag, modified, exists=False)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    etag, modified = CatalogVersion().list_validators()
+    later = (modified + timedelta(hours=1)).astimezone(timezone.utc).strftime("%a, %d %b %Y %H:%M:%S GMT")
+    assert is_not_modified(request(if_modified_since=later), etag, modified)
+    assert not is_not_modified(request(if_none_match='"other"', if_modified_since=later), etag, modified)
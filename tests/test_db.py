@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+import db
+from db import Database, DatabaseNotConnected
+
+
+class Admin:
+    def __init__(self, failures):
+        self.failures = failures
+        self.pings = 0
+
+    async def command(self, name):
+        self.pings += 1
+        if self.pings <= self.failures:
+            raise AutoReconnect("not yet")
+        return {"ok": 1}
+
+
+class Client:
+    def __init__(self, failures=0):
+        self.admin = Admin(failures)
+        self.closed = False
+
+    def get_database(self, name, read_preference=None):
+        return (name, read_preference)
+
+    def close(self):
+        self.closed = True
+
+
+def test_unknown_read_preference_fails_at_construction():
+    with pytest.raises(ValueError, match="Unknown read preference"):
+        Database("mongodb://localhost", "test", catalog_read_preference="nearestish")
+
+
+def test_connect_retries_until_the_server_answers(monkeypatch):
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(db.asyncio, "sleep", sleep)
+    database = Database("mongodb://localhost", "test", connect_attempts=4)
+    with pytest.raises(DatabaseNotConnected):
+        database.primary
+
+    database.client = Client(failures=2)
+    asyncio.run(database.connect())
+    assert delays == [2, 4]
+    assert database.primary == ("test", None)
+    assert database.catalog[1].mongos_mode == "secondaryPreferred"
+
+    client = database.client
+    database.close()
+    assert client.closed
+    with pytest.raises(DatabaseNotConnected):
+        database.catalog
+
+
+def test_connect_gives_up_after_the_last_attempt(monkeypatch):
+    async def sleep(delay):
+        pass
+
+    monkeypatch.setattr(db.asyncio, "sleep", sleep)
+    database = Database("mongodb://localhost", "test", connect_attempts=3)
+    database.client = Client(failures=5)
+    with pytest.raises(AutoReconnect):
+        asyncio.run(database.connect())
+    assert database.client.admin.pings == 3
+
+
+def test_health_reports_failures():
+    database = Database("mongodb://localhost", "test")
+    assert asyncio.run(database.health()) == {"ok": False, "error": "not connected"}
+    database.client = Client(failures=1)
+    assert asyncio.run(database.health()) == {"ok": False, "error": "not yet"}
+    assert asyncio.run(database.health())["ok"] is True
@@ -0,0 +1,168 @@
+import asyncio
+
+from bson import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+
+from conditional import CatalogVersion
+from events import CatalogEvents, event_movie_ids
+
+
+class CappedCollection:
+    """An in-memory capped collection: insertion order, oldest documents dropped, tailable cursors."""
+
+    def __init__(self, max_docs=10000):
+        self.docs = []
+        self.dropped = 0
+        self.max_docs = max_docs
+        self.inserted = asyncio.Event()
+
+    async def insert_one(self, doc):
+        doc = {**doc, "_id": ObjectId()}
+        self.docs.append(doc)
+        if len(self.docs) > self.max_docs:
+            self.docs.pop(0)
+            self.dropped += 1
+        self.inserted.set()
+        self.inserted = asyncio.Event()
+        return type("InsertOneResult", (), {"inserted_id": doc["_id"]})
+
+    def find(self, query=None, projection=None, cursor_type=CursorType.NON_TAILABLE):
+        return Cursor(self, cursor_type == CursorType.TAILABLE_AWAIT)
+
+
+class Cursor:
+    def __init__(self, collection, tailable):
+        self.collection = collection
+        self.tailable = tailable
+        self.position = collection.dropped
+        self.alive = True
+        self.max_await = 1.0
+
+    def max_await_time_ms(self, ms):
+        self.max_await = ms / 1000
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        collection = self.collection
+        if self.position - collection.dropped >= len(collection.docs):
+            if not self.tailable:
+                self.alive = False
+                raise StopAsyncIteration
+            try:
+                await asyncio.wait_for(collection.inserted.wait(), self.max_await)
+            except asyncio.TimeoutError:
+                raise StopAsyncIteration
+        self.position = max(self.position, collection.dropped)
+        doc = collection.docs[self.position - collection.dropped]
+        self.position += 1
+        return doc
+
+
+class EventsDatabase:
+    def __init__(self):
+        self.events = CappedCollection()
+        self.created = False
+
+    async def create_collection(self, name, **options):
+        if self.created:
+            raise CollectionInvalid(f"collection {name} already exists")
+        self.created = True
+
+    def __getitem__(self, name):
+        return self.events
+
+
+class Worker:
+    """What each API worker wires up: its catalog events, and validators following them."""
+
+    def __init__(self):
+        self.events = CatalogEvents(enabled=True, max_await_ms=50, views_interval=0.01)
+        self.version = CatalogVersion()
+        self.applied = []
+
+    async def start(self, db):
+        async def on_event(event):
+            self.applied.append(event)
+
+        async def on_gap():
+            pass
+
+        def on_seen(event, settled):
+            self.version.follow(str(event["_id"]), event_movie_ids(event), event["type"] != "views", event["at"], settled)
+
+        await self.events.start(db, on_event, on_gap, on_seen)
+        latest, catalog, views = (self.events.positions[key] for key in ("latest", "catalog", "views"))
+        self.version.share(
+            str(latest["_id"]) if latest else self.events.worker_id,
+            (str(catalog["_id"]), catalog["at"]) if catalog else None,
+            views["at"] if views else None,
+        )
+
+
+async def eventually(check, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not check():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_workers_issue_the_same_validators_for_the_same_state():
+    async def run():
+        db = EventsDatabase()
+        first, second = Worker(), Worker()
+        await first.start(db)
+        await first.events.publish({"type": "genres", "op": "created"})
+        # Joins after an edit it never receives as an event; it loaded the state that edit produced
+        await second.start(db)
+        await eventually(lambda: first.events.settled and first.version.list_validators()[0] == second.version.list_validators()[0])
+
+        # A local edit is named uniquely until the stream carries it back
+        first.version.catalog_changed(["a"])
+        assert first.version.movie_validators("a")[0] != second.version.movie_validators("a")[0]
+        await first.events.publish({"type": "movies", "op": "updated", "ids": ["a"]})
+        second.version.catalog_changed(["a"])
+        await eventually(lambda: first.events.settled and len(second.applied) == 1)
+        await eventually(lambda: first.version.movie_validators("a") == second.version.movie_validators("a"))
+        assert first.version.list_validators()[0] == second.version.list_validators()[0]
+        assert first.version.movie_validators("a")[0] == f'W/"{second.applied[0]["_id"]}"'
+
+        # Views reach the other worker and move the movie's validator on both
+        before = second.version.movie_validators("a")[0]
+        first.version.views_flushed({"a": 3})
+        first.events.views_flushed({"a": 3})
+        await eventually(lambda: first.events.settled and any(e["type"] == "views" for e in second.applied))
+        assert second.applied[-1]["counts"] == {"a": 3}
+        assert second.version.movie_validators("a")[0] != before
+        assert first.version.movie_validators("a")[0] == second.version.movie_validators("a")[0]
+
+        await first.events.stop()
+        await second.events.stop()
+
+    asyncio.run(run())
+
+
+def test_view_events_are_bounded():
+    async def run():
+        events = CatalogEvents(enabled=True, size_bytes=16 * 150, views_per_event=3)
+        events._collection = CappedCollection()
+        for i in range(10):
+            events.views_flushed({f"movie-{i}": 1})
+        events.views_flushed({"movie-0": 2})
+        assert not events.settled
+
+        # A round publishes about a sixteenth of the collection, in events of at most views_per_event movies
+        await events._flush_views()
+        published = events._collection.docs
+        assert [len(doc["counts"]) for doc in published] == [3, 3, 3]
+        assert published[0]["counts"]["movie-0"] == 3
+        assert events.stats()["viewsPending"] == 1
+
+        await events._flush_views()
+        assert published[-1]["counts"] == {"movie-9": 1}
+        assert events.stats()["viewsPending"] == 0
+
+    asyncio.run(run())
@@ -0,0 +1,73 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+from export import EXPORT_CSV_FIELDS, ExportStats, export_stream
+
+MOVIES = [
+    {
+        "id": f"m{i}",
+        "title": f"Movie, {i}",
+        "genres": ["Drama", "Sci-Fi"],
+        "cast": ["Someone"],
+        "releaseYear": 2000 + i,
+        "createdAt": "2024-01-15T10:30:00Z",
+        "updatedAt": datetime(2024, 2, 1, 12, 0, tzinfo=timezone.utc),
+    }
+    for i in range(50)
+]
+
+
+async def cursor(docs):
+    for doc in docs:
+        yield doc
+
+
+def export(fmt, compress=False, chunk_bytes=512):
+    stats = ExportStats()
+
+    async def main():
+        stream = export_stream(cursor(MOVIES), fmt, EXPORT_CSV_FIELDS["movies"], compress, chunk_bytes, stats)
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(main())
+    return chunks, stats
+
+
+def test_ndjson_streams_one_document_per_line_in_bounded_chunks():
+    chunks, stats = export("ndjson")
+    assert len(chunks) > 1 and all(chunk for chunk in chunks)
+    # A chunk is flushed once it reaches chunk_bytes, so it exceeds that by at most one document
+    assert max(len(chunk) for chunk in chunks) < 512 + 200
+    lines = b"".join(chunks).decode().splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [movie["id"] for movie in MOVIES]
+    assert json.loads(lines[0])["updatedAt"] == "2024-02-01T12:00:00Z"
+    assert stats.documents == 50 and stats.bytes == sum(map(len, chunks))
+    assert stats.finished is not None
+
+
+def test_csv_joins_lists_the_way_bulk_import_splits_them():
+    chunks, stats = export("csv")
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode())))
+    assert len(rows) == stats.documents == 50
+    assert rows[1]["title"] == "Movie, 1" and rows[1]["genres"] == "Drama|Sci-Fi"
+    assert rows[1]["updatedAt"] == "2024-02-01T12:00:00Z" and rows[1]["language"] == ""
+
+
+def test_gzip_output_decompresses_to_the_plain_export():
+    plain, _ = export("ndjson")
+    compressed, stats = export("ndjson", compress=True)
+    assert gzip.decompress(b"".join(compressed)) == b"".join(plain)
+    assert stats.bytes == sum(map(len, plain))
+    assert stats.compressed_bytes == sum(map(len, compressed)) < stats.bytes
+    assert stats.as_dict()["documents"] == 50
+
+
+def test_empty_export_still_writes_the_csv_header():
+    async def main():
+        return [chunk async for chunk in export_stream(cursor([]), "csv", ["id", "name", "slug"])]
+
+    assert b"".join(asyncio.run(main())) == b"id,name,slug\r\n"
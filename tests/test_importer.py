@@ -0,0 +1,68 @@
+import asyncio
+import io
+
+from pymongo.errors import BulkWriteError
+
+from importer import CsvImporter
+
+CSV = (
+    "title,releaseYear\n"
+    "First,2001\n"
+    "Second,abc\n"
+    '"Third\nwith a line break",2003\n'
+    "Fourth,xyz\n"
+    "Duplicate,2005\n"
+)
+
+
+class Upload:
+    def __init__(self, text):
+        self.filename = "movies.csv"
+        self.file = io.BytesIO(text.encode())
+
+
+class Collection:
+    def __init__(self):
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=True):
+        # Titles named Duplicate fail like a unique-index violation
+        errors = [{"index": i, "errmsg": "duplicate key"} for i, doc in enumerate(docs) if doc["title"] == "Duplicate"]
+        self.docs += [doc for doc in docs if doc["title"] != "Duplicate"]
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+def row_to_doc(row):
+    return {"title": row["title"], "releaseYear": int(row["releaseYear"])}
+
+
+def run_import(batch_size):
+    async def main():
+        collection = Collection()
+        inserted = []
+
+        async def on_inserted(docs):
+            inserted.append([doc["title"] for doc in docs])
+
+        importer = CsvImporter(collection, row_to_doc, on_inserted=on_inserted, batch_size=batch_size)
+        job = await importer.run(await importer.create_job(Upload(CSV)))
+        return job, collection, inserted
+
+    return asyncio.run(main())
+
+
+def test_rows_and_lines_of_errors():
+    for batch_size in (1, 2, 1000):
+        job, collection, _ = run_import(batch_size)
+        assert job.status == "completed"
+        assert [doc["title"] for doc in collection.docs] == ["First", "Third\nwith a line break"]
+        assert job.inserted == 2 and job.failed == 3 and job.rows_parsed == 5
+        # The third row spans lines 4-5, so the rows after it start a line later than their number suggests
+        assert [(e["row"], e["line"]) for e in job.errors] == [(2, 3), (4, 6), (5, 7)]
+        assert job.errors[2]["error"] == "duplicate key"
+
+
+def test_inserted_batches_are_reported():
+    _, _, inserted = run_import(2)
+    assert inserted == [["First"], ["Third\nwith a line break"]]
@@ -0,0 +1,62 @@
+import pytest
+
+from indexes import INDEXES, QUERY_SHAPES, _plan_summary
+
+
+def is_equality(value) -> bool:
+    return not (isinstance(value, dict) and any(key.startswith("$") for key in value))
+
+
+def branches(query: dict):
+    # An $or is answered per branch, each combined with the rest of the filter
+    rest = {key: value for key, value in query.items() if key != "$or"}
+    for branch in query.get("$or") or [{}]:
+        yield {**rest, **branch}
+
+
+def served_by(query: dict, sort, keys) -> bool:
+    """Whether an index on `keys` answers the filter and sort from a prefix of its keys, without a
+    blocking sort: equality fields first, then the sort fields in order (or all reversed)."""
+    sort = sort or []
+    fields = set(query) | {field for field, _ in sort}
+    prefix = keys[:len(fields)]
+    if {field for field, _ in prefix} != fields:
+        return False
+    if not sort:
+        return True
+    names = [field for field, _ in prefix]
+    start = names.index(sort[0][0])
+    if any(not is_equality(query.get(field, {"$exists": True})) for field in names[:start]):
+        return False
+    if names[start:start + len(sort)] != [field for field, _ in sort]:
+        return False
+    directions = {index_direction * direction for (_, index_direction), (_, direction) in zip(prefix[start:], sort)}
+    return len(directions) == 1
+
+
+@pytest.mark.parametrize("route", sorted(QUERY_SHAPES))
+def test_every_query_shape_has_an_index(route):
+    collection, query, sort = QUERY_SHAPES[route]
+    declared = [list(model.document["key"].items()) for model in INDEXES[collection]]
+    for branch in branches(query):
+        assert any(served_by(branch, sort, keys) for keys in declared), f"{route}: no index for {branch} sorted by {sort}"
+
+
+def test_plan_summary_walks_every_or_branch():
+    plan = {
+        "stage": "LIMIT",
+        "inputStage": {
+            "stage": "SORT_MERGE",
+            "inputStages": [
+                {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "createdAt_-1_id_-1"}},
+                {"stage": "COLLSCAN"},
+            ],
+        },
+    }
+    summary = _plan_summary(plan)
+    assert summary["collscan"]
+    assert summary["stages"] == ["LIMIT", "SORT_MERGE", "FETCH", "IXSCAN", "COLLSCAN"]
+    assert summary["indexes"] == ["createdAt_-1_id_-1"]
+
+    plan["inputStage"]["inputStages"][1] = {"stage": "IXSCAN", "indexName": "createdAt_-1_id_-1"}
+    assert not _plan_summary(plan)["collscan"]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from loader import MovieLoader, SingleFlight
+
+
+class Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        await asyncio.sleep(0)
+        return self.docs
+
+
+class Movies:
+    def __init__(self, docs, fail=False):
+        self.docs = {doc["id"]: doc for doc in docs}
+        self.fail = fail
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(query)
+        if self.fail:
+            raise RuntimeError("database down")
+        return Cursor([self.docs[i] for i in query["id"]["$in"] if i in self.docs])
+
+
+def test_concurrent_loads_share_one_query():
+    movies = Movies([{"id": "a", "title": "A"}, {"id": "b", "title": "B"}])
+    loader = MovieLoader(movies, {"_id": 0})
+
+    async def run():
+        return await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), loader.load("missing"))
+
+    a, b, again, missing = asyncio.run(run())
+    assert (a, b, missing) == ({"id": "a", "title": "A"}, {"id": "b", "title": "B"}, None)
+    # Every caller gets its own copy
+    assert again == a and again is not a
+    assert movies.queries == [{"id": {"$in": ["a", "b", "missing"]}}]
+    assert loader.stats() == {"loads": 4, "coalesced": 1, "batches": 1, "inFlight": 0}
+
+
+def test_fetch_tasks_are_held_until_done():
+    loader = MovieLoader(Movies([{"id": "a"}]), {"_id": 0})
+
+    async def run():
+        load = asyncio.ensure_future(loader.load("a"))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(loader._fetches) == 1
+        await load
+        await asyncio.sleep(0)
+        assert not loader._fetches
+
+    asyncio.run(run())
+
+
+def test_errors_reach_every_caller_and_cancellation_only_one():
+    failing = MovieLoader(Movies([], fail=True), {"_id": 0})
+
+    async def fail():
+        results = await asyncio.gather(failing.load("a"), failing.load("a"), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(fail())
+
+    loader = MovieLoader(Movies([{"id": "a"}]), {"_id": 0})
+
+    async def cancel():
+        first = asyncio.ensure_future(loader.load("a"))
+        second = asyncio.ensure_future(loader.load("a"))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == {"id": "a"}
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(cancel())
+
+
+def test_single_flight_shares_one_call_per_key():
+    flight = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return len(calls)
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)))
+        assert results == [1, 1, 1]
+        assert await flight.do("key", fetch) == 2
+
+    asyncio.run(run())
+    assert flight.stats() == {"calls": 2, "coalesced": 2, "inFlight": 0}
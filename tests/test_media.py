@@ -0,0 +1,102 @@
+import asyncio
+import os
+
+import pytest
+
+from media import MediaFiles, RangeNotSatisfiable, parse_range
+from metrics import MediaMetrics
+
+SIZE = 1000
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=900-", (900, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=999-999", (999, 999)),
+    (" Bytes = 10-20", (10, 20)),
+    # Ignored, so the whole file is sent
+    ("bytes=0-9,20-29", None),
+    ("items=0-9", None),
+    ("bytes=50-10", None),
+    ("bytes=abc-", None),
+    ("bytes=5", None),
+    ("bytes=--5", None),
+    ("bytes=-", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, SIZE) == expected
+
+
+@pytest.mark.parametrize("header, size", [("bytes=1000-", SIZE), ("bytes=-0", SIZE), ("bytes=-5", 0), ("bytes=0-", 0)])
+def test_unsatisfiable_ranges(header, size):
+    with pytest.raises(RangeNotSatisfiable) as raised:
+        parse_range(header, size)
+    assert raised.value.size == size
+
+
+def stream(files, path, headers, extensions=None, on_chunk=None):
+    response = files.response(path, headers)
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+        if message.get("more_body") and on_chunk is not None:
+            on_chunk()
+
+    asyncio.run(response({"type": "http", "extensions": extensions or {}}, receive, send))
+    start = messages[0]
+    body = b"".join(bytes(message.get("body", b"")) for message in messages[1:])
+    return start["status"], dict(start["headers"]), body, messages
+
+
+@pytest.fixture
+def media(tmp_path):
+    def make(mode):
+        return MediaFiles(str(tmp_path), MediaMetrics(), chunk_bytes=256, mode=mode)
+
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(bytes(range(256)) * 4)
+    return make, str(path)
+
+
+@pytest.mark.parametrize("mode", ["auto", "read", "mmap"])
+def test_ranges_are_streamed_in_every_mode(media, mode):
+    make, path = media
+    files = make(mode)
+    data = open(path, "rb").read()
+    status, headers, body, _ = stream(files, path, {"range": "bytes=100-899"})
+    assert status == 206 and body == data[100:900]
+    assert headers[b"content-range"] == b"bytes 100-899/1024" and headers[b"content-length"] == b"800"
+    assert stream(files, path, {})[2] == data
+    # "auto" reads chunks unless the server offers sendfile
+    assert set(files.metrics.snapshot()["bytesSent"]) == {"read" if mode == "auto" else mode}
+
+
+def test_if_range_mismatch_sends_the_whole_file(media):
+    make, path = media
+    status, _, body, _ = stream(make("auto"), path, {"range": "bytes=0-9", "if-range": '"stale"'})
+    assert status == 200 and len(body) == 1024
+
+
+def test_zerocopysend_hands_the_file_to_the_server(media):
+    make, path = media
+    files = make("auto")
+    _, _, _, messages = stream(files, path, {"range": "bytes=24-"}, {"http.response.zerocopysend": {}})
+    assert messages[1]["type"] == "http.response.zerocopysend"
+    assert (messages[1]["offset"], messages[1]["count"]) == (24, 1000)
+
+
+@pytest.mark.parametrize("mode", ["read", "mmap"])
+def test_truncation_mid_stream_ends_the_body_early(media, mode):
+    make, path = media
+    # Rewritten in place after the first chunk went out
+    status, _, body, messages = stream(make(mode), path, {}, on_chunk=lambda: os.truncate(path, 10))
+    # The worker survives; the body stops short of content-length and the server drops the connection
+    assert status == 200 and len(body) < 1024
+    assert messages[-1] == {"type": "http.response.body", "body": b""}
@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+
+from metrics import LATENCY_BUCKETS, Histogram, Metrics, MetricsMiddleware, RequestTrace, _current_trace, query_shape
+
+
+def command_event(request_id, command_name, command, reply=None, micros=2000):
+    return SimpleNamespace(
+        request_id=request_id, connection_id=("localhost", 27017), command_name=command_name,
+        command=command, reply=reply or {}, duration_micros=micros,
+    )
+
+
+def test_histogram_buckets_are_upper_bounds():
+    histogram = Histogram()
+    for value in (0.001, 0.0011, 60.0):
+        histogram.observe(value)
+    assert histogram.counts[0] == 1 and histogram.counts[1] == 1
+    assert histogram.counts[len(LATENCY_BUCKETS)] == 1
+    assert histogram.count == 3
+
+
+def test_query_shape_drops_literals():
+    shape = query_shape("find", {"find": "movies", "filter": {"genres": "Action", "id": {"$in": ["a", "b"]}},
+                                 "sort": {"viewCount": -1}})
+    assert shape == "find movies filter={'genres': '?', 'id': {'$in': ['?']}} sort={'viewCount': -1}"
+    assert "Action" not in shape
+
+
+def test_commands_are_attributed_to_the_request_trace():
+    metrics = Metrics(slow_request_seconds=0.0)
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        find = {"find": "movies", "filter": {"id": "secret"}}
+        metrics.started(command_event(1, "find", find))
+        metrics.started(command_event(2, "ping", {"ping": 1}))
+    finally:
+        _current_trace.reset(token)
+    metrics.succeeded(command_event(1, "find", find, {"cursor": {"firstBatch": [{}, {}]}}))
+    metrics.succeeded(command_event(2, "ping", {"ping": 1}))
+
+    assert len(trace.queries) == 1 and trace.mongo_seconds == 0.002
+    metrics.record_request("GET", "/api/movies/{movie_id}", 200, 0.01, trace)
+    slow = metrics.slow_requests[-1]
+    assert slow["queries"] == 1 and slow["slowestQueries"][0]["documents"] == 2
+    assert "secret" not in slow["slowestQueries"][0]["shape"]
+
+    text = metrics.render()
+    assert 'mongodb_command_documents_total{collection="movies",command="find"} 2' in text
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/movies/{movie_id}"} 1' in text
+    assert "ping" not in text
+
+
+def test_failed_commands_are_counted():
+    metrics = Metrics()
+    metrics.started(command_event(1, "insert", {"insert": "movies"}))
+    metrics.failed(command_event(1, "insert", {"insert": "movies"}))
+    assert 'mongodb_command_failures_total{collection="movies",command="insert"} 1' in metrics.render()
+
+
+def test_middleware_labels_requests_by_route_template():
+    metrics = Metrics()
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def item(item_id: str):
+        return {"id": item_id}
+
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+            await client.get("/nowhere")
+
+    asyncio.run(run())
+    text = metrics.render()
+    assert 'http_responses_total{method="GET",route="/items/{item_id}",status="200"} 2' in text
+    assert 'http_responses_total{method="GET",route="unmatched",status="404"} 1' in text
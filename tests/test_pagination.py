@@ -0,0 +1,54 @@
+import base64
+import json
+
+import pytest
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_query
+
+
+def forge(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    doc = {"id": "m1", "createdAt": "2024-05-01T10:00:00.000000Z", "viewCount": 42}
+    assert decode_cursor(encode_cursor("newest", doc), "newest") == ("2024-05-01T10:00:00.000000Z", "m1")
+    assert decode_cursor(encode_cursor("popular", doc), "popular") == (42, "m1")
+
+
+def test_keyset_query_continues_after_the_cursor():
+    cursor = encode_cursor("popular", {"id": "m1", "viewCount": 42})
+    query, sort = keyset_query("popular", cursor, {"genres": "Drama"})
+    assert query == {
+        "genres": "Drama",
+        "$or": [{"viewCount": {"$lt": 42}}, {"viewCount": 42, "id": {"$lt": "m1"}}],
+    }
+    assert sort == [("viewCount", -1), ("id", -1)]
+    assert keyset_query("newest", None, {}) == ({}, [("createdAt", -1), ("id", -1)])
+
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor("popular", {"id": "m1", "viewCount": 42})
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "newest")
+
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("popular", "not base64!"),
+    ("popular", forge({"sort": "popular"})),
+    ("popular", forge(["popular", 1])),
+    # Query operators smuggled in as the sort value or the id
+    ("popular", forge(["popular", {"$regex": ".*(a+)+$"}, "x"])),
+    ("popular", forge(["popular", 5, {"$gt": ""}])),
+    ("newest", forge(["newest", {"$ne": None}, "x"])),
+    # Wrong types for the sort field
+    ("popular", forge(["popular", "5", "x"])),
+    ("popular", forge(["popular", True, "x"])),
+    ("popular", forge(["popular", 1.5, "x"])),
+    ("newest", forge(["newest", 1714557600, "x"])),
+    ("newest", forge(["newest", "yesterday", "x"])),
+    ("newest", forge(["newest", "2024-05-01T10:00:00Z", None])),
+])
+def test_tampered_cursor_is_rejected(sort, cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, sort)
@@ -0,0 +1,81 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from PIL import Image
+
+from posters import DERIVATIVES, FORMATS, Derivative, PosterStore, _fit_size
+
+
+def poster(width=600, height=900, color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def store(root, **options):
+    posters = PosterStore(str(root), **options)
+    # Renders run in a thread here; spawning render processes would dominate the test's run time
+    posters._pool = ThreadPoolExecutor(1)
+    return posters
+
+
+def test_fit_size_crops_to_the_target_ratio_without_upscaling():
+    assert _fit_size(2000, 3000, Derivative(384, 576)) == (384, 576)
+    assert _fit_size(200, 300, Derivative(384, 576)) == (200, 300)
+    assert _fit_size(4000, 3000, Derivative(1920, 1080)) == (1920, 1080)
+    assert _fit_size(800, 1200, Derivative(1920, 1080)) == (800, 450)
+
+
+def test_ingested_posters_are_served_and_rendered_again_once_evicted(tmp_path):
+    async def main():
+        posters = store(tmp_path)
+        await posters.start()
+        poster_ = await posters.ingest(poster())
+        digest = poster_["hash"]
+        assert poster_["sizes"]["card"] == {"width": 384, "height": 576}
+        assert posters.stats()["derivatives"] == len(DERIVATIVES) * len(FORMATS)
+
+        card = await posters.derivative(digest, "card", "webp")
+        assert Image.open(BytesIO(card)).size == (384, 576)
+        assert posters.hits == 1 and posters.misses == 0
+
+        # Evicted by another worker between requests: rendered again, and its bytes served from the render
+        os.unlink(posters.derivative_path(digest, "hero", "jpg"))
+        hero = await posters.derivative(digest, "hero", "jpg")
+        assert Image.open(BytesIO(hero)).size == (600, 338)
+        assert posters.misses == 1
+
+        assert await posters.derivative("0" * 32, "card", "webp") is None
+        await posters.stop()
+
+    asyncio.run(main())
+
+
+def test_derivative_cache_stays_within_its_byte_budget(tmp_path):
+    async def main():
+        posters = store(tmp_path)
+        await posters.start()
+        digests = [(await posters.ingest(poster(color=(0, 80, 120))))["hash"]]
+        # Room for about two and a half posters' derivatives
+        posters.max_bytes = posters.stats()["bytes"] * 5 // 2
+        digests += [(await posters.ingest(poster(color=(i * 40, 80, 120))))["hash"] for i in range(1, 4)]
+        on_disk = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for directory, _, names in os.walk(tmp_path / "derivatives") for name in names
+        )
+        stats = posters.stats()
+        assert posters.evicted > 0
+        assert stats["bytes"] == on_disk <= posters.max_bytes
+
+        # Least recently served goes first: the newest poster's card is still cached
+        assert os.path.exists(posters.derivative_path(digests[-1], "card", "webp"))
+        # A restart picks up what is left on disk
+        restarted = store(tmp_path, max_bytes=posters.max_bytes)
+        await restarted.start()
+        assert restarted.stats()["bytes"] == on_disk
+        await posters.stop()
+        await restarted.stop()
+
+    asyncio.run(main())
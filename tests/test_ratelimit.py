@@ -0,0 +1,77 @@
+import asyncio
+
+from pymongo.errors import ServerSelectionTimeoutError
+
+import ratelimit
+from ratelimit import MemoryBuckets, RateLimit, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def take(buckets, key, limit):
+    return asyncio.run(buckets.take(key, limit))
+
+
+def test_bucket_allows_a_burst_then_refills_at_the_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    buckets, limit = MemoryBuckets(), RateLimit(rate=2.0, burst=3)
+
+    assert [take(buckets, "a", limit) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Empty: one token arrives after 1 / rate seconds
+    assert take(buckets, "a", limit) == 0.5
+    clock.now += 0.25
+    assert take(buckets, "a", limit) == 0.25
+    clock.now += 0.25
+    assert take(buckets, "a", limit) == 0.0
+    # Never refills past the burst
+    clock.now += 100
+    assert [take(buckets, "a", limit) for _ in range(4)] == [0.0, 0.0, 0.0, 0.5]
+    # Other clients have their own bucket
+    assert take(buckets, "b", limit) == 0.0
+
+
+def test_least_recently_used_clients_are_evicted(monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "monotonic", Clock())
+    buckets, limit = MemoryBuckets(max_keys=2), RateLimit(rate=1.0, burst=1)
+    take(buckets, "a", limit)
+    take(buckets, "b", limit)
+    take(buckets, "a", limit)
+    take(buckets, "c", limit)
+    assert list(buckets._buckets) == ["a", "c"]
+    # An evicted client starts over with a full bucket
+    assert take(buckets, "b", limit) == 0.0
+
+
+class Unavailable:
+    async def take(self, key, limit):
+        raise ServerSelectionTimeoutError("no servers")
+
+    def __len__(self):
+        return 0
+
+
+def test_limiter_counts_and_fails_open(monkeypatch):
+    monkeypatch.setattr(ratelimit.time, "monotonic", Clock())
+    limiter = RateLimiter({"search": RateLimit(1.0, 1), "views": RateLimit(0, 1)})
+    assert "views" not in limiter.limits
+
+    async def run():
+        assert await limiter.check("search", "1.2.3.4") is None
+        assert await limiter.check("search", "1.2.3.4") == 1.0
+        assert await limiter.check("search", "5.6.7.8") is None
+        assert await limiter.check("views", "1.2.3.4") is None
+
+    asyncio.run(run())
+    stats = limiter.stats()
+    assert stats["allowed"] == 2 and stats["throttled"] == {"search": 1} and stats["trackedClients"] == 2
+
+    failing = RateLimiter({"search": RateLimit(1.0, 1)}, backend=Unavailable())
+    assert asyncio.run(failing.check("search", "1.2.3.4")) is None
+    assert failing.stats()["backendErrors"] == 1
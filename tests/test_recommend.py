@@ -0,0 +1,115 @@
+import asyncio
+import random
+
+import numpy as np
+from mongomock_motor import AsyncMongoMockClient
+
+from recommend import SimilarMovies
+
+GENRES = ["Drama", "Comedy", "Horror", "Action", "Romance"]
+CAST = [f"Actor {i}" for i in range(30)]
+WORDS = "heist family ghost love war robot island detective storm secret".split()
+
+
+def movie(rng, i):
+    return {
+        "id": f"m{i}",
+        "genres": rng.sample(GENRES, rng.randint(1, 2)),
+        "cast": rng.sample(CAST, 3),
+        "synopsis": " ".join(rng.choices(WORDS, k=8)),
+        "language": rng.choice(["English", "French"]),
+        "releaseYear": rng.randrange(1960, 2024),
+    }
+
+
+def assert_exact(index):
+    # Every live row lists its true top k by the vectors currently held
+    n = len(index._ids)
+    alive = index._alive[:n]
+    sims = index._vectors[:n] @ index._vectors[:n].T
+    sims[:, ~alive] = -np.inf
+    np.fill_diagonal(sims, -np.inf)
+    for row in np.nonzero(alive)[0]:
+        expected = np.sort(sims[row])[::-1][: index.k]
+        np.testing.assert_allclose(index._scores[row][: len(expected)], expected, rtol=1e-5)
+
+
+async def built(docs, **kwargs):
+    collection = AsyncMongoMockClient()["test"]["movies"]
+    if docs:
+        await collection.insert_many([dict(doc) for doc in docs])
+    index = SimilarMovies(dim=64, k=5, **kwargs)
+    await index.build(collection)
+    return index
+
+
+def test_batched_updates_keep_neighbors_exact():
+    rng = random.Random(1)
+
+    async def run():
+        index = await built([movie(rng, i) for i in range(60)])
+        assert_exact(index)
+
+        # A bulk import batch, edits and removals, applied in the background
+        index.add_many([movie(rng, i) for i in range(60, 100)])
+        index.add(movie(rng, 5))
+        index.remove("m7")
+        index.remove("m61")
+        assert index.stats()["pending"] == 42
+        await index.flush()
+        assert index.stats()["pending"] == 0
+        assert len(index) == 98
+        assert_exact(index)
+
+        for i in range(30):
+            if rng.random() < 0.5:
+                index.remove(f"m{rng.randrange(100)}")
+            else:
+                index.add(movie(rng, rng.randrange(120)))
+            if i % 7 == 0:
+                await index.flush()
+        await index.flush()
+        assert_exact(index)
+        live = set(index._rows)
+        for movie_id in live:
+            assert set(index.similar(movie_id, 5)) <= live - {movie_id}
+
+    asyncio.run(run())
+
+
+def test_updates_do_not_block_the_event_loop():
+    rng = random.Random(2)
+
+    async def run():
+        index = await built([movie(rng, i) for i in range(20)])
+        index.add_many([movie(rng, i) for i in range(20, 2000)])
+        # Queueing is all that happens inline; the scoring runs in a worker thread
+        assert len(index) == 20
+        ticks = 0
+        while index.stats()["pending"] or index._task is not None:
+            ticks += 1
+            await asyncio.sleep(0)
+        assert len(index) == 2000 and ticks > 1
+        await index.stop()
+
+    asyncio.run(run())
+
+
+def test_changes_during_the_build_are_applied_after_it():
+    rng = random.Random(3)
+    docs = [movie(rng, i) for i in range(10)]
+
+    async def run():
+        collection = AsyncMongoMockClient()["test"]["movies"]
+        await collection.insert_many([dict(doc) for doc in docs])
+        index = SimilarMovies(dim=64, k=5)
+        build = asyncio.ensure_future(index.build(collection))
+        await asyncio.sleep(0)
+        index.remove("m0")
+        index.add(movie(rng, 10))
+        await build
+        await index.flush()
+        assert "m0" not in index._rows and "m10" in index._rows
+        assert_exact(index)
+
+    asyncio.run(run())
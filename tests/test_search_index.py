@@ -0,0 +1,88 @@
+import math
+import random
+
+from search_index import SearchIndex, stem, tokenize
+
+WORDS = "heist space river ghost detective dragon winter city storm robot love war island secret".split()
+
+
+def catalog(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": f"m{i}",
+            "title": " ".join(rng.sample(WORDS, 2)),
+            "synopsis": " ".join(rng.choices(WORDS, k=rng.randint(5, 30))),
+            "cast": [f"actor{rng.randint(0, 20)}"],
+            "genres": [rng.choice(["Action", "Drama", "Comedy"])],
+            "releaseYear": rng.randint(1990, 1995),
+        }
+        for i in range(n)
+    ]
+
+
+def weights(index, q):
+    n = len(index)
+    return {
+        term: math.log(1 + (n - len(index._postings[term]) + 0.5) / (len(index._postings[term]) + 0.5))
+        for term in {stem(t) for t in tokenize(q)} if term in index._postings
+    }
+
+
+def exhaustive_scores(index, q, limit):
+    # Every document scored, the reference for the threshold algorithm's early exit
+    term_weights = weights(index, q)
+    scores = (index._score(movie_id, term_weights) for movie_id in index._doc_filters)
+    return sorted((score for score in scores if score > 0), reverse=True)[:limit]
+
+
+def test_tokenize_stems_and_drops_stopwords():
+    assert tokenize("The Dragons of the Storming Cities") == ["dragon", "storm", "city"]
+
+
+def test_top_k_matches_exhaustive_scoring():
+    index = SearchIndex()
+    index.add_many(catalog(500))
+    for q in ("heist ", "space river ", "ghost detective winter "):
+        ids = index.search(q, limit=10)
+        term_weights = weights(index, q)
+        assert [round(index._score(movie_id, term_weights), 9) for movie_id in ids] == \
+            [round(score, 9) for score in exhaustive_scores(index, q, 10)]
+
+
+def test_title_hits_outrank_synopsis_hits():
+    index = SearchIndex()
+    index.add({"id": "title", "title": "Ghost Story", "synopsis": "a quiet town", "cast": []})
+    index.add({"id": "synopsis", "title": "Quiet Town", "synopsis": "a ghost story", "cast": []})
+    assert index.search("ghost ") == ["title", "synopsis"]
+
+
+def test_last_word_matches_as_prefix():
+    index = SearchIndex()
+    index.add({"id": "a", "title": "Detective Winter", "synopsis": "", "cast": []})
+    assert index.search("detec") == ["a"]
+    # A finished word (trailing space) is not expanded
+    assert index.search("detec ") == []
+
+
+def test_filters_and_removal():
+    index = SearchIndex()
+    docs = catalog(200)
+    index.add_many(docs)
+    for movie_id in index.search("storm ", genre="Drama", year=1993, limit=50):
+        genres, year = index._doc_filters[movie_id]
+        assert "Drama" in genres and year == 1993
+
+    target = index.search("heist ", limit=1)[0]
+    index.remove(target)
+    assert target not in index.search("heist ", limit=500)
+    assert len(index) == 199
+
+
+def test_update_replaces_terms():
+    index = SearchIndex()
+    index.add({"id": "a", "title": "Robot War", "synopsis": "", "cast": []})
+    index.add({"id": "a", "title": "Island Love", "synopsis": "", "cast": []})
+    assert index.search("robot ") == []
+    assert index.search("island ") == ["a"]
+    assert len(index) == 1
@@ -0,0 +1,99 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from stats import CatalogStats
+
+
+class GatedMovies:
+    """A movies collection whose count waits for `gate`, holding a reconciliation mid-read."""
+
+    def __init__(self, movies, gate):
+        self._movies = movies
+        self.gate = gate
+
+    async def count_documents(self, query):
+        await self.gate.wait()
+        return await self._movies.count_documents(query)
+
+    def __getattr__(self, name):
+        return getattr(self._movies, name)
+
+
+class Database:
+    def __init__(self, db, gate):
+        self.movies = GatedMovies(db.movies, gate)
+        self.genres = db.genres
+
+
+async def catalog(view_counts):
+    db = AsyncMongoMockClient()["stats"]
+    await db.movies.insert_many([
+        {"id": f"m{i}", "title": f"Movie {i}", "viewCount": count, "posterUrl": "p"}
+        for i, count in enumerate(view_counts)
+    ])
+    return db
+
+
+def top_ids(stats):
+    return [movie["id"] for movie in stats.snapshot()["topMovies"]]
+
+
+def test_flushed_movie_outside_the_candidates_enters_the_top():
+    async def main():
+        db = await catalog([10, 20, 30, 40, 50, 60])
+        stats = CatalogStats(top_n=2)
+        stats._db = db
+        await stats.reconcile()
+        assert top_ids(stats) == ["m5", "m4"] and "m0" not in stats._top
+
+        # m0 climbs past everything between reconciliations
+        await db.movies.update_one({"id": "m0"}, {"$inc": {"viewCount": 100}})
+        stats.views_flushed({"m0": 100, "m5": 1})
+        await asyncio.gather(*stats._lookups)
+        assert top_ids(stats) == ["m0", "m5"]
+        assert stats.snapshot()["topMovies"][0]["viewCount"] == 110
+        assert stats.total_views == 210 + 101
+        # Still bounded: the weakest candidate made room
+        assert len(stats._top) == stats.capacity and "m2" not in stats._top
+
+    asyncio.run(main())
+
+
+def test_removing_top_movies_asks_for_a_reconciliation():
+    async def main():
+        db = await catalog([10, 20, 30, 40])
+        stats = CatalogStats(top_n=2)
+        stats._db = db
+        await stats.reconcile()
+        stats.movie_removed({"id": "m3", "viewCount": 40})
+        assert top_ids(stats) == ["m2", "m1"] and not stats._reconcile_now.is_set()
+        stats.movie_removed({"id": "m2", "viewCount": 30})
+        stats.movie_removed({"id": "m1", "viewCount": 20})
+        assert stats._reconcile_now.is_set()
+        assert stats.total_movies == 1 and stats.total_views == 10
+
+    asyncio.run(main())
+
+
+def test_changes_during_a_reconciliation_are_kept():
+    async def main():
+        gate = asyncio.Event()
+        stats = CatalogStats(top_n=2)
+        stats._db = Database(await catalog([10, 20]), gate)
+        reconciling = asyncio.create_task(stats.reconcile())
+        await asyncio.sleep(0.01)
+
+        # Flushed and added while the reconciliation's reads are in flight, after they were taken
+        stats.views_flushed({"m0": 5})
+        stats.movie_added({"id": "m9", "title": "New", "viewCount": 0})
+        gate.set()
+        await reconciling
+        await asyncio.gather(*stats._lookups)
+        return stats
+
+    stats = asyncio.run(main())
+    assert stats.total_views == 35
+    assert stats.total_movies == 3
+    assert stats._top["m0"]["viewCount"] == 15
+    assert "m9" in stats._top
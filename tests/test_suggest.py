@@ -0,0 +1,75 @@
+import random
+
+from suggest import MAX_SUGGESTIONS, PrefixIndex, Suggester, normalize, word_starts
+
+WORDS = ["star", "stone", "storm", "night", "nine", "alpha", "amber", "angel", "zero", "zone"]
+
+
+def brute_force(keys, scores, prefix, k=MAX_SUGGESTIONS):
+    items = [item for item, item_keys in keys.items() if any(key.startswith(prefix) for key in item_keys)]
+    return sorted((scores[item] for item in items), reverse=True)[:k]
+
+
+def build(rng, n):
+    index, keys, scores = PrefixIndex(), {}, {}
+    index.begin_load()
+    for i in range(n):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+        keys[f"m{i}"], scores[f"m{i}"] = word_starts(title), rng.randrange(1000)
+        index.set(f"m{i}", keys[f"m{i}"], scores[f"m{i}"])
+    index.end_load()
+    index.warm(min_range=20)
+    return index, keys, scores
+
+
+def test_memoized_tops_stay_exact_through_edits():
+    rng = random.Random(3)
+    index, keys, scores = build(rng, 400)
+    prefixes = ["s", "st", "sto", "n", "a", "an", "z", "star s", "x"]
+    for step in range(600):
+        item = f"m{rng.randrange(500)}"
+        action = rng.random()
+        if action < 0.3:
+            index.remove(item)
+            keys.pop(item, None)
+            scores.pop(item, None)
+        elif action < 0.6 and item in scores:
+            index.bump(item, rng.randrange(50))
+            scores[item] = index.scores[item]
+        else:
+            title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+            keys[item], scores[item] = word_starts(title), rng.randrange(1000)
+            index.set(item, keys[item], scores[item])
+        prefix = rng.choice(prefixes)
+        top = index.top(prefix, MAX_SUGGESTIONS)
+        assert [scores[i] for i in top] == brute_force(keys, scores, prefix), (step, prefix)
+        # Memoized lists are exact to their full depth, not just to the part served so far
+        for memoized, top in index._memo.items() if step % 25 == 0 else ():
+            assert [scores[i] for i in top] == brute_force(keys, scores, memoized, len(top)), (step, memoized)
+
+
+def test_removing_a_top_item_keeps_short_prefixes_warm():
+    index, keys, scores = build(random.Random(5), 400)
+    assert "s" in index._memo and "st" in index._memo
+    best = index.top("s", 1)[0]
+    index.remove(best)
+    assert "s" in index._memo and best not in index._memo["s"]
+    # An edit re-inserts the item in place
+    index.set(best, keys[best], scores[best])
+    assert index._memo["s"][0] == best
+
+
+def test_suggester_ranks_titles_and_cast_by_views():
+    suggester = Suggester()
+    suggester.add({"id": "1", "title": "Amélie", "cast": ["Audrey Tautou"], "viewCount": 5})
+    suggester.add({"id": "2", "title": "The Amber Room", "cast": ["Audrey Hepburn"], "viewCount": 9})
+    result = suggester.suggest("am")
+    assert [movie["id"] for movie in result["movies"]] == ["2", "1"]
+    assert [name["name"] for name in suggester.suggest("aud")["cast"]] == ["Audrey Hepburn", "Audrey Tautou"]
+
+    suggester.views_flushed({"1": 10})
+    assert suggester.suggest("am")["movies"][0]["id"] == "1"
+    suggester.remove("1")
+    assert [movie["id"] for movie in suggester.suggest("am")["movies"]] == ["2"]
+    assert suggester.suggest("tautou")["cast"] == []
+    assert normalize("  Amélie!") == "amelie"
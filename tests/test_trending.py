@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+from trending import DecayedTopK
+
+
+def brute_force(plays, half_life, now, k):
+    scores = {}
+    for movie_id, count, at in plays:
+        scores[movie_id] = scores.get(movie_id, 0.0) + count * 2 ** ((at - now) / half_life)
+    return sorted(scores.values(), reverse=True)[:k]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_top_matches_decayed_scores_of_every_play(seed):
+    rng = random.Random(seed)
+    half_life, k, now = 3600.0, 5, 1_700_000_000.0
+    top_k = DecayedTopK(half_life, k, now)
+    plays = []
+    for step in range(2000):
+        # Mostly steady traffic, with the odd quiet spell long enough to force a rebase
+        now += rng.expovariate(1 / 30) if rng.random() > 0.001 else half_life * 70
+        movie_id = f"m{int(rng.paretovariate(1.2)) % 40}"
+        if rng.random() < 0.01:
+            top_k.remove(movie_id)
+            plays = [play for play in plays if play[0] != movie_id]
+            continue
+        count = rng.randint(1, 3)
+        plays.append((movie_id, count, now))
+        top_k.add(movie_id, count, now)
+        if step % 50 == 0:
+            expected = brute_force(plays, half_life, now, k)
+            assert [score for _, score in top_k.top(k, now)] == pytest.approx(expected, abs=0.05)
+
+
+def test_ties_rank_by_id_and_scores_decay():
+    top_k = DecayedTopK(half_life=100.0, k=2, now=0.0)
+    for movie_id in ("b", "a", "c"):
+        top_k.add(movie_id, 2, 0.0)
+    assert [movie_id for movie_id, _ in top_k.top(2, 0.0)] == ["a", "b"]
+    assert top_k.top(1, 100.0)[0][1] == pytest.approx(1.0)
+    top_k.add("c", 1, 100.0)
+    assert top_k.top(1, 100.0) == [("c", pytest.approx(2.0))]
+
+
+def test_removing_a_top_movie_promotes_the_next_best():
+    top_k = DecayedTopK(half_life=100.0, k=2, now=0.0)
+    for movie_id, count in (("a", 5), ("b", 4), ("c", 3), ("d", 1)):
+        top_k.add(movie_id, count, 0.0)
+    top_k.remove("a")
+    assert [movie_id for movie_id, _ in top_k.top(2, 0.0)] == ["b", "c"]
+    top_k.remove("missing")
+    assert len(top_k) == 3
+
+
+def test_rebase_keeps_the_ranking_and_drops_faded_movies():
+    top_k = DecayedTopK(half_life=1.0, k=1, now=0.0)
+    top_k.add("old", 3, 0.0)
+    top_k.add("faded", 1, 0.0)
+    top_k.add("new", 1, 100.0)
+    # "old" is still in the top list and survives; "faded" decayed below MIN_SCORE and is dropped
+    assert set(top_k.scores(100.0)) == {"old", "new"}
+    assert top_k.top(1, 100.0) == [("new", pytest.approx(1.0))]
@@ -0,0 +1,100 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect
+
+from view_counter import ViewCounter
+
+
+class SlowCollection:
+    """Records bulk writes; each one waits until `release` is set."""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.writing = asyncio.Event()
+        self.increments = {}
+        self.fail = False
+
+    async def bulk_write(self, ops, ordered=True):
+        self.writing.set()
+        await self.release.wait()
+        if self.fail:
+            raise AutoReconnect("connection reset")
+        for op in ops:
+            movie_id = op._filter["id"]
+            self.increments[movie_id] = self.increments.get(movie_id, 0) + op._doc["$inc"]["viewCount"]
+
+
+def test_coalesces_increments_per_movie():
+    async def main():
+        collection = SlowCollection()
+        collection.release.set()
+        counter = ViewCounter(flush_interval=60)
+        counter.start(collection)
+        for _ in range(3):
+            await counter.add("a")
+        await counter.add("b", 2)
+        flushed = []
+        counter.add_listener(flushed.append)
+        assert await counter.flush() == 5
+        await counter.stop()
+        return collection, counter, flushed
+
+    collection, counter, flushed = asyncio.run(main())
+    assert collection.increments == {"a": 3, "b": 2}
+    assert flushed == [{"a": 3, "b": 2}]
+    assert counter.stats()["flushes"] == 1
+
+
+def test_stop_during_flush_keeps_the_batch():
+    async def main():
+        collection = SlowCollection()
+        counter = ViewCounter(flush_interval=60, flush_threshold=2)
+        counter.start(collection)
+        await counter.add("a")
+        await counter.add("a")
+        # The threshold wakes the background loop, which is now blocked inside bulk_write
+        await asyncio.wait_for(collection.writing.wait(), 1)
+        stopping = asyncio.create_task(counter.stop())
+        await asyncio.sleep(0.01)
+        collection.release.set()
+        await stopping
+        return collection, counter
+
+    collection, counter = asyncio.run(main())
+    assert collection.increments == {"a": 2}
+    assert counter.flushed == 2
+    assert counter.lost == 0
+
+
+def test_failed_flush_is_requeued_then_counted_lost_on_stop():
+    async def main():
+        collection = SlowCollection()
+        collection.fail = True
+        collection.release.set()
+        counter = ViewCounter(flush_interval=60)
+        counter.start(collection)
+        await counter.add("a", 3)
+        assert await counter.flush() == 0
+        assert counter.stats()["pending"] == 3
+        await counter.stop()
+        return counter
+
+    counter = asyncio.run(main())
+    assert counter.lost == 3
+    assert counter.failed_flushes == 2
+
+
+def test_backpressure_rejects_when_buffer_stays_full():
+    async def main():
+        collection = SlowCollection()
+        collection.fail = True
+        collection.release.set()
+        counter = ViewCounter(flush_interval=60, max_pending=2)
+        counter.start(collection)
+        assert await counter.add("a", 2)
+        assert not await counter.add("b")
+        await counter.stop()
+        return counter
+
+    counter = asyncio.run(main())
+    assert counter.backpressure_waits == 1